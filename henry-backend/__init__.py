@@ -1 +0,0 @@
-# Este archivo es necesario para que Python reconozca el directorio como un paquete.
\ No newline at end of file
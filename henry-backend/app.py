@@ -2,9 +2,9 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 import os
+import click
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -15,6 +15,19 @@ app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Número de proxies de confianza en X-Forwarded-For. Render pone uno delante de la
+# app; sin él, remote_addr sería la IP del proxy para todos los clientes y los
+# límites por IP bloquearían a todos a la vez. Con la app expuesta sin proxy, usar 0
+# (si no, cualquiera podría falsear su IP con la cabecera).
+TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', '1'))
+if TRUSTED_PROXIES:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
+# Entrega de archivos: X-Sendfile (Apache/lighttpd) o X-Accel-Redirect (nginx)
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', 'false').lower() in ('1', 'true', 'yes')
+app.config['X_ACCEL_REDIRECT_PREFIX'] = os.getenv('X_ACCEL_REDIRECT_PREFIX')
+
 # --- Inicio del manejo robusto de la clave secreta ---
 # Lee la clave secreta desde las variables de entorno
 jwt_secret_key = os.environ.get("JWT_SECRET_KEY")
@@ -29,7 +42,9 @@ if not jwt_secret_key:
 
 # Asigna la clave a la configuración de la aplicación
 app.config["JWT_SECRET_KEY"] = jwt_secret_key
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
+# Access tokens cortos (llevan rol y nombre) y refresh tokens que rotan en cada uso
+app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=int(os.getenv('ACCESS_TOKEN_MINUTES', '15')))
+app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=int(os.getenv('REFRESH_TOKEN_DAYS', '30')))
 # --- Fin del manejo robusto ---
 
 # Inicializar extensiones
@@ -43,6 +58,16 @@ from models.class_model import Class
 from models.presentation import Presentation
 from models.assignment import Assignment
 from models.material import Material
+from models.ai_job import AIJob
+from models.enrollment import Enrollment
+from models.upload_session import UploadSession, UploadChunk
+from models.professor_stats import ProfessorStats
+from models.revoked_token import RevokedToken
+from models.user_activity import UserActivity
+
+# Resolver ya las relaciones (backrefs incluidos) para poder usarlas en joinedload()
+from sqlalchemy.orm import configure_mappers
+configure_mappers()
 
 # Importar rutas
 from routes.auth import auth_bp
@@ -62,40 +87,60 @@ app.register_blueprint(ai_bp, url_prefix='/api/ai')
 app.register_blueprint(assignments_bp, url_prefix='/api/assignments')
 app.register_blueprint(materials_bp, url_prefix='/api/materials')
 
-# Crear tablas
-@app.before_request
-def create_tables():
-    db.create_all()
-
-    # Crear usuarios de demostración si no existen
-    if not User.query.filter_by(email='admin@henry.edu').first():
-        admin = User(
-            email='admin@henry.edu',
-            full_name='Mario Carbonó Administrador',
-            role='administrador',
-            password_hash=generate_password_hash('demo123')
-        )
-        db.session.add(admin)
-
-    if not User.query.filter_by(email='profesor@henry.edu').first():
-        profesor = User(
-            email='profesor@henry.edu',
-            full_name='Dr. Mario Carbonó',
-            role='profesor',
-            password_hash=generate_password_hash('demo123')
-        )
-        db.session.add(profesor)
-
-    if not User.query.filter_by(email='estudiante@henry.edu').first():
-        estudiante = User(
-            email='estudiante@henry.edu',
-            full_name='Raquel Toloza',
-            role='estudiante',
-            password_hash=generate_password_hash('demo123')
-        )
-        db.session.add(estudiante)
-
-    db.session.commit()
+# Contadores de descargas y visualizaciones con escritura diferida
+from services.counters import counters
+counters.init_app(app)
+
+# Estadísticas por profesor recalculadas en la transacción que las modifica
+from services.stats_tracker import stats_tracker
+stats_tracker.init_app(db)
+
+# Inicialización de la base de datos (esquema + usuarios demo) una sola vez
+from services.bootstrap import bootstrap_database
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Crea las tablas y los usuarios de demostración"""
+    bootstrap_database(app, force=True)
+    print('Base de datos inicializada')
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Aplica las migraciones de esquema pendientes"""
+    from services.migrations import run_migrations
+    applied = run_migrations(db.engine)
+    print(f"Migraciones aplicadas: {', '.join(applied)}" if applied else 'El esquema está al día')
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Falla si alguna consulta frecuente recorre la tabla completa"""
+    import sys
+    from services.migrations import check_query_plans
+    failures = check_query_plans(db.engine)
+    for name, plan in failures:
+        print(f"Sin índice: {name}\n{plan}\n")
+    if failures:
+        sys.exit(1)
+    print('Todas las consultas frecuentes usan índices')
+
+@app.cli.command('rebuild-stats')
+@click.option('--check', is_flag=True, help='Solo comparar con los valores reales, sin escribir')
+def rebuild_stats_command(check):
+    """Reconstruye la tabla professor_stats desde las tablas de origen"""
+    import sys
+    if check:
+        differences = ProfessorStats.check()
+        for professor_id, field, saved, actual in differences:
+            print(f"Profesor {professor_id}: {field} guardado={saved} real={actual}")
+        if differences:
+            sys.exit(1)
+        print('Las estadísticas están al día')
+        return
+    count = ProfessorStats.rebuild()
+    print(f'Estadísticas reconstruidas para {count} profesores')
+
+if os.getenv('HENRY_AUTO_BOOTSTRAP', 'true').lower() in ('1', 'true', 'yes'):
+    bootstrap_database(app)
 
 # Ruta principal
 @app.route('/')
@@ -135,6 +180,53 @@ def internal_error(error):
     db.session.rollback()
     return jsonify({'error': 'Error interno del servidor'}), 500
 
+# Usuario autenticado: una consulta por petición como máximo, cero si está en caché
+from sqlalchemy import event
+from services.user_cache import user_cache
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+
+@jwt.user_identity_loader
+def user_identity_lookup(user):
+    # El claim 'sub' debe ser una cadena
+    return str(user.id if isinstance(user, User) else user)
+
+@jwt.additional_claims_loader
+def add_user_claims(identity):
+    # Datos de presentación en el token: verify-token no necesita consultar la base de datos
+    if isinstance(identity, User):
+        return {'role': identity.role, 'name': identity.full_name, 'email': identity.email,
+                'ver': identity.token_version or 0}
+    return {}
+
+# Tokens revocados (logout, refresh tokens ya usados)
+from services.token_blocklist import token_blocklist
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return token_blocklist.is_revoked(jwt_payload)
+
+@jwt.revoked_token_loader
+def revoked_token_callback(jwt_header, jwt_payload):
+    return jsonify({'error': 'Token revocado'}), 401
+
+@jwt.user_lookup_loader
+def user_lookup_callback(jwt_header, jwt_payload):
+    user_id = int(jwt_payload['sub'])
+    user = user_cache.get(db.session, User, user_id)
+    if user is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            user_cache.set(user)
+    return user
+
+@jwt.user_lookup_error_loader
+def user_lookup_error_callback(jwt_header, jwt_payload):
+    return jsonify({'error': 'Usuario no encontrado'}), 404
+
 @jwt.expired_token_loader
 def expired_token_callback(jwt_header, jwt_payload):
     return jsonify({'error': 'Token expirado'}), 401
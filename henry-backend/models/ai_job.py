@@ -0,0 +1,52 @@
+from app import db
+from datetime import datetime
+import json
+import uuid
+
+class AIJob(db.Model):
+    __tablename__ = 'ai_jobs'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    operation = db.Column(db.String(50), nullable=False)  # 'chat', 'generate_quiz', ...
+    status = db.Column(db.String(20), default='queued')  # 'queued', 'running', 'completed', 'failed'
+    result_json = db.Column(db.Text)
+    error = db.Column(db.String(255))
+
+    # Relaciones
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'operation': self.operation,
+            'status': self.status,
+            'result': self.get_result(),
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def get_result(self):
+        """Retorna el resultado del trabajo parseado"""
+        if self.result_json:
+            try:
+                return json.loads(self.result_json)
+            except json.JSONDecodeError:
+                return None
+        return None
+
+    def set_result(self, result):
+        """Guarda el resultado del trabajo"""
+        self.result_json = json.dumps(result, ensure_ascii=False)
+
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    def __repr__(self):
+        return f'<AIJob {self.id} {self.operation} {self.status}>'
@@ -10,7 +10,7 @@ class Assignment(db.Model):
     type = db.Column(db.String(50), default='essay')  # 'essay', 'quiz', 'project', 'presentation'
     max_points = db.Column(db.Float, default=100.0)
     due_date = db.Column(db.DateTime, nullable=False)
-    status = db.Column(db.String(20), default='active')  # 'active', 'draft', 'closed'
+    status = db.Column(db.String(20), default='active', index=True)  # 'active', 'draft', 'closed'
     
     # Configuración de la tarea
     allow_late_submission = db.Column(db.Boolean, default=False)
@@ -18,8 +18,8 @@ class Assignment(db.Model):
     time_limit = db.Column(db.Integer)  # en minutos
     
     # Relaciones
-    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=False)
-    professor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=False, index=True)
+    professor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -28,7 +28,10 @@ class Assignment(db.Model):
     # Relaciones
     submissions = db.relationship('Submission', backref='assignment', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
+    def to_dict(self, submissions_count=None):
+        if submissions_count is None:
+            submissions_count = self.submissions.count()
+        
         return {
             'id': self.id,
             'title': self.title,
@@ -45,9 +48,45 @@ class Assignment(db.Model):
             'professor_id': self.professor_id,
             'professor_name': self.professor.full_name if self.professor else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'submissions_count': self.submissions.count()
+            'submissions_count': submissions_count
         }
     
+    @staticmethod
+    def count_submissions(assignment_ids):
+        """Conteo de entregas {assignment_id: total} con una sola consulta"""
+        if not assignment_ids:
+            return {}
+        rows = db.session.query(Submission.assignment_id, db.func.count()) \
+            .filter(Submission.assignment_id.in_(assignment_ids)) \
+            .group_by(Submission.assignment_id)
+        return dict(rows.all())
+    
+    @staticmethod
+    def count_submissions_by_state(assignment_ids):
+        """{assignment_id: (entregas, calificadas)} con una sola consulta"""
+        if not assignment_ids:
+            return {}
+        rows = db.session.query(
+            Submission.assignment_id,
+            db.func.count(),
+            db.func.count(Submission.grade)
+        ).filter(Submission.assignment_id.in_(assignment_ids)) \
+            .group_by(Submission.assignment_id)
+        return {assignment_id: (total, graded) for assignment_id, total, graded in rows}
+    
+    @staticmethod
+    def batch_to_dict(assignments, include_stats=False):
+        """Serializa varias tareas con los conteos de entregas en una sola consulta"""
+        counts = Assignment.count_submissions_by_state([a.id for a in assignments])
+        assignments_data = []
+        for assignment in assignments:
+            total, graded = counts.get(assignment.id, (0, 0))
+            assignment_data = assignment.to_dict(submissions_count=total)
+            if include_stats:
+                assignment_data['stats'] = assignment.get_submission_stats(total, graded)
+            assignments_data.append(assignment_data)
+        return assignments_data
+    
     def is_overdue(self):
         """Verifica si la tarea está vencida"""
         return datetime.utcnow() > self.due_date
@@ -59,10 +98,12 @@ class Assignment(db.Model):
             return delta.days
         return None
     
-    def get_submission_stats(self):
+    def get_submission_stats(self, total_submissions=None, graded_submissions=None):
         """Retorna estadísticas de entregas"""
-        total_submissions = self.submissions.count()
-        graded_submissions = self.submissions.filter(Submission.grade.isnot(None)).count()
+        if total_submissions is None:
+            total_submissions = self.submissions.count()
+        if graded_submissions is None:
+            graded_submissions = self.submissions.filter(Submission.grade.isnot(None)).count()
         
         return {
             'total_submissions': total_submissions,
@@ -77,6 +118,10 @@ class Assignment(db.Model):
 
 class Submission(db.Model):
     __tablename__ = 'submissions'
+    __table_args__ = (
+        # Conteo de intentos en submit_assignment y entregas por tarea
+        db.Index('ix_submissions_assignment_student', 'assignment_id', 'student_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text)
@@ -88,7 +133,7 @@ class Submission(db.Model):
     
     # Relaciones
     assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id'), nullable=False)
-    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Timestamps
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -113,6 +158,16 @@ class Submission(db.Model):
             'graded_at': self.graded_at.isoformat() if self.graded_at else None
         }
     
+    @staticmethod
+    def grading_targets(submission_ids):
+        """{submission_id: (professor_id, max_points)} de la tarea de cada entrega, con una sola consulta"""
+        if not submission_ids:
+            return {}
+        rows = db.session.query(Submission.id, Assignment.professor_id, Assignment.max_points) \
+            .join(Assignment, Submission.assignment_id == Assignment.id) \
+            .filter(Submission.id.in_(submission_ids))
+        return {submission_id: (professor_id, max_points) for submission_id, professor_id, max_points in rows}
+
     def is_late(self):
         """Verifica si la entrega fue tardía"""
         if self.assignment and self.submitted_at:
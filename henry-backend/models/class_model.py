@@ -1,5 +1,7 @@
 from app import db
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from services.stats_tracker import stats_tracker
 
 class Class(db.Model):
     __tablename__ = 'classes'
@@ -12,10 +14,10 @@ class Class(db.Model):
     schedule = db.Column(db.String(100))
     capacity = db.Column(db.Integer, default=30)
     enrolled_count = db.Column(db.Integer, default=0)
-    status = db.Column(db.String(20), default='active')  # 'active', 'draft', 'completed', 'cancelled'
+    status = db.Column(db.String(20), default='active', index=True)  # 'active', 'draft', 'completed', 'cancelled'
     
     # Relaciones
-    professor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    professor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -24,8 +26,15 @@ class Class(db.Model):
     # Relaciones con otros modelos
     materials = db.relationship('Material', backref='class_ref', lazy='dynamic', cascade='all, delete-orphan')
     assignments = db.relationship('Assignment', backref='class_ref', lazy='dynamic', cascade='all, delete-orphan')
+    enrollments = db.relationship('Enrollment', backref='class_ref', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
+    def to_dict(self, materials_count=None, assignments_count=None):
+        # Los conteos se pueden pasar precalculados (ver batch_to_dict)
+        if materials_count is None:
+            materials_count = self.materials.count()
+        if assignments_count is None:
+            assignments_count = self.assignments.count()
+        
         return {
             'id': self.id,
             'name': self.name,
@@ -40,51 +49,207 @@ class Class(db.Model):
             'professor_name': self.professor.full_name if self.professor else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'materials_count': self.materials.count(),
-            'assignments_count': self.assignments.count()
+            'materials_count': materials_count,
+            'assignments_count': assignments_count
         }
     
     def get_detailed_info(self):
         """Retorna información detallada de la clase incluyendo materiales y tareas"""
-        base_info = self.to_dict()
-        
-        # Agregar materiales
-        materials_list = []
-        for material in self.materials.all():
-            materials_list.append(material.to_dict())
+        from models.material import Material
+        from models.assignment import Assignment
         
-        # Agregar tareas
-        assignments_list = []
-        for assignment in self.assignments.all():
-            assignments_list.append(assignment.to_dict())
+        materials = Material.query.filter_by(class_id=self.id) \
+            .options(db.joinedload(Material.uploader)) \
+            .order_by(Material.id).all()
+        assignments = Assignment.query.filter_by(class_id=self.id) \
+            .options(db.joinedload(Assignment.professor)) \
+            .order_by(Assignment.id).all()
+        submissions_counts = Assignment.count_submissions([a.id for a in assignments])
         
+        base_info = self.to_dict(
+            materials_count=len(materials),
+            assignments_count=len(assignments)
+        )
         base_info.update({
-            'materials': materials_list,
-            'assignments': assignments_list
+            'materials': [m.to_dict() for m in materials],
+            'assignments': [
+                a.to_dict(submissions_count=submissions_counts.get(a.id, 0)) for a in assignments
+            ]
         })
         
         return base_info
     
+    def get_detail_version(self):
+        """
+        Valores que cambian cuando cambia get_detailed_info(), sin serializar
+        nada: sirve para el ETag del detalle (ver services/http_cache.py).
+        """
+        from models.user import User
+        from models.material import Material
+        from models.assignment import Assignment, Submission
+        
+        materials = db.session.query(
+            Material.id, Material.updated_at, Material.download_count, Material.uploaded_by
+        ).filter_by(class_id=self.id).order_by(Material.id).all()
+        
+        assignments = db.session.query(
+            db.func.count(db.distinct(Assignment.id)),
+            db.func.max(Assignment.updated_at),
+            db.func.count(Submission.id)
+        ).outerjoin(Submission, Submission.assignment_id == Assignment.id) \
+            .filter(Assignment.class_id == self.id).one()
+        
+        # Nombres del profesor y de quienes subieron materiales
+        user_ids = {self.professor_id} | {m.uploaded_by for m in materials}
+        users_updated_at = db.session.query(db.func.max(User.updated_at)) \
+            .filter(User.id.in_(user_ids)).scalar()
+        
+        return (
+            'class', self.id, self.updated_at, self.enrolled_count, users_updated_at,
+            [(m.id, m.updated_at, m.download_count or 0) for m in materials],
+            tuple(assignments)
+        )
+    
+    @staticmethod
+    def batch_to_dict(classes, materials_limit=None, assignments_limit=None):
+        """
+        Serializa varias clases con un número constante de consultas:
+        profesores en una consulta, un GROUP BY por tabla hija para los conteos
+        y, si se piden, los primeros materiales/tareas de cada clase con una
+        función de ventana. Produce el mismo JSON que to_dict().
+        """
+        from models.user import User
+        from models.material import Material
+        from models.assignment import Assignment
+        
+        classes = list(classes)
+        if not classes:
+            return []
+        
+        class_ids = [c.id for c in classes]
+        
+        # Cargar los profesores en el identity map; class_obj.professor ya no consulta
+        professor_ids = {c.professor_id for c in classes}
+        User.query.filter(User.id.in_(professor_ids)).all()
+        
+        materials_counts = _count_by(Material.class_id, class_ids)
+        assignments_counts = _count_by(Assignment.class_id, class_ids)
+        
+        classes_data = []
+        for class_obj in classes:
+            classes_data.append(class_obj.to_dict(
+                materials_count=materials_counts.get(class_obj.id, 0),
+                assignments_count=assignments_counts.get(class_obj.id, 0)
+            ))
+        
+        if materials_limit:
+            materials = _first_per_class(Material, class_ids, materials_limit) \
+                .options(db.joinedload(Material.uploader)).all()
+            by_class = {}
+            for material in materials:
+                by_class.setdefault(material.class_id, []).append(material.to_dict())
+            for class_data in classes_data:
+                class_data['materials'] = by_class.get(class_data['id'], [])
+        
+        if assignments_limit:
+            assignments = _first_per_class(Assignment, class_ids, assignments_limit) \
+                .options(db.joinedload(Assignment.professor)).all()
+            submissions_counts = Assignment.count_submissions([a.id for a in assignments])
+            by_class = {}
+            for assignment in assignments:
+                by_class.setdefault(assignment.class_id, []).append(
+                    assignment.to_dict(submissions_count=submissions_counts.get(assignment.id, 0))
+                )
+            for class_data in classes_data:
+                class_data['recent_assignments'] = by_class.get(class_data['id'], [])
+        
+        return classes_data
+    
     def can_enroll(self):
         """Verifica si la clase tiene cupo disponible"""
         return self.enrolled_count < self.capacity and self.status == 'active'
     
-    def enroll_student(self):
-        """Inscribe un estudiante a la clase"""
-        if self.can_enroll():
-            self.enrolled_count += 1
+    def is_enrolled(self, student_id):
+        """Verifica si el estudiante está inscrito en la clase"""
+        from models.enrollment import Enrollment
+        return db.session.query(
+            Enrollment.query.filter_by(class_id=self.id, student_id=student_id).exists()
+        ).scalar()
+    
+    def enroll_student(self, student_id):
+        """
+        Inscribe un estudiante a la clase. El cupo se reserva con un único
+        UPDATE condicional (enrolled_count < capacity), atómico en la base de
+        datos, y la restricción única de enrollments impide inscribirse dos
+        veces; ambos ocurren en la misma transacción.
+        Retorna (True, None) o (False, mensaje de error).
+        """
+        from models.enrollment import Enrollment
+        
+        seat = db.session.execute(
+            db.update(Class)
+            .where(
+                Class.id == self.id,
+                Class.status == 'active',
+                Class.enrolled_count < Class.capacity
+            )
+            .values(enrolled_count=Class.enrolled_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if seat.rowcount == 0:
+            db.session.rollback()
+            return False, 'La clase no tiene cupos disponibles o no está activa'
+        
+        db.session.add(Enrollment(class_id=self.id, student_id=student_id))
+        try:
             db.session.commit()
-            return True
-        return False
+        except IntegrityError:
+            # Ya estaba inscrito: el rollback también devuelve el cupo
+            db.session.rollback()
+            return False, 'Ya estás inscrito en esta clase'
+        
+        return True, None
     
-    def unenroll_student(self):
+    def unenroll_student(self, student_id):
         """Desinscribe un estudiante de la clase"""
-        if self.enrolled_count > 0:
-            self.enrolled_count -= 1
-            db.session.commit()
-            return True
-        return False
+        from models.enrollment import Enrollment
+        
+        deleted = Enrollment.query.filter_by(class_id=self.id, student_id=student_id) \
+            .delete(synchronize_session=False)
+        if not deleted:
+            db.session.rollback()
+            return False
+        
+        db.session.execute(
+            db.update(Class)
+            .where(Class.id == self.id, Class.enrolled_count > 0)
+            .values(enrolled_count=Class.enrolled_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        # El DELETE y el UPDATE masivos no pasan por el flush
+        stats_tracker.mark(db.session, self.professor_id, ('classes',))
+        db.session.commit()
+        return True
     
     def __repr__(self):
         return f'<Class {self.name}>'
 
+
+def _count_by(column, ids):
+    """Conteo agrupado {id: total} con una sola consulta"""
+    rows = db.session.query(column, db.func.count()).filter(column.in_(ids)).group_by(column)
+    return dict(rows.all())
+
+
+def _first_per_class(model, class_ids, limit):
+    """Query con las primeras `limit` filas (por id) de cada clase"""
+    row_number = db.func.row_number().over(
+        partition_by=model.class_id,
+        order_by=model.id
+    ).label('row_number')
+    ranked = db.session.query(model.id.label('id'), row_number) \
+        .filter(model.class_id.in_(class_ids)).subquery()
+    return model.query.join(ranked, model.id == ranked.c.id) \
+        .filter(ranked.c.row_number <= limit) \
+        .order_by(model.class_id, model.id)
+
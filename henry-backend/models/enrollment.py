@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime
+
+class Enrollment(db.Model):
+    __tablename__ = 'enrollments'
+    __table_args__ = (
+        # Un estudiante solo puede inscribirse una vez en cada clase
+        db.UniqueConstraint('class_id', 'student_id', name='uq_enrollments_class_student'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Relaciones
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    student = db.relationship('User', backref=db.backref('enrollments', lazy='dynamic'))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'class_id': self.class_id,
+            'student_id': self.student_id,
+            'student_name': self.student.full_name if self.student else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<Enrollment class={self.class_id} student={self.student_id}>'
@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from services.counters import counters
 
 class Material(db.Model):
     __tablename__ = 'materials'
@@ -11,15 +12,16 @@ class Material(db.Model):
     file_path = db.Column(db.String(255))
     url = db.Column(db.String(500))
     file_size = db.Column(db.BigInteger)  # en bytes
+    file_hash = db.Column(db.String(64), index=True)  # SHA-256 del archivo en el almacén (services/blob_store.py)
     mime_type = db.Column(db.String(100))
     
     # Metadatos adicionales
-    is_public = db.Column(db.Boolean, default=True)
+    is_public = db.Column(db.Boolean, default=True, index=True)
     download_count = db.Column(db.Integer, default=0)
     
     # Relaciones
-    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=False)
-    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=False, index=True)
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -40,7 +42,7 @@ class Material(db.Model):
             'file_size_formatted': self.get_formatted_size(),
             'mime_type': self.mime_type,
             'is_public': self.is_public,
-            'download_count': self.download_count,
+            'download_count': self.get_download_count(),
             'class_id': self.class_id,
             'class_name': self.class_ref.name if self.class_ref else None,
             'uploaded_by': self.uploaded_by,
@@ -54,22 +56,39 @@ class Material(db.Model):
         if not self.file_size:
             return None
         
-        # Convertir bytes a unidades más legibles
+        # Convertir bytes a unidades más legibles (sin modificar self.file_size)
+        size = float(self.file_size)
         for unit in ['B', 'KB', 'MB', 'GB']:
-            if self.file_size < 1024.0:
-                return f"{self.file_size:.1f} {unit}"
-            self.file_size /= 1024.0
-        return f"{self.file_size:.1f} TB"
+            if size < 1024.0:
+                return f"{size:.1f} {unit}"
+            size /= 1024.0
+        return f"{size:.1f} TB"
     
     def increment_download_count(self):
-        """Incrementa el contador de descargas"""
-        self.download_count += 1
-        db.session.commit()
+        """Incrementa el contador de descargas (escritura diferida, ver services/counters.py)"""
+        counters.increment(Material, 'download_count', self.id)
+    
+    def get_download_count(self):
+        """
+        Descargas guardadas. No suma las pendientes del buffer: son de este
+        worker, y cada worker daría un número (y un ETag) distinto.
+        """
+        return self.download_count or 0
+    
+    def get_detail_version(self):
+        """Valores que cambian cuando cambia to_dict(); sirve para el ETag"""
+        return (
+            'material', self.id, self.updated_at, self.get_download_count(),
+            self.class_ref.updated_at if self.class_ref else None,
+            self.uploader.updated_at if self.uploader else None
+        )
     
     def get_download_url(self):
         """Retorna la URL de descarga del material"""
         if self.url:
             return self.url
+        elif self.file_hash:
+            return f"/api/materials/{self.id}/file"
         elif self.file_path:
             return f"/api/materials/{self.id}/download"
         return None
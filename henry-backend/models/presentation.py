@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from services.counters import counters
 import json
 
 class Presentation(db.Model):
@@ -11,7 +12,9 @@ class Presentation(db.Model):
     audience = db.Column(db.String(100))
     duration = db.Column(db.String(20))
     style = db.Column(db.String(50), default='professional')
-    status = db.Column(db.String(20), default='draft')  # 'draft', 'completed', 'generating'
+    status = db.Column(db.String(20), default='draft')  # 'draft', 'completed', 'generating', 'failed'
+    progress = db.Column(db.Integer, default=0)  # 0-100 mientras se procesa un archivo subido
+    error = db.Column(db.String(255))
     slides_count = db.Column(db.Integer, default=0)
     views_count = db.Column(db.Integer, default=0)
     
@@ -23,7 +26,7 @@ class Presentation(db.Model):
     content_json = db.Column(db.Text)  # JSON con slides y metadata
     
     # Relaciones
-    author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -38,8 +41,10 @@ class Presentation(db.Model):
             'duration': self.duration,
             'style': self.style,
             'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
             'slides_count': self.slides_count,
-            'views_count': self.views_count,
+            'views_count': self.get_views_count(),
             'author_id': self.author_id,
             'author_name': self.author.full_name if self.author else None,
             'source_type': self.source_type, # <--- AÑADIDO
@@ -64,9 +69,22 @@ class Presentation(db.Model):
             self.slides_count = len(content_dict['slides'])
     
     def increment_views(self):
-        """Incrementa el contador de visualizaciones"""
-        self.views_count += 1
-        db.session.commit()
+        """Incrementa el contador de visualizaciones (escritura diferida, ver services/counters.py)"""
+        counters.increment(Presentation, 'views_count', self.id)
+    
+    def get_views_count(self):
+        """
+        Visualizaciones guardadas. No suma las pendientes del buffer: son de
+        este worker, y cada worker daría un número (y un ETag) distinto.
+        """
+        return self.views_count or 0
+    
+    def get_detail_version(self):
+        """Valores que cambian cuando cambia to_dict(); sirve para el ETag"""
+        return (
+            'presentation', self.id, self.updated_at, self.get_views_count(),
+            self.author.updated_at if self.author else None
+        )
     
     def get_detailed_info(self):
         """Retorna información detallada incluyendo contenido"""
@@ -0,0 +1,197 @@
+from app import db
+from datetime import datetime
+
+class ProfessorStats(db.Model):
+    """
+    Resumen precalculado por profesor para el dashboard y el perfil.
+    Se recalcula en la misma transacción que modifica clases, materiales,
+    tareas, inscripciones o presentaciones, solo en los campos afectados y
+    con la fila bloqueada (ver refresh() y services/stats_tracker.py);
+    leerlo es una sola consulta por clave primaria.
+    `flask --app app rebuild-stats` lo reconstruye desde cero.
+    """
+    __tablename__ = 'professor_stats'
+
+    STAT_FIELDS = (
+        'total_classes', 'active_classes', 'total_students',
+        'total_materials', 'total_assignments', 'total_presentations'
+    )
+    # Campos que se calculan juntos (una consulta por grupo)
+    GROUPS = {
+        'classes': ('total_classes', 'active_classes', 'total_students'),
+        'materials': ('total_materials',),
+        'assignments': ('total_assignments',),
+        'presentations': ('total_presentations',),
+    }
+
+    professor_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_classes = db.Column(db.Integer, nullable=False, default=0)
+    active_classes = db.Column(db.Integer, nullable=False, default=0)
+    total_students = db.Column(db.Integer, nullable=False, default=0)
+    total_materials = db.Column(db.Integer, nullable=False, default=0)
+    total_assignments = db.Column(db.Integer, nullable=False, default=0)
+    total_presentations = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.STAT_FIELDS}
+
+    @staticmethod
+    def get_for(professor_id):
+        """Estadísticas del profesor; si aún no existen se calculan y se guardan"""
+        stats = db.session.get(ProfessorStats, professor_id)
+        if stats is None:
+            ProfessorStats.refresh([professor_id])
+            db.session.commit()
+            stats = db.session.get(ProfessorStats, professor_id)
+        return stats
+
+    @staticmethod
+    def compute(professor_ids=None, groups=None):
+        """
+        Calcula las estadísticas desde las tablas de origen con un GROUP BY por
+        tabla. Sin `professor_ids` calcula las de todos los profesores; con
+        `groups` (claves de GROUPS) solo esos campos.
+        Retorna {professor_id: {campo: valor}}.
+        """
+        return ProfessorStats._compute(ProfessorStats._professors(professor_ids), groups)
+
+    @staticmethod
+    def _professors(user_ids=None):
+        """Ids de `user_ids` (o de todos) que son profesores"""
+        from models.user import User
+
+        query = db.session.query(User.id).filter(User.role == 'profesor')
+        if user_ids is not None:
+            query = query.filter(User.id.in_(set(user_ids)))
+        return {user_id for (user_id,) in query}
+
+    @staticmethod
+    def _compute(professor_ids, groups=None):
+        from models.class_model import Class
+        from models.material import Material
+        from models.assignment import Assignment
+        from models.presentation import Presentation
+
+        groups = set(groups or ProfessorStats.GROUPS)
+        fields = [f for group in groups for f in ProfessorStats.GROUPS[group]]
+        stats = {pid: dict.fromkeys(fields, 0) for pid in professor_ids}
+        if not stats:
+            return stats
+
+        if 'classes' in groups:
+            classes = db.session.query(
+                Class.professor_id,
+                db.func.count(Class.id),
+                db.func.count(db.case((Class.status == 'active', 1))),
+                db.func.coalesce(db.func.sum(Class.enrolled_count), 0)
+            ).filter(Class.professor_id.in_(professor_ids)).group_by(Class.professor_id)
+            for pid, total, active, students in classes:
+                stats[pid].update(total_classes=total, active_classes=active, total_students=students)
+
+        if 'materials' in groups:
+            materials = db.session.query(Class.professor_id, db.func.count(Material.id)) \
+                .join(Material, Material.class_id == Class.id) \
+                .filter(Class.professor_id.in_(professor_ids)).group_by(Class.professor_id)
+            for pid, total in materials:
+                stats[pid]['total_materials'] = total
+
+        for group, column, field in (('assignments', Assignment.professor_id, 'total_assignments'),
+                                     ('presentations', Presentation.author_id, 'total_presentations')):
+            if group not in groups:
+                continue
+            rows = db.session.query(column, db.func.count()) \
+                .filter(column.in_(professor_ids)).group_by(column)
+            for pid, total in rows:
+                stats[pid][field] = total
+
+        return stats
+
+    @staticmethod
+    def refresh(professor_ids=None, groups=None):
+        """
+        Recalcula y guarda las estadísticas de estos profesores (o de todos);
+        con `groups` solo esos campos. Retorna cuántos profesores se actualizaron.
+
+        Antes de leer las tablas de origen se bloquean sus filas
+        (SELECT ... FOR UPDATE, en orden de professor_id). Así dos
+        transacciones que afectan al mismo profesor se serializan y la
+        segunda calcula viendo lo que confirmó la primera; sin el bloqueo,
+        en READ COMMITTED cada una escribiría totales que ignoran a la otra.
+        """
+        professor_ids = sorted(ProfessorStats._professors(professor_ids))
+        if not professor_ids:
+            return 0
+
+        table = ProfessorStats.__table__
+        created = ProfessorStats._ensure_rows(professor_ids)
+        db.session.execute(
+            db.select(table.c.professor_id)
+            .where(table.c.professor_id.in_(professor_ids))
+            .order_by(table.c.professor_id)
+            .with_for_update()
+        )
+
+        # Las filas recién creadas necesitan todos los campos
+        values = ProfessorStats._compute(created)
+        values.update(ProfessorStats._compute([pid for pid in professor_ids if pid not in created], groups))
+        now = datetime.utcnow()
+        db.session.execute(
+            db.update(ProfessorStats),
+            [dict(professor_id=pid, updated_at=now, **fields) for pid, fields in values.items()]
+        )
+        return len(values)
+
+    @staticmethod
+    def _ensure_rows(professor_ids):
+        """Crea las filas que falten (en cero); retorna los ids creados"""
+        table = ProfessorStats.__table__
+        dialect = db.session.get_bind().dialect.name
+        rows = [dict(professor_id=pid, updated_at=datetime.utcnow(),
+                     **dict.fromkeys(ProfessorStats.STAT_FIELDS, 0)) for pid in professor_ids]
+
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table).values(rows) \
+                .on_conflict_do_nothing(index_elements=[table.c.professor_id]) \
+                .returning(table.c.professor_id)
+            return {pid for (pid,) in db.session.execute(stmt)}
+
+        existing = {pid for (pid,) in db.session.execute(
+            db.select(table.c.professor_id).where(table.c.professor_id.in_(professor_ids))
+        )}
+        missing = [row for row in rows if row['professor_id'] not in existing]
+        if missing:
+            db.session.execute(db.insert(table), missing)
+        return {row['professor_id'] for row in missing}
+
+    @staticmethod
+    def check():
+        """
+        Compara las estadísticas guardadas con las calculadas desde cero.
+        Retorna [(professor_id, campo, guardado, real)] para las que difieren.
+        """
+        actual = ProfessorStats.compute()
+        stored = {s.professor_id: s for s in ProfessorStats.query.all()}
+        differences = []
+        for pid, fields in sorted(actual.items()):
+            row = stored.get(pid)
+            for field, value in fields.items():
+                saved = getattr(row, field) if row else None
+                if saved != value:
+                    differences.append((pid, field, saved, value))
+        return differences
+
+    @staticmethod
+    def rebuild():
+        """Reconstruye todas las filas desde cero; retorna cuántos profesores se calcularon"""
+        ProfessorStats.query.delete(synchronize_session=False)
+        count = ProfessorStats.refresh()
+        db.session.commit()
+        return count
+
+    def __repr__(self):
+        return f'<ProfessorStats {self.professor_id}>'
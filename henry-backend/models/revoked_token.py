@@ -0,0 +1,16 @@
+from app import db
+from datetime import datetime
+
+class RevokedToken(db.Model):
+    """Tokens JWT revocados (cierre de sesión o refresh token ya rotado) hasta que expiran"""
+    __tablename__ = 'revoked_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    token_type = db.Column(db.String(10), nullable=False)  # 'access', 'refresh'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RevokedToken {self.token_type} {self.jti}>'
@@ -0,0 +1,79 @@
+from app import db
+from datetime import datetime
+import uuid
+
+class UploadSession(db.Model):
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    status = db.Column(db.String(20), default='uploading')  # 'uploading', 'completing', 'completed'
+
+    # Archivo esperado
+    file_name = db.Column(db.String(255), nullable=False)
+    mime_type = db.Column(db.String(100))
+    total_size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    total_chunks = db.Column(db.Integer, nullable=False)
+
+    # Datos del material que se creará al completar la subida
+    name = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    type = db.Column(db.String(50), nullable=False)
+    is_public = db.Column(db.Boolean, default=True)
+
+    # Relaciones
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=False)
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id'))
+
+    chunks = db.relationship('UploadChunk', backref='session', lazy='dynamic', cascade='all, delete-orphan')
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def expected_chunk_size(self, index):
+        """Tamaño que debe tener el fragmento `index` (el último puede ser menor)"""
+        if index == self.total_chunks - 1:
+            return self.total_size - index * self.chunk_size
+        return self.chunk_size
+
+    def received_chunks(self):
+        return [index for (index,) in db.session.query(UploadChunk.chunk_index)
+                .filter_by(session_id=self.id).order_by(UploadChunk.chunk_index)]
+
+    def to_dict(self):
+        received = self.received_chunks()
+        received_set = set(received)
+        return {
+            'id': self.id,
+            'status': self.status,
+            'file_name': self.file_name,
+            'total_size': self.total_size,
+            'chunk_size': self.chunk_size,
+            'total_chunks': self.total_chunks,
+            'received_chunks': received,
+            'missing_chunks': [i for i in range(self.total_chunks) if i not in received_set],
+            'material_id': self.material_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<UploadSession {self.id}>'
+
+
+class UploadChunk(db.Model):
+    __tablename__ = 'upload_chunks'
+    __table_args__ = (
+        db.UniqueConstraint('session_id', 'chunk_index', name='uq_upload_chunks_session_index'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(32), db.ForeignKey('upload_sessions.id'), nullable=False)
+    chunk_index = db.Column(db.Integer, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UploadChunk {self.session_id}:{self.chunk_index}>'
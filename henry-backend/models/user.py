@@ -1,9 +1,14 @@
 from app import db
 from datetime import datetime
-from werkzeug.security import check_password_hash
+from services.password_hasher import password_hasher
 
 class User(db.Model):
     __tablename__ = 'users'
+    # Columnas que no se exponen en proyecciones (?fields=)
+    __hidden_fields__ = ('password_hash',)
+    __table_args__ = (
+        db.Index('ix_users_role_is_active', 'role', 'is_active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
@@ -12,7 +17,10 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     avatar_url = db.Column(db.String(255))
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_login_at = db.Column(db.DateTime, index=True)
+    # Se incrementa al cambiar la contraseña; /refresh rechaza los tokens con otra versión
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Información adicional por rol
@@ -28,7 +36,29 @@ class User(db.Model):
     assignments_created = db.relationship('Assignment', foreign_keys='Assignment.professor_id', backref='professor', lazy='dynamic')
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def set_password(self, password):
+        self.password_hash = password_hasher.hash(password)
+    
+    def record_login(self):
+        """
+        Guarda la fecha del inicio de sesión sin tocar updated_at (no es un
+        cambio de perfil) y anota el día en user_activity para las series de
+        actividad.
+        """
+        from models.user_activity import UserActivity
+        now = datetime.utcnow()
+        db.session.execute(
+            db.update(User)
+            .where(User.id == self.id)
+            .values(last_login_at=now, updated_at=User.updated_at)
+        )
+        UserActivity.record(self.id, now)
+        db.session.commit()
+        # El UPDATE masivo no pasa por los eventos del ORM que invalidan la caché
+        from services.user_cache import user_cache
+        user_cache.invalidate(self.id)
     
     def to_dict(self):
         return {
@@ -39,6 +69,7 @@ class User(db.Model):
             'avatar_url': self.avatar_url,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_login_at': self.last_login_at.isoformat() if self.last_login_at else None,
             'institution': self.institution,
             'department': self.department,
             'student_id': self.student_id,
@@ -51,15 +82,17 @@ class User(db.Model):
         base_data = self.to_dict()
         
         if self.role == 'profesor':
+            from models.professor_stats import ProfessorStats
+            stats = ProfessorStats.get_for(self.id)
             base_data.update({
-                'classes_count': self.classes_teaching.count(),
-                'presentations_count': self.presentations.count(),
-                'assignments_count': self.assignments_created.count()
+                'classes_count': stats.total_classes,
+                'presentations_count': stats.total_presentations,
+                'assignments_count': stats.total_assignments
             })
         elif self.role == 'estudiante':
             # Aquí se podrían agregar estadísticas específicas del estudiante
             base_data.update({
-                'enrolled_classes': 0,  # Implementar cuando se cree la relación
+                'enrolled_classes': self.enrollments.count(),
                 'completed_assignments': 0,
                 'average_grade': 0.0
             })
@@ -0,0 +1,35 @@
+from app import db
+from datetime import datetime
+
+class UserActivity(db.Model):
+    """Días en que cada usuario inició sesión (una fila por usuario y día)"""
+    __tablename__ = 'user_activity'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', name='uq_user_activity_user_day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    day = db.Column(db.Date, nullable=False, index=True)
+
+    @staticmethod
+    def record(user_id, when=None):
+        """Anota el día de actividad (sin efecto si ya estaba); no hace commit"""
+        row = {'user_id': user_id, 'day': (when or datetime.utcnow()).date()}
+        table = UserActivity.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            db.session.execute(insert(table).values(row).on_conflict_do_nothing(
+                index_elements=[table.c.user_id, table.c.day]
+            ))
+            return
+        exists = db.session.query(table.c.id).filter_by(**row).first()
+        if exists is None:
+            db.session.execute(db.insert(table).values(row))
+
+    def __repr__(self):
+        return f'<UserActivity {self.user_id} {self.day}>'
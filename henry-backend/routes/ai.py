@@ -1,26 +1,68 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.user import User
+from flask import Blueprint, request, jsonify, current_app, url_for, Response, stream_with_context
+from flask_jwt_extended import jwt_required, current_user
+from models.ai_job import AIJob
 from services.ai_service import AIService
+from services.ai_jobs import AIJobRunner
+from services.task_queue import QueueFullError
 from app import db
+import json
+import logging
+import os
+import threading
 import time
-import random
 
 ai_bp = Blueprint('ai', __name__)
+logger = logging.getLogger(__name__)
 
 # Instancia del servicio de IA
 ai_service = AIService()
 
+# Pool acotado para las generaciones: las peticiones solo encolan el trabajo
+ai_jobs = AIJobRunner(
+    max_workers=int(os.getenv('AI_JOB_WORKERS', '4')),
+    max_pending=int(os.getenv('AI_JOB_MAX_PENDING', '32')),
+    timeout_minutes=int(os.getenv('AI_JOB_TIMEOUT_MINUTES', '30'))
+)
+
+# Streams de chat simultáneos por worker: cada uno ocupa un hilo durante toda
+# la generación, así que se limitan para dejar hilos libres al resto de la API
+ai_stream_slots = threading.BoundedSemaphore(int(os.getenv('AI_STREAM_MAX_CONCURRENT', '2')))
+
+def enqueue_ai_job(user, operation, fn):
+    """Encola una operación de IA y responde de inmediato con el id del trabajo"""
+    try:
+        job = ai_jobs.submit(current_app._get_current_object(), user.id, operation, fn)
+    except QueueFullError:
+        return jsonify({'error': 'El servicio de IA está saturado, intenta de nuevo en unos segundos'}), 503, {'Retry-After': '5'}
+    
+    status_url = url_for('ai.get_job', job_id=job.id)
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': status_url
+    }), 202, {'Location': status_url}
+
+def wants_stream(data):
+    """El cliente pide streaming con ?stream=1, 'stream': true o Accept: text/event-stream"""
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    if data.get('stream') is True:
+        return True
+    return request.accept_mimetypes.best == 'text/event-stream'
+
+def sse_event(data, event=None):
+    """Formatea un evento Server-Sent Events"""
+    payload = json.dumps(data, ensure_ascii=False)
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
 @ai_bp.route('/chat', methods=['POST'])
 @jwt_required()
 def chat_with_ai():
     """Chat con el asistente de IA"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
         
         data = request.get_json()
         message = data.get('message', '').strip()
@@ -28,17 +70,42 @@ def chat_with_ai():
         if not message:
             return jsonify({'error': 'Mensaje es requerido'}), 400
         
-        # Simular tiempo de procesamiento
-        time.sleep(random.uniform(1, 3))
-        
-        # Generar respuesta basada en el rol del usuario
-        response = ai_service.generate_response(message, user.role, user.full_name)
-        
-        return jsonify({
-            'response': response,
-            'timestamp': time.time(),
-            'user_role': user.role
-        }), 200
+        user_role = user.role
+        user_name = user.full_name
+        
+        if wants_stream(data):
+            if not ai_stream_slots.acquire(blocking=False):
+                return jsonify({'error': 'El servicio de IA está saturado, intenta de nuevo en unos segundos'}), 503, {'Retry-After': '5'}
+            
+            # Cada fragmento se envía en cuanto se genera
+            def generate():
+                try:
+                    for chunk in ai_service.generate_response_stream(message, user_role, user_name):
+                        yield sse_event({'delta': chunk})
+                except Exception:
+                    logger.exception('Error durante el streaming del chat')
+                    yield sse_event({'error': 'Error interno del servidor'}, event='error')
+                    return
+                yield sse_event({'timestamp': time.time(), 'user_role': user_role}, event='done')
+            
+            response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            })
+            # Se libera al cerrar la respuesta, también si el cliente se desconecta
+            response.call_on_close(ai_stream_slots.release)
+            return response
+        
+        def run():
+            # Generar respuesta basada en el rol del usuario
+            response = ai_service.generate_response(message, user_role, user_name)
+            return {
+                'response': response,
+                'timestamp': time.time(),
+                'user_role': user_role
+            }
+        
+        return enqueue_ai_job(user, 'chat', run)
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -48,11 +115,7 @@ def chat_with_ai():
 def generate_presentation():
     """Generar presentación con IA"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
         
         data = request.get_json()
         
@@ -62,19 +125,20 @@ def generate_presentation():
             if field not in data or not data[field]:
                 return jsonify({'error': f'El campo {field} es requerido'}), 400
         
-        # Simular proceso de generación
-        presentation_data = ai_service.generate_presentation(
-            title=data['title'],
-            topic=data['topic'],
-            duration=data['duration'],
-            audience=data['audience'],
-            style=data['style']
-        )
-        
-        return jsonify({
-            'presentation': presentation_data,
-            'message': 'Presentación generada exitosamente'
-        }), 200
+        def run():
+            presentation_data = ai_service.generate_presentation(
+                title=data['title'],
+                topic=data['topic'],
+                duration=data['duration'],
+                audience=data['audience'],
+                style=data['style']
+            )
+            return {
+                'presentation': presentation_data,
+                'message': 'Presentación generada exitosamente'
+            }
+        
+        return enqueue_ai_job(user, 'generate_presentation', run)
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -84,10 +148,9 @@ def generate_presentation():
 def generate_quiz():
     """Generar cuestionario con IA"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
         
-        if not user or user.role != 'profesor':
+        if user.role != 'profesor':
             return jsonify({'error': 'Solo los profesores pueden generar cuestionarios'}), 403
         
         data = request.get_json()
@@ -98,18 +161,19 @@ def generate_quiz():
             if field not in data or not data[field]:
                 return jsonify({'error': f'El campo {field} es requerido'}), 400
         
-        # Generar cuestionario
-        quiz_data = ai_service.generate_quiz(
-            topic=data['topic'],
-            difficulty=data['difficulty'],
-            question_count=data['question_count'],
-            question_type=data['question_type']
-        )
+        def run():
+            quiz_data = ai_service.generate_quiz(
+                topic=data['topic'],
+                difficulty=data['difficulty'],
+                question_count=data['question_count'],
+                question_type=data['question_type']
+            )
+            return {
+                'quiz': quiz_data,
+                'message': 'Cuestionario generado exitosamente'
+            }
         
-        return jsonify({
-            'quiz': quiz_data,
-            'message': 'Cuestionario generado exitosamente'
-        }), 200
+        return enqueue_ai_job(user, 'generate_quiz', run)
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -119,11 +183,7 @@ def generate_quiz():
 def explain_concept():
     """Explicar concepto académico"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
         
         data = request.get_json()
         concept = data.get('concept', '').strip()
@@ -133,19 +193,22 @@ def explain_concept():
         if not concept:
             return jsonify({'error': 'Concepto es requerido'}), 400
         
-        # Generar explicación
-        explanation = ai_service.explain_concept(
-            concept=concept,
-            subject=subject,
-            level=level,
-            user_role=user.role
-        )
+        user_role = user.role
         
-        return jsonify({
-            'explanation': explanation,
-            'concept': concept,
-            'level': level
-        }), 200
+        def run():
+            explanation = ai_service.explain_concept(
+                concept=concept,
+                subject=subject,
+                level=level,
+                user_role=user_role
+            )
+            return {
+                'explanation': explanation,
+                'concept': concept,
+                'level': level
+            }
+        
+        return enqueue_ai_job(user, 'explain_concept', run)
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -155,11 +218,7 @@ def explain_concept():
 def solve_problem():
     """Resolver problema paso a paso"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
         
         data = request.get_json()
         problem = data.get('problem', '').strip()
@@ -168,17 +227,20 @@ def solve_problem():
         if not problem:
             return jsonify({'error': 'Problema es requerido'}), 400
         
-        # Resolver problema
-        solution = ai_service.solve_problem(
-            problem=problem,
-            subject=subject,
-            user_role=user.role
-        )
+        user_role = user.role
         
-        return jsonify({
-            'solution': solution,
-            'problem': problem
-        }), 200
+        def run():
+            solution = ai_service.solve_problem(
+                problem=problem,
+                subject=subject,
+                user_role=user_role
+            )
+            return {
+                'solution': solution,
+                'problem': problem
+            }
+        
+        return enqueue_ai_job(user, 'solve_problem', run)
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -188,11 +250,7 @@ def solve_problem():
 def generate_study_plan():
     """Generar plan de estudio personalizado"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
         
         data = request.get_json()
         
@@ -202,19 +260,20 @@ def generate_study_plan():
             if field not in data or not data[field]:
                 return jsonify({'error': f'El campo {field} es requerido'}), 400
         
-        # Generar plan de estudio
-        study_plan = ai_service.generate_study_plan(
-            subject=data['subject'],
-            duration=data['duration'],
-            goals=data['goals'],
-            current_level=data.get('current_level', 'beginner'),
-            available_time=data.get('available_time', '2 hours/day')
-        )
-        
-        return jsonify({
-            'study_plan': study_plan,
-            'message': 'Plan de estudio generado exitosamente'
-        }), 200
+        def run():
+            study_plan = ai_service.generate_study_plan(
+                subject=data['subject'],
+                duration=data['duration'],
+                goals=data['goals'],
+                current_level=data.get('current_level', 'beginner'),
+                available_time=data.get('available_time', '2 hours/day')
+            )
+            return {
+                'study_plan': study_plan,
+                'message': 'Plan de estudio generado exitosamente'
+            }
+        
+        return enqueue_ai_job(user, 'generate_study_plan', run)
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -224,10 +283,9 @@ def generate_study_plan():
 def research_assistance():
     """Asistencia en investigación académica"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
         
-        if not user or user.role not in ['profesor', 'estudiante']:
+        if user.role not in ['profesor', 'estudiante']:
             return jsonify({'error': 'Función disponible solo para profesores y estudiantes'}), 403
         
         data = request.get_json()
@@ -238,19 +296,20 @@ def research_assistance():
             if field not in data or not data[field]:
                 return jsonify({'error': f'El campo {field} es requerido'}), 400
         
-        # Generar asistencia de investigación
-        assistance = ai_service.provide_research_assistance(
-            research_topic=data['research_topic'],
-            assistance_type=data['assistance_type'],
-            academic_level=data.get('academic_level', 'undergraduate'),
-            field_of_study=data.get('field_of_study', '')
-        )
-        
-        return jsonify({
-            'assistance': assistance,
-            'topic': data['research_topic'],
-            'type': data['assistance_type']
-        }), 200
+        def run():
+            assistance = ai_service.provide_research_assistance(
+                research_topic=data['research_topic'],
+                assistance_type=data['assistance_type'],
+                academic_level=data.get('academic_level', 'undergraduate'),
+                field_of_study=data.get('field_of_study', '')
+            )
+            return {
+                'assistance': assistance,
+                'topic': data['research_topic'],
+                'type': data['assistance_type']
+            }
+        
+        return enqueue_ai_job(user, 'provide_research_assistance', run)
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -260,11 +319,7 @@ def research_assistance():
 def provide_feedback():
     """Proporcionar retroalimentación sobre trabajo académico"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
         
         data = request.get_json()
         
@@ -274,18 +329,42 @@ def provide_feedback():
             if field not in data or not data[field]:
                 return jsonify({'error': f'El campo {field} es requerido'}), 400
         
-        # Generar retroalimentación
-        feedback = ai_service.provide_feedback(
-            content=data['content'],
-            content_type=data['content_type'],
-            criteria=data.get('criteria', []),
-            academic_level=data.get('academic_level', 'undergraduate')
-        )
+        def run():
+            feedback = ai_service.provide_feedback(
+                content=data['content'],
+                content_type=data['content_type'],
+                criteria=data.get('criteria', []),
+                academic_level=data.get('academic_level', 'undergraduate')
+            )
+            return {
+                'feedback': feedback,
+                'content_type': data['content_type']
+            }
+        
+        return enqueue_ai_job(user, 'provide_feedback', run)
+        
+    except Exception as e:
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@ai_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Consultar el estado y resultado de un trabajo de IA"""
+    try:
+        # Los trabajos abandonados por un worker reiniciado pasan a 'failed'
+        ai_jobs.purge_if_due()
+        job = db.session.get(AIJob, job_id)
+        
+        if not job or job.user_id != current_user.id:
+            return jsonify({'error': 'Trabajo no encontrado'}), 404
+        
+        headers = {}
+        if not job.is_finished():
+            headers['Retry-After'] = '1'
         
         return jsonify({
-            'feedback': feedback,
-            'content_type': data['content_type']
-        }), 200
+            'job': job.to_dict()
+        }), 200, headers
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -306,6 +385,16 @@ def ai_status():
             'research_assistance',
             'feedback_provision'
         ],
-        'supported_roles': ['estudiante', 'profesor', 'administrador']
+        'supported_roles': ['estudiante', 'profesor', 'administrador'],
+        'provider': {
+            'name': ai_service.provider.name,
+            'version': ai_service.provider.version
+        },
+        'cache': ai_service.cache.stats() if ai_service.cache else None,
+        'jobs': {
+            'workers': ai_jobs.queue.max_workers,
+            'max_pending': ai_jobs.queue.max_pending,
+            'pending': ai_jobs.queue.pending
+        }
     }), 200
 
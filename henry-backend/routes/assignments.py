@@ -1,45 +1,51 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.user import User
+from flask_jwt_extended import jwt_required, current_user
 from models.assignment import Assignment, Submission
 from models.class_model import Class
+from services.pagination import paginate, PaginationError
 from app import db
 from datetime import datetime
+import math
+import os
 
 assignments_bp = Blueprint('assignments', __name__)
 
+# Máximo de entregas por petición de calificación en lote
+GRADE_BATCH_MAX = int(os.getenv('GRADE_BATCH_MAX', '500'))
+
 @assignments_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_assignments():
     """Obtener tareas según el rol del usuario"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         if user.role == 'profesor':
             # Profesores ven las tareas que han creado
-            assignments = Assignment.query.filter_by(professor_id=user_id).all()
+            query = Assignment.query.filter_by(professor_id=user_id)
         elif user.role == 'estudiante':
             # Estudiantes ven tareas de sus clases (por ahora todas las activas)
-            assignments = Assignment.query.filter_by(status='active').all()
+            query = Assignment.query.filter_by(status='active')
         else:
             # Administradores ven todas las tareas
-            assignments = Assignment.query.all()
-        
-        assignments_data = []
-        for assignment in assignments:
-            assignment_data = assignment.to_dict()
-            assignment_data['stats'] = assignment.get_submission_stats()
-            assignments_data.append(assignment_data)
+            query = Assignment.query
+        
+        page = paginate(query, Assignment, request.args, eager=(
+            db.joinedload(Assignment.class_ref),
+            db.joinedload(Assignment.professor)
+        ))
+        assignments_data = page.serialize(
+            lambda assignments: Assignment.batch_to_dict(assignments, include_stats=True)
+        )
         
         return jsonify({
             'assignments': assignments_data,
-            'total': len(assignments_data)
+            **page.meta()
         }), 200
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
 
@@ -48,10 +54,10 @@ def get_assignments():
 def create_assignment():
     """Crear nueva tarea (solo profesores)"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
+        user_id = user.id
         
-        if not user or user.role != 'profesor':
+        if user.role != 'profesor':
             return jsonify({'error': 'Solo los profesores pueden crear tareas'}), 403
         
         data = request.get_json()
@@ -105,11 +111,8 @@ def create_assignment():
 def get_assignment_detail(assignment_id):
     """Obtener detalles de una tarea específica"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         assignment = Assignment.query.get(assignment_id)
         if not assignment:
@@ -139,10 +142,10 @@ def get_assignment_detail(assignment_id):
 def submit_assignment(assignment_id):
     """Entregar tarea (estudiantes)"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
+        user_id = user.id
         
-        if not user or user.role != 'estudiante':
+        if user.role != 'estudiante':
             return jsonify({'error': 'Solo los estudiantes pueden entregar tareas'}), 403
         
         assignment = Assignment.query.get(assignment_id)
@@ -193,10 +196,10 @@ def submit_assignment(assignment_id):
 def grade_submission(submission_id):
     """Calificar entrega (profesores)"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
+        user_id = user.id
         
-        if not user or user.role != 'profesor':
+        if user.role != 'profesor':
             return jsonify({'error': 'Solo los profesores pueden calificar'}), 403
         
         submission = Submission.query.get(submission_id)
@@ -233,3 +236,112 @@ def grade_submission(submission_id):
         db.session.rollback()
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+def _parse_grade_item(item):
+    """(submission_id, grade, feedback) de un elemento del lote; lanza ValueError si no es válido"""
+    if not isinstance(item, dict):
+        raise ValueError('Elemento con formato inválido')
+    submission_id = item.get('submission_id')
+    if not isinstance(submission_id, int) or isinstance(submission_id, bool):
+        raise ValueError('submission_id debe ser un entero')
+    if 'grade' not in item:
+        raise ValueError('La calificación es requerida')
+    grade = item['grade']
+    if isinstance(grade, bool):
+        raise ValueError('La calificación debe ser numérica')
+    try:
+        grade = float(grade)
+    except (TypeError, ValueError):
+        raise ValueError('La calificación debe ser numérica')
+    if not math.isfinite(grade):
+        raise ValueError('La calificación debe ser numérica')
+    feedback = item.get('feedback') or ''
+    if not isinstance(feedback, str):
+        raise ValueError('feedback debe ser texto')
+    return submission_id, grade, feedback
+
+@assignments_bp.route('/submissions/grade', methods=['POST'])
+@jwt_required()
+def grade_submissions_batch():
+    """
+    Calificar varias entregas en una sola petición (profesores).
+    
+    Recibe {"grades": [{"submission_id", "grade", "feedback"}, ...]}. La
+    propiedad de las tareas y max_points se validan con una sola consulta y
+    las calificaciones válidas se guardan con un UPDATE por lotes en una
+    única transacción. Cada elemento tiene su propio resultado; los que
+    fallan la validación no impiden guardar los demás.
+    """
+    try:
+        user = current_user
+        user_id = user.id
+        
+        if user.role != 'profesor':
+            return jsonify({'error': 'Solo los profesores pueden calificar'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        items = data.get('grades')
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'El campo grades debe ser una lista no vacía'}), 400
+        if len(items) > GRADE_BATCH_MAX:
+            return jsonify({'error': f'Se pueden calificar como máximo {GRADE_BATCH_MAX} entregas por petición'}), 400
+        
+        results = []
+        parsed = []
+        seen = set()
+        for index, item in enumerate(items):
+            try:
+                submission_id, grade, feedback = _parse_grade_item(item)
+            except ValueError as e:
+                results.append({'index': index, 'status': 'error', 'error': str(e),
+                                'submission_id': item.get('submission_id') if isinstance(item, dict) else None})
+                continue
+            if submission_id in seen:
+                results.append({'index': index, 'submission_id': submission_id, 'status': 'error',
+                                'error': 'Entrega repetida en el lote'})
+                continue
+            seen.add(submission_id)
+            result = {'index': index, 'submission_id': submission_id}
+            results.append(result)
+            parsed.append((result, grade, feedback))
+        
+        targets = Submission.grading_targets(list(seen))
+        
+        graded_at = datetime.utcnow()
+        updates = []
+        for result, grade, feedback in parsed:
+            target = targets.get(result['submission_id'])
+            if target is None:
+                result.update(status='error', error='Entrega no encontrada')
+                continue
+            professor_id, max_points = target
+            if professor_id != user_id:
+                result.update(status='error', error='No tienes permisos para calificar esta entrega')
+                continue
+            if grade < 0 or grade > max_points:
+                result.update(status='error', error=f'La calificación debe estar entre 0 y {max_points}')
+                continue
+            updates.append({
+                'id': result['submission_id'],
+                'grade': grade,
+                'feedback': feedback,
+                'status': 'graded',
+                'graded_at': graded_at
+            })
+            result.update(status='graded', grade=grade)
+        
+        if updates:
+            # UPDATE por clave primaria con executemany, todo en una transacción
+            db.session.execute(db.update(Submission), updates)
+            db.session.commit()
+        
+        return jsonify({
+            'message': f'{len(updates)} de {len(items)} entregas calificadas',
+            'graded': len(updates),
+            'failed': len(items) - len(updates),
+            'graded_at': graded_at.isoformat() if updates else None,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Error interno del servidor'}), 500
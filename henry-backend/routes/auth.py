@@ -1,7 +1,17 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token, get_jwt, jwt_required, current_user
+)
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 from models.user import User
+from services.password_hasher import password_hasher
+from services.rate_limiter import (
+    rate_limited, client_ip, json_field,
+    login_ip_limiter, login_email_limiter, register_ip_limiter
+)
+from services.task_queue import QueueFullError
+from services.token_blocklist import token_blocklist
 from app import db
 import re
 
@@ -18,7 +28,19 @@ def validate_password(password):
         return False, "La contraseña debe tener al menos 6 caracteres"
     return True, "Contraseña válida"
 
+def issue_tokens(user):
+    """Access token corto con rol y nombre, más un refresh token para renovarlo"""
+    return {
+        'access_token': create_access_token(identity=user),
+        'refresh_token': create_refresh_token(identity=user)
+    }
+
+def busy_response():
+    """El pool de hash de contraseñas está saturado"""
+    return jsonify({'error': 'Demasiados inicios de sesión en curso, intenta de nuevo en unos segundos'}), 503, {'Retry-After': '5'}
+
 @auth_bp.route('/register', methods=['POST'])
+@rate_limited((register_ip_limiter, client_ip))
 def register():
     """Registro de nuevos usuarios"""
     try:
@@ -55,7 +77,7 @@ def register():
             email=email,
             full_name=full_name,
             role=role,
-            password_hash=generate_password_hash(password),
+            password_hash=password_hasher.hash(password),
             institution=data.get('institution'),
             department=data.get('department'),
             student_id=data.get('student_id'),
@@ -66,20 +88,23 @@ def register():
         db.session.add(user)
         db.session.commit()
         
-        # Generar token de acceso
-        access_token = create_access_token(identity=user.id)
+        # Generar tokens de acceso y de renovación
+        tokens = issue_tokens(user)
         
         return jsonify({
             'message': 'Usuario registrado exitosamente',
-            'access_token': access_token,
+            **tokens,
             'user': user.to_dict()
         }), 201
         
+    except QueueFullError:
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Error interno del servidor'}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limited((login_ip_limiter, client_ip), failures=((login_email_limiter, json_field('email')),))
 def login():
     """Inicio de sesión de usuarios"""
     try:
@@ -100,15 +125,24 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Cuenta desactivada'}), 401
         
-        # Generar token de acceso
-        access_token = create_access_token(identity=user.id)
+        # Hash calculado con otro algoritmo o costo: se actualiza ahora que tenemos la contraseña
+        if password_hasher.needs_rehash(user.password_hash):
+            user.set_password(password)
+            db.session.commit()
+        
+        user.record_login()
+        
+        # Generar tokens de acceso y de renovación
+        tokens = issue_tokens(user)
         
         return jsonify({
             'message': 'Inicio de sesión exitoso',
-            'access_token': access_token,
+            **tokens,
             'user': user.get_profile_data()
         }), 200
         
+    except QueueFullError:
+        return busy_response()
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
 
@@ -117,11 +151,7 @@ def login():
 def get_profile():
     """Obtener perfil del usuario autenticado"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
         
         return jsonify({
             'user': user.get_profile_data()
@@ -135,11 +165,7 @@ def get_profile():
 def update_profile():
     """Actualizar perfil del usuario autenticado"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
         
         data = request.get_json()
         
@@ -170,11 +196,7 @@ def update_profile():
 def change_password():
     """Cambiar contraseña del usuario autenticado"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
         
         data = request.get_json()
         
@@ -190,15 +212,69 @@ def change_password():
         if not is_valid:
             return jsonify({'error': message}), 400
         
-        # Actualizar contraseña
-        user.password_hash = generate_password_hash(data['new_password'])
+        # Actualizar contraseña; los refresh tokens emitidos antes dejan de servir
+        user.set_password(data['new_password'])
+        user.token_version = (user.token_version or 0) + 1
         user.updated_at = db.func.now()
         db.session.commit()
         
         return jsonify({
-            'message': 'Contraseña actualizada exitosamente'
+            'message': 'Contraseña actualizada exitosamente',
+            **issue_tokens(user)
         }), 200
         
+    except QueueFullError:
+        db.session.rollback()
+        return busy_response()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """Renovar el access token; el refresh token usado queda revocado (rotación)"""
+    try:
+        # Datos frescos: la copia en caché de otro worker puede no reflejar
+        # un cambio de contraseña o una desactivación recientes
+        user = current_user
+        db.session.refresh(user)
+        
+        if not user.is_active:
+            return jsonify({'error': 'Cuenta desactivada'}), 401
+        
+        # Emitido antes del último cambio de contraseña
+        if get_jwt().get('ver', 0) != user.token_version:
+            return jsonify({'error': 'Token revocado'}), 401
+        
+        # Si otra petición ya usó este refresh token, no se emiten tokens nuevos
+        if not token_blocklist.revoke(get_jwt()):
+            return jsonify({'error': 'Token revocado'}), 401
+        
+        return jsonify(issue_tokens(user)), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Cerrar sesión: revoca el token enviado y, si se incluye, el refresh token"""
+    try:
+        token_blocklist.revoke(get_jwt())
+        
+        refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh_token:
+            try:
+                payload = decode_token(refresh_token)
+            except (JWTExtendedException, PyJWTError):
+                payload = None
+            if payload and payload['sub'] == get_jwt()['sub']:
+                token_blocklist.revoke(payload)
+        
+        return jsonify({'message': 'Sesión cerrada'}), 200
+        
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -206,17 +282,20 @@ def change_password():
 @auth_bp.route('/verify-token', methods=['POST'])
 @jwt_required()
 def verify_token():
-    """Verificar validez del token"""
+    """
+    Verificar validez del token. El usuario sale de la caché de identidades,
+    así que normalmente no se consulta la base de datos.
+    """
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
         
-        if not user or not user.is_active:
+        if not user.is_active:
             return jsonify({'error': 'Token inválido'}), 401
         
         return jsonify({
             'valid': True,
-            'user': user.to_dict()
+            'user': user.to_dict(),
+            'expires_at': get_jwt()['exp']
         }), 200
         
     except Exception as e:
@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.user import User
+from flask_jwt_extended import jwt_required, current_user
 from models.class_model import Class
 from models.material import Material
 from models.assignment import Assignment
+from models.enrollment import Enrollment
+from models.professor_stats import ProfessorStats
+from services.pagination import paginate, PaginationError
+from services.http_cache import cached_json
 from app import db
 from datetime import datetime
 
@@ -14,36 +17,36 @@ classes_bp = Blueprint('classes', __name__)
 def get_classes():
     """Obtener clases del usuario autenticado"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         if user.role == 'profesor':
             # Profesores ven sus clases creadas
-            classes = Class.query.filter_by(professor_id=user_id).all()
+            query = Class.query.filter_by(professor_id=user_id)
         elif user.role == 'estudiante':
-            # Estudiantes ven clases en las que están inscritos
-            # Por ahora retornamos todas las clases activas como demo
-            classes = Class.query.filter_by(status='active').all()
+            if request.args.get('scope') == 'available':
+                # Catálogo de clases activas para inscribirse
+                query = Class.query.filter_by(status='active')
+            else:
+                # Estudiantes ven clases en las que están inscritos
+                query = Class.query.join(Enrollment).filter(Enrollment.student_id == user_id)
         else:
             # Administradores ven todas las clases
-            classes = Class.query.all()
+            query = Class.query
         
-        classes_data = []
-        for class_obj in classes:
-            class_data = class_obj.to_dict()
-            # Agregar estadísticas adicionales
-            class_data['materials'] = [m.to_dict() for m in class_obj.materials.limit(5)]
-            class_data['recent_assignments'] = [a.to_dict() for a in class_obj.assignments.limit(3)]
-            classes_data.append(class_data)
+        page = paginate(query, Class, request.args)
+        # Serialización en lote: número constante de consultas sin importar cuántas clases
+        classes_data = page.serialize(
+            lambda classes: Class.batch_to_dict(classes, materials_limit=5, assignments_limit=3)
+        )
         
         return jsonify({
             'classes': classes_data,
-            'total': len(classes_data)
+            **page.meta()
         }), 200
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
 
@@ -52,10 +55,10 @@ def get_classes():
 def create_class():
     """Crear nueva clase (solo profesores)"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
+        user_id = user.id
         
-        if not user or user.role != 'profesor':
+        if user.role != 'profesor':
             return jsonify({'error': 'Solo los profesores pueden crear clases'}), 403
         
         data = request.get_json()
@@ -95,11 +98,8 @@ def create_class():
 def get_class_detail(class_id):
     """Obtener detalles de una clase específica"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         class_obj = Class.query.get(class_id)
         if not class_obj:
@@ -109,9 +109,10 @@ def get_class_detail(class_id):
         if user.role == 'profesor' and class_obj.professor_id != user_id:
             return jsonify({'error': 'No tienes permisos para ver esta clase'}), 403
         
-        return jsonify({
-            'class': class_obj.get_detailed_info()
-        }), 200
+        return cached_json(
+            class_obj.get_detail_version(),
+            lambda: ({'class': class_obj.get_detailed_info()}, 200)
+        )
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -121,11 +122,8 @@ def get_class_detail(class_id):
 def update_class(class_id):
     """Actualizar información de una clase"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         class_obj = Class.query.get(class_id)
         if not class_obj:
@@ -164,11 +162,8 @@ def update_class(class_id):
 def delete_class(class_id):
     """Eliminar una clase"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         class_obj = Class.query.get(class_id)
         if not class_obj:
@@ -194,28 +189,49 @@ def delete_class(class_id):
 def enroll_in_class(class_id):
     """Inscribirse en una clase (estudiantes)"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
         
-        if not user or user.role != 'estudiante':
+        if user.role != 'estudiante':
             return jsonify({'error': 'Solo los estudiantes pueden inscribirse en clases'}), 403
         
         class_obj = Class.query.get(class_id)
         if not class_obj:
             return jsonify({'error': 'Clase no encontrada'}), 404
         
-        if not class_obj.can_enroll():
-            return jsonify({'error': 'La clase no tiene cupos disponibles o no está activa'}), 400
+        enrolled, error = class_obj.enroll_student(user.id)
+        if not enrolled:
+            return jsonify({'error': error}), 400
         
-        # Aquí se implementaría la lógica de inscripción
-        # Por ahora solo incrementamos el contador
-        if class_obj.enroll_student():
-            return jsonify({
-                'message': 'Inscripción exitosa',
-                'class': class_obj.to_dict()
-            }), 200
-        else:
-            return jsonify({'error': 'No se pudo completar la inscripción'}), 400
+        return jsonify({
+            'message': 'Inscripción exitosa',
+            'class': class_obj.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@classes_bp.route('/<int:class_id>/enroll', methods=['DELETE'])
+@jwt_required()
+def unenroll_from_class(class_id):
+    """Cancelar la inscripción en una clase (estudiantes)"""
+    try:
+        user = current_user
+        
+        if user.role != 'estudiante':
+            return jsonify({'error': 'Solo los estudiantes pueden cancelar inscripciones'}), 403
+        
+        class_obj = Class.query.get(class_id)
+        if not class_obj:
+            return jsonify({'error': 'Clase no encontrada'}), 404
+        
+        if not class_obj.unenroll_student(user.id):
+            return jsonify({'error': 'No estás inscrito en esta clase'}), 400
+        
+        return jsonify({
+            'message': 'Inscripción cancelada',
+            'class': class_obj.to_dict()
+        }), 200
         
     except Exception as e:
         db.session.rollback()
@@ -226,10 +242,10 @@ def enroll_in_class(class_id):
 def create_demo_data():
     """Crear datos de demostración para clases"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
+        user_id = user.id
         
-        if not user or user.role != 'profesor':
+        if user.role != 'profesor':
             return jsonify({'error': 'Solo los profesores pueden crear datos de demo'}), 403
         
         # Verificar si ya existen clases de demo
@@ -237,7 +253,7 @@ def create_demo_data():
         if existing_classes > 0:
             return jsonify({'message': 'Ya existen clases de demostración'}), 200
         
-        # Crear clases de demostración
+        # Crear clases de demostración (sin inscritos: enrolled_count solo cuenta filas de enrollments)
         demo_classes = [
             {
                 'name': 'Introducción a la Inteligencia Artificial',
@@ -245,8 +261,7 @@ def create_demo_data():
                 'subject': 'Ciencias de la Computación',
                 'semester': '2025-1',
                 'schedule': 'Lunes y Miércoles 10:00-12:00',
-                'capacity': 25,
-                'enrolled_count': 18
+                'capacity': 25
             },
             {
                 'name': 'Algoritmos y Estructuras de Datos',
@@ -254,8 +269,7 @@ def create_demo_data():
                 'subject': 'Ciencias de la Computación',
                 'semester': '2025-1',
                 'schedule': 'Martes y Jueves 14:00-16:00',
-                'capacity': 30,
-                'enrolled_count': 22
+                'capacity': 30
             },
             {
                 'name': 'Machine Learning en la Práctica',
@@ -263,8 +277,7 @@ def create_demo_data():
                 'subject': 'Ciencias de la Computación',
                 'semester': '2025-1',
                 'schedule': 'Viernes 9:00-12:00',
-                'capacity': 20,
-                'enrolled_count': 15
+                'capacity': 20
             }
         ]
         
@@ -313,7 +326,7 @@ def create_demo_data():
         
         return jsonify({
             'message': 'Datos de demostración creados exitosamente',
-            'classes': [c.to_dict() for c in created_classes]
+            'classes': Class.batch_to_dict(created_classes)
         }), 201
         
     except Exception as e:
@@ -325,25 +338,19 @@ def create_demo_data():
 def get_class_stats():
     """Obtener estadísticas de clases del usuario"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         if user.role == 'profesor':
-            classes = Class.query.filter_by(professor_id=user_id)
-            total_classes = classes.count()
-            active_classes = classes.filter_by(status='active').count()
-            total_students = sum([c.enrolled_count for c in classes])
-            total_materials = Material.query.join(Class).filter(Class.professor_id == user_id).count()
+            # Resumen precalculado (models/professor_stats.py): una lectura por clave primaria
+            stats = ProfessorStats.get_for(user_id)
             
             return jsonify({
                 'stats': {
-                    'total_classes': total_classes,
-                    'active_classes': active_classes,
-                    'total_students': total_students,
-                    'total_materials': total_materials
+                    'total_classes': stats.total_classes,
+                    'active_classes': stats.active_classes,
+                    'total_students': stats.total_students,
+                    'total_materials': stats.total_materials
                 }
             }), 200
         
@@ -1,9 +1,23 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.user import User
+from flask import Blueprint, request, jsonify, current_app, send_file
+from flask_jwt_extended import jwt_required, current_user
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 from models.material import Material
+from models.user import User
 from models.class_model import Class
+from models.upload_session import UploadSession, UploadChunk
+from services import chunked_upload
+from services.blob_store import blob_store
+from services.pagination import paginate, PaginationError
+from services.http_cache import cached_json, make_etag
 from app import db
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+import math
+import os
+
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv('UPLOAD_SESSION_TTL_HOURS', '24'))
+# Vigencia de los enlaces firmados de /file (solo sirven para un material y un usuario)
+DOWNLOAD_TOKEN_SECONDS = int(os.getenv('MATERIAL_DOWNLOAD_TOKEN_SECONDS', '300'))
 
 materials_bp = Blueprint('materials', __name__)
 
@@ -12,49 +26,64 @@ materials_bp = Blueprint('materials', __name__)
 def get_materials():
     """Obtener materiales según el rol del usuario"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         class_id = request.args.get('class_id')
         
         if class_id:
             # Filtrar por clase específica
-            materials = Material.query.filter_by(class_id=class_id).all()
+            query = Material.query.filter_by(class_id=class_id)
         elif user.role == 'profesor':
             # Profesores ven materiales de sus clases
-            materials = Material.query.join(Class).filter(Class.professor_id == user_id).all()
+            query = Material.query.join(Class).filter(Class.professor_id == user_id)
         elif user.role == 'estudiante':
             # Estudiantes ven materiales públicos de sus clases (por ahora todos los públicos)
-            materials = Material.query.filter_by(is_public=True).all()
+            query = Material.query.filter_by(is_public=True)
         else:
             # Administradores ven todos los materiales
-            materials = Material.query.all()
+            query = Material.query
         
-        materials_data = [m.to_dict() for m in materials]
+        page = paginate(query, Material, request.args, eager=(
+            db.joinedload(Material.class_ref),
+            db.joinedload(Material.uploader)
+        ))
+        materials_data = page.serialize(lambda materials: [m.to_dict() for m in materials])
         
         return jsonify({
             'materials': materials_data,
-            'total': len(materials_data)
+            **page.meta()
         }), 200
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
 
 @materials_bp.route('/', methods=['POST'])
 @jwt_required()
 def upload_material():
-    """Subir nuevo material (profesores)"""
+    """
+    Subir nuevo material (profesores). Acepta JSON con los metadatos o
+    multipart/form-data con el archivo en el campo 'file'.
+    """
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
+        user_id = user.id
         
-        if not user or user.role != 'profesor':
+        if user.role != 'profesor':
             return jsonify({'error': 'Solo los profesores pueden subir materiales'}), 403
         
-        data = request.get_json()
+        upload = request.files.get('file')
+        if request.files or request.form:
+            # Los campos de un formulario llegan como texto
+            data = request.form.to_dict()
+            if 'is_public' in data:
+                data['is_public'] = data['is_public'].lower() in ('1', 'true', 'yes', 'on')
+            if str(data.get('class_id', '')).isdigit():
+                data['class_id'] = int(data['class_id'])
+        else:
+            data = request.get_json()
         
         # Validar datos requeridos
         required_fields = ['name', 'type', 'class_id']
@@ -81,6 +110,14 @@ def upload_material():
             uploaded_by=user_id
         )
         
+        if upload and upload.filename:
+            # Almacén por contenido: un archivo idéntico ya subido no se vuelve a escribir
+            digest, size, _ = blob_store.save(upload.stream)
+            material.file_path = blob_store.path_for(digest)
+            material.file_hash = digest
+            material.file_size = size
+            material.mime_type = upload.mimetype or data.get('mime_type')
+        
         db.session.add(material)
         db.session.commit()
         
@@ -98,11 +135,8 @@ def upload_material():
 def get_material_detail(material_id):
     """Obtener detalles de un material específico"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         material = Material.query.get(material_id)
         if not material:
@@ -115,9 +149,10 @@ def get_material_detail(material_id):
         if user.role == 'profesor' and material.class_ref.professor_id != user_id:
             return jsonify({'error': 'No tienes permisos para ver este material'}), 403
         
-        return jsonify({
-            'material': material.to_dict()
-        }), 200
+        return cached_json(
+            material.get_detail_version(),
+            lambda: ({'material': material.to_dict()}, 200)
+        )
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -127,48 +162,134 @@ def get_material_detail(material_id):
 def download_material(material_id):
     """Descargar material"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         material = Material.query.get(material_id)
         if not material:
             return jsonify({'error': 'Material no encontrado'}), 404
         
-        # Verificar permisos
-        if not material.is_public and user.role == 'estudiante':
-            return jsonify({'error': 'No tienes permisos para descargar este material'}), 403
-        
-        if user.role == 'profesor' and material.class_ref.professor_id != user_id:
+        if not _can_download(material, user):
             return jsonify({'error': 'No tienes permisos para descargar este material'}), 403
         
-        # Incrementar contador de descargas
-        material.increment_download_count()
-        
         download_url = material.get_download_url()
         if not download_url:
             return jsonify({'error': 'Material no disponible para descarga'}), 400
         
-        return jsonify({
-            'download_url': download_url,
-            'material': material.to_dict()
-        }), 200
+        response_data = {'download_url': download_url, 'material': material.to_dict()}
+        if material.file_hash:
+            # Enlace firmado y de corta duración, usable directamente en <video> o <audio>
+            response_data['download_url'] = f"{download_url}?token={_download_serializer().dumps([material.id, user_id])}"
+            response_data['expires_in'] = DOWNLOAD_TOKEN_SECONDS
+        else:
+            # Los archivos del almacén se cuentan al servirlos completos (/file)
+            material.increment_download_count()
+        
+        return jsonify(response_data), 200
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+def _can_download(material, user):
+    if not material.is_public and user.role == 'estudiante':
+        return False
+    if user.role == 'profesor' and material.class_ref.professor_id != user.id:
+        return False
+    return True
+
+def _download_serializer():
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt='material-file')
+
+def _user_from_download_token(material_id):
+    """Usuario del enlace firmado (?token=...) si es válido para este material"""
+    token = request.args.get('token')
+    if not token:
+        return None
+    try:
+        token_material_id, user_id = _download_serializer().loads(token, max_age=DOWNLOAD_TOKEN_SECONDS)
+    except (BadSignature, TypeError, ValueError):
+        return None
+    if token_material_id != material_id:
+        return None
+    user = db.session.get(User, user_id)
+    return user if user is not None and user.is_active else None
+
+@materials_bp.route('/<int:material_id>/file', methods=['GET'])
+@jwt_required(optional=True)
+def serve_material_file(material_id):
+    """
+    Entrega el archivo de un material. Admite Range (206) y peticiones
+    condicionales (ETag = SHA-256 del archivo, Last-Modified, 304).
+    Además del token en la cabecera acepta ?token=..., el enlace firmado y de
+    corta duración que devuelve /download, para usar la URL directamente en
+    <video> o <audio> sin poner el JWT en la URL (y en los logs).
+    """
+    try:
+        user = current_user or _user_from_download_token(material_id)
+        if user is None:
+            return jsonify({'error': 'Enlace de descarga inválido o expirado'}), 401
+        
+        material = Material.query.get(material_id)
+        if not material:
+            return jsonify({'error': 'Material no encontrado'}), 404
+        
+        if not _can_download(material, user):
+            return jsonify({'error': 'No tienes permisos para descargar este material'}), 403
+        
+        # Solo se sirven archivos del almacén por contenido, nunca rutas arbitrarias
+        if not material.file_hash or not blob_store.exists(material.file_hash):
+            return jsonify({'error': 'Material no disponible para descarga'}), 404
+        
+        path = blob_store.path_for(material.file_hash)
+        # El archivo no cambia mientras el hash sea el mismo: updated_at sí (p. ej. al volcar contadores)
+        last_modified = material.created_at
+        accel_prefix = current_app.config.get('X_ACCEL_REDIRECT_PREFIX')
+        if accel_prefix:
+            # nginx entrega el archivo (y los Range) sin ocupar al worker; los 304 se
+            # resuelven aquí para no contarlos como descargas
+            response = current_app.response_class(mimetype=material.mime_type or 'application/octet-stream')
+            response.set_etag(material.file_hash)
+            response.last_modified = last_modified
+            response.make_conditional(request)
+            if response.status_code != 304:
+                response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + \
+                    os.path.relpath(path, blob_store.root).replace(os.sep, '/')
+        else:
+            response = send_file(
+                os.path.abspath(path),
+                mimetype=material.mime_type or None,
+                as_attachment=request.args.get('download', '').lower() in ('1', 'true'),
+                download_name=material.name,
+                conditional=True,
+                etag=material.file_hash,
+                last_modified=last_modified,
+                max_age=0
+            )
+        response.headers['Cache-Control'] = 'private, no-cache'
+        
+        # Contar solo descargas completas: no los 304 ni los fragmentos intermedios de un Range
+        if response.status_code in (200, 206) and _is_first_range():
+            material.increment_download_count()
+        
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+def _is_first_range():
+    """Sin Range, o un Range que empieza en el byte 0 (reproductores de video)"""
+    range_header = request.range
+    if range_header is None:
+        return True
+    return bool(range_header.ranges) and range_header.ranges[0][0] == 0
+
 @materials_bp.route('/<int:material_id>', methods=['PUT'])
 @jwt_required()
 def update_material(material_id):
     """Actualizar material"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         material = Material.query.get(material_id)
         if not material:
@@ -206,11 +327,8 @@ def update_material(material_id):
 def delete_material(material_id):
     """Eliminar material"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        user = current_user
+        user_id = user.id
         
         material = Material.query.get(material_id)
         if not material:
@@ -231,62 +349,306 @@ def delete_material(material_id):
         db.session.rollback()
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+# --- Subidas por fragmentos reanudables ---
+# 1. POST /uploads                      -> crea la sesión (nombre, tipo, clase, tamaño)
+# 2. PUT  /uploads/<id>/chunks/<n>      -> cuerpo binario + cabecera X-Chunk-SHA256
+# 3. GET  /uploads/<id>                 -> fragmentos recibidos/faltantes para reanudar
+# 4. POST /uploads/<id>/complete        -> verifica, mueve al almacén y crea el material
+
+def get_own_upload_session(session_id, user_id):
+    session = db.session.get(UploadSession, session_id)
+    if not session or session.user_id != user_id:
+        return None
+    return session
+
+@materials_bp.route('/uploads', methods=['POST'])
+@jwt_required()
+def init_chunked_upload():
+    """Iniciar una subida por fragmentos (profesores)"""
+    try:
+        user = current_user
+        user_id = user.id
+        
+        if user.role != 'profesor':
+            return jsonify({'error': 'Solo los profesores pueden subir materiales'}), 403
+        
+        data = request.get_json() or {}
+        
+        # Validar datos requeridos
+        required_fields = ['name', 'type', 'class_id', 'file_name', 'total_size']
+        for field in required_fields:
+            if field not in data or not data[field]:
+                return jsonify({'error': f'El campo {field} es requerido'}), 400
+        
+        try:
+            total_size = int(data['total_size'])
+            chunk_size = int(data.get('chunk_size') or chunked_upload.DEFAULT_CHUNK_SIZE)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'total_size y chunk_size deben ser números enteros'}), 400
+        
+        if total_size <= 0 or total_size > chunked_upload.MAX_UPLOAD_SIZE:
+            return jsonify({'error': f'El archivo debe tener entre 1 y {chunked_upload.MAX_UPLOAD_SIZE} bytes'}), 400
+        chunk_size = min(max(chunk_size, chunked_upload.MIN_CHUNK_SIZE), chunked_upload.MAX_CHUNK_SIZE)
+        
+        # Verificar que la clase pertenece al profesor
+        class_obj = Class.query.get(data['class_id'])
+        if not class_obj or class_obj.professor_id != user_id:
+            return jsonify({'error': 'Clase no encontrada o no tienes permisos'}), 403
+        
+        chunked_upload.purge_stale_sessions(UPLOAD_SESSION_TTL_HOURS)
+        
+        session = UploadSession(
+            file_name=data['file_name'],
+            mime_type=data.get('mime_type'),
+            total_size=total_size,
+            chunk_size=chunk_size,
+            total_chunks=math.ceil(total_size / chunk_size),
+            name=data['name'],
+            description=data.get('description', ''),
+            type=data['type'],
+            is_public=data.get('is_public', True),
+            user_id=user_id,
+            class_id=class_obj.id
+        )
+        db.session.add(session)
+        db.session.commit()
+        chunked_upload.create_staging_file(session.id, total_size)
+        
+        return jsonify({'upload': session.to_dict()}), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@materials_bp.route('/uploads/<session_id>/chunks/<int:chunk_index>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(session_id, chunk_index):
+    """Recibir un fragmento; se puede reenviar si falló"""
+    try:
+        user = current_user
+        
+        session = get_own_upload_session(session_id, user.id)
+        if not session:
+            return jsonify({'error': 'Subida no encontrada'}), 404
+        if session.status != 'uploading':
+            return jsonify({'error': 'La subida ya fue completada'}), 409
+        if chunk_index < 0 or chunk_index >= session.total_chunks:
+            return jsonify({'error': 'Índice de fragmento fuera de rango'}), 400
+        
+        expected_sha256 = request.headers.get('X-Chunk-SHA256')
+        if not expected_sha256:
+            return jsonify({'error': 'Falta la cabecera X-Chunk-SHA256'}), 400
+        
+        try:
+            digest = chunked_upload.write_chunk(
+                session.id,
+                chunk_index * session.chunk_size,
+                request.stream,
+                session.expected_chunk_size(chunk_index),
+                expected_sha256
+            )
+        except chunked_upload.ChunkError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        chunk = UploadChunk.query.filter_by(session_id=session.id, chunk_index=chunk_index).first()
+        if chunk:
+            chunk.sha256 = digest
+        else:
+            db.session.add(UploadChunk(
+                session_id=session.id,
+                chunk_index=chunk_index,
+                size=session.expected_chunk_size(chunk_index),
+                sha256=digest
+            ))
+        session.updated_at = datetime.utcnow()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # El mismo fragmento llegó dos veces a la vez; el contenido es idéntico
+            db.session.rollback()
+        
+        return jsonify({'chunk_index': chunk_index, 'sha256': digest}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@materials_bp.route('/uploads/<session_id>', methods=['GET'])
+@jwt_required()
+def get_chunked_upload(session_id):
+    """Estado de una subida: fragmentos recibidos y faltantes"""
+    session = get_own_upload_session(session_id, current_user.id)
+    if not session:
+        return jsonify({'error': 'Subida no encontrada'}), 404
+    return jsonify({'upload': session.to_dict()}), 200
+
+@materials_bp.route('/uploads/<session_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_chunked_upload(session_id):
+    """Completar la subida y crear el material"""
+    try:
+        user = current_user
+        
+        session = get_own_upload_session(session_id, user.id)
+        if not session:
+            return jsonify({'error': 'Subida no encontrada'}), 404
+        if session.status == 'completed':
+            material = db.session.get(Material, session.material_id)
+            return jsonify({'material': material.to_dict() if material else None}), 200
+        
+        upload = session.to_dict()
+        if upload['missing_chunks']:
+            return jsonify({
+                'error': 'Faltan fragmentos por subir',
+                'missing_chunks': upload['missing_chunks']
+            }), 409
+        
+        # Reclamar la sesión: si llegan dos completes a la vez (reintento del
+        # cliente, otro worker) solo uno mueve el staging al almacén
+        claimed = UploadSession.query.filter_by(id=session.id, status='uploading').update(
+            {'status': 'completing', 'updated_at': datetime.utcnow()}, synchronize_session=False
+        )
+        db.session.commit()
+        if not claimed:
+            if session.status == 'completed':
+                material = db.session.get(Material, session.material_id)
+                return jsonify({'material': material.to_dict() if material else None}), 200
+            return jsonify({'error': 'La subida se está completando; consulta su estado en unos segundos'}), 409
+        
+        data = request.get_json(silent=True) or {}
+        chunk_hashes = dict(db.session.query(UploadChunk.chunk_index, UploadChunk.sha256)
+                            .filter_by(session_id=session.id))
+        try:
+            # Se verifica antes de mover el archivo al almacén: si falla, la sesión sigue abierta
+            digest = chunked_upload.finalize(
+                session.id, session.chunk_size, chunk_hashes, data.get('sha256')
+            )
+        except chunked_upload.UploadVerificationError as e:
+            if e.bad_chunks:
+                # Se marcan como no recibidos para que el cliente los reenvíe
+                UploadChunk.query.filter(
+                    UploadChunk.session_id == session.id,
+                    UploadChunk.chunk_index.in_(e.bad_chunks)
+                ).delete(synchronize_session=False)
+            session.status = 'uploading'
+            db.session.commit()
+            return jsonify({'error': str(e), 'missing_chunks': e.bad_chunks}), 400
+        except Exception:
+            db.session.rollback()
+            session.status = 'uploading'
+            db.session.commit()
+            raise
+        
+        material = Material(
+            name=session.name,
+            description=session.description,
+            type=session.type,
+            file_path=blob_store.path_for(digest),
+            file_hash=digest,
+            file_size=session.total_size,
+            mime_type=session.mime_type,
+            is_public=session.is_public,
+            class_id=session.class_id,
+            uploaded_by=user.id
+        )
+        db.session.add(material)
+        db.session.flush()
+        
+        session.status = 'completed'
+        session.material_id = material.id
+        session.chunks.delete(synchronize_session=False)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Material subido exitosamente',
+            'material': material.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@materials_bp.route('/uploads/<session_id>', methods=['DELETE'])
+@jwt_required()
+def abort_chunked_upload(session_id):
+    """Cancelar una subida en curso"""
+    try:
+        session = get_own_upload_session(session_id, current_user.id)
+        if not session:
+            return jsonify({'error': 'Subida no encontrada'}), 404
+        if session.status != 'uploading':
+            return jsonify({'error': 'La subida ya fue completada'}), 409
+        
+        chunked_upload.discard(session.id)
+        db.session.delete(session)
+        db.session.commit()
+        return jsonify({'message': 'Subida cancelada'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+# Tipos de materiales soportados (lista fija)
+MATERIAL_TYPES = [
+    {
+        'id': 'pdf',
+        'name': 'Documento PDF',
+        'description': 'Archivos PDF como libros, artículos, manuales',
+        'icon': 'file-text',
+        'extensions': ['.pdf']
+    },
+    {
+        'id': 'presentation',
+        'name': 'Presentación',
+        'description': 'Slides y presentaciones',
+        'icon': 'presentation',
+        'extensions': ['.ppt', '.pptx', '.odp']
+    },
+    {
+        'id': 'video',
+        'name': 'Video',
+        'description': 'Videos educativos y conferencias',
+        'icon': 'video',
+        'extensions': ['.mp4', '.avi', '.mov', '.wmv']
+    },
+    {
+        'id': 'audio',
+        'name': 'Audio',
+        'description': 'Podcasts y grabaciones de audio',
+        'icon': 'volume-2',
+        'extensions': ['.mp3', '.wav', '.ogg']
+    },
+    {
+        'id': 'image',
+        'name': 'Imagen',
+        'description': 'Diagramas, gráficos e imágenes',
+        'icon': 'image',
+        'extensions': ['.jpg', '.jpeg', '.png', '.gif', '.svg']
+    },
+    {
+        'id': 'document',
+        'name': 'Documento',
+        'description': 'Documentos de texto',
+        'icon': 'file-text',
+        'extensions': ['.doc', '.docx', '.odt', '.txt']
+    },
+    {
+        'id': 'link',
+        'name': 'Enlace Web',
+        'description': 'Enlaces a recursos online',
+        'icon': 'link',
+        'extensions': []
+    }
+]
+
+MATERIAL_TYPES_ETAG = make_etag(MATERIAL_TYPES)
+
 @materials_bp.route('/types', methods=['GET'])
 def get_material_types():
-    """Obtener tipos de materiales soportados"""
-    material_types = [
-        {
-            'id': 'pdf',
-            'name': 'Documento PDF',
-            'description': 'Archivos PDF como libros, artículos, manuales',
-            'icon': 'file-text',
-            'extensions': ['.pdf']
-        },
-        {
-            'id': 'presentation',
-            'name': 'Presentación',
-            'description': 'Slides y presentaciones',
-            'icon': 'presentation',
-            'extensions': ['.ppt', '.pptx', '.odp']
-        },
-        {
-            'id': 'video',
-            'name': 'Video',
-            'description': 'Videos educativos y conferencias',
-            'icon': 'video',
-            'extensions': ['.mp4', '.avi', '.mov', '.wmv']
-        },
-        {
-            'id': 'audio',
-            'name': 'Audio',
-            'description': 'Podcasts y grabaciones de audio',
-            'icon': 'volume-2',
-            'extensions': ['.mp3', '.wav', '.ogg']
-        },
-        {
-            'id': 'image',
-            'name': 'Imagen',
-            'description': 'Diagramas, gráficos e imágenes',
-            'icon': 'image',
-            'extensions': ['.jpg', '.jpeg', '.png', '.gif', '.svg']
-        },
-        {
-            'id': 'document',
-            'name': 'Documento',
-            'description': 'Documentos de texto',
-            'icon': 'file-text',
-            'extensions': ['.doc', '.docx', '.odt', '.txt']
-        },
-        {
-            'id': 'link',
-            'name': 'Enlace Web',
-            'description': 'Enlaces a recursos online',
-            'icon': 'link',
-            'extensions': []
-        }
-    ]
-    
-    return jsonify({
-        'material_types': material_types
-    }), 200
+    """Obtener tipos de materiales soportados (lista fija: se cachea un día)"""
+    return cached_json(
+        MATERIAL_TYPES_ETAG,
+        lambda: ({'material_types': MATERIAL_TYPES}, 200),
+        cache_control='public, max-age=86400'
+    )
 
@@ -1,14 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, url_for
 # Mantengo los imports comentados por si quieres volver a activarlos fácilmente
 # from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.presentation import Presentation
+from services.blob_store import blob_store
+from services.pagination import paginate, PaginationError
+from services.http_cache import cached_json
+from services.pptx_parser import EXTRACTION_META
+from services.presentation_ingest import PresentationIngestor
+from services.task_queue import QueueFullError
 from app import db
 import json
 import os
-from werkzeug.utils import secure_filename
-
-# Importar la librería python-pptx
-from pptx import Presentation as PptxPresentation
 
 # Asegúrate de que este import es correcto y que tienes un blueprint 'ai_bp'
 # from routes.ai import generate_ai_presentation
@@ -29,48 +31,11 @@ def allowed_file(filename):
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
-# --- Función para parsear PPTX (CORREGIDA) ---
-def parse_pptx_to_json(file_path):
-    """
-    Parsea un archivo .pptx y extrae el título y el contenido de las diapositivas.
-    Retorna un diccionario con la estructura {"slides": [...]}.
-    """
-    slides_data = []
-    try:
-        prs = PptxPresentation(file_path)
-        for i, slide in enumerate(prs.slides):
-            slide_content_parts = []
-            title = ""
-            
-            # Intenta obtener el título de la diapositiva
-            for shape in slide.shapes:
-                if shape.has_text_frame:
-                    text_frame = shape.text_frame
-                    # CORRECCIÓN: Reemplazamos 'has_text' por una verificación de contenido vacío
-                    if text_frame.text.strip():
-                        # Si es un título de marcador de posición (placeholder)
-                        if shape.is_placeholder and shape.placeholder_format.type == 1: # Título
-                            title = text_frame.text.strip()
-                        else:
-                            slide_content_parts.append(text_frame.text.strip())
-            
-            # Si no se encontró un título de marcador de posición, usa el primer texto o un título por defecto
-            if not title and slide_content_parts:
-                title = slide_content_parts[0] # Usa la primera parte del contenido como título
-                slide_content_parts = slide_content_parts[1:] # Elimina el primer elemento si se usó como título
-            elif not title:
-                title = f"Diapositiva {i + 1}" # Título por defecto
-
-            slides_data.append({
-                "title": title,
-                "content": "\n".join(slide_content_parts)
-            })
-    except Exception as e:
-        print(f"Error al parsear el archivo PPTX: {e}")
-        # En caso de error, retorna un JSON vacío para evitar fallos
-        return {"slides": []}
-    
-    return {"slides": slides_data}
+# Pool acotado para extraer el contenido de los .pptx subidos
+pptx_ingestor = PresentationIngestor(
+    max_workers=int(os.getenv('PPTX_INGEST_WORKERS', '2')),
+    max_pending=int(os.getenv('PPTX_INGEST_MAX_PENDING', '16'))
+)
 
 
 @presentations_bp.route('/', methods=['GET', 'POST'])
@@ -92,8 +57,19 @@ def handle_presentations():
             return jsonify({'error': 'Falta el user_id en los parámetros de la solicitud'}), 400
         
         try:
-            presentations = Presentation.query.filter_by(author_id=user_id).all()
-            return jsonify([p.to_dict() for p in presentations]), 200
+            page = paginate(
+                Presentation.query.filter_by(author_id=user_id), Presentation, request.args,
+                eager=(db.joinedload(Presentation.author),)
+            )
+            response = jsonify(page.serialize(lambda presentations: [p.to_dict() for p in presentations]))
+            # La respuesta sigue siendo una lista; el cursor viaja en la cabecera
+            if page.next_cursor is not None:
+                response.headers['X-Next-Cursor'] = str(page.next_cursor)
+            if page.total is not None:
+                response.headers['X-Total-Count'] = str(page.total)
+            return response, 200
+        except PaginationError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
@@ -149,13 +125,31 @@ def handle_presentations():
                     return jsonify({'error': 'No se seleccionó un archivo'}), 400
                 
                 if file and allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    file_path = os.path.join(UPLOAD_FOLDER, filename)
-                    file.save(file_path)
-
-                    presentation_content = parse_pptx_to_json(file_path)
-                    slides_count = len(presentation_content.get('slides', []))
-                    
+                    # Almacén por contenido: subidas idénticas comparten archivo y extracción
+                    digest, _, _ = blob_store.save(file.stream)
+                    file_path = blob_store.path_for(digest)
+
+                    cached_content = blob_store.read_meta(digest, EXTRACTION_META)
+                    if cached_content is not None:
+                        new_presentation = Presentation(
+                            author_id=user_id,
+                            title=title,
+                            topic=topic,
+                            audience=audience,
+                            duration=duration,
+                            style=style,
+                            status='completed',
+                            progress=100,
+                            source_type='upload',
+                            source_url=file_path,
+                            content_json=json.dumps(cached_content),
+                            slides_count=len(cached_content.get('slides', []))
+                        )
+                        db.session.add(new_presentation)
+                        db.session.commit()
+                        return jsonify(new_presentation.to_dict()), 201
+
+                    # El contenido se extrae en segundo plano; la respuesta no espera al parseo
                     new_presentation = Presentation(
                         author_id=user_id,
                         title=title,
@@ -163,11 +157,26 @@ def handle_presentations():
                         audience=audience,
                         duration=duration,
                         style=style,
+                        status='generating',
+                        progress=0,
                         source_type='upload',
                         source_url=file_path,
-                        content_json=json.dumps(presentation_content),
-                        slides_count=slides_count
+                        content_json=json.dumps({'slides': []}),
+                        slides_count=0
                     )
+                    db.session.add(new_presentation)
+                    db.session.commit()
+
+                    try:
+                        pptx_ingestor.submit(current_app._get_current_object(), new_presentation, file_path, digest)
+                    except QueueFullError:
+                        db.session.delete(new_presentation)
+                        db.session.commit()
+                        return jsonify({'error': 'El servidor está procesando muchas presentaciones, intenta de nuevo en unos segundos'}), 503, {'Retry-After': '5'}
+
+                    status_url = url_for('presentations.get_presentation_status',
+                                         presentation_id=new_presentation.id, user_id=user_id)
+                    return jsonify(new_presentation.to_dict()), 202, {'Location': status_url}
                 else:
                     return jsonify({'error': 'Formato de archivo no permitido'}), 400
 
@@ -210,6 +219,41 @@ def handle_presentations():
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
 
+# Estado del procesamiento de una presentación subida
+@presentations_bp.route('/<int:presentation_id>/status', methods=['GET'])
+def get_presentation_status(presentation_id):
+    """
+    Retorna el estado y el avance (0-100) del procesamiento de una presentación.
+    """
+    user_id_str = request.args.get('user_id')
+    try:
+        user_id = int(user_id_str) if user_id_str else None
+    except (ValueError, TypeError):
+        return jsonify({'error': 'El user_id proporcionado no es un número válido'}), 400
+
+    if user_id is None:
+        return jsonify({'error': 'Falta el user_id en los parámetros de la solicitud'}), 400
+
+    try:
+        presentation = Presentation.query.filter_by(id=presentation_id, author_id=user_id).first()
+
+        if not presentation:
+            return jsonify({'error': 'Presentación no encontrada o no pertenece al usuario'}), 404
+
+        headers = {}
+        if presentation.status == 'generating':
+            headers['Retry-After'] = '1'
+        return jsonify({
+            'id': presentation.id,
+            'status': presentation.status,
+            'progress': presentation.progress,
+            'slides_count': presentation.slides_count,
+            'error': presentation.error
+        }), 200, headers
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # NUEVA RUTA: Obtener una presentación específica por ID (GET)
 @presentations_bp.route('/<int:presentation_id>', methods=['GET'])
 # @jwt_required() # <--- Deshabilitado: No se requiere token JWT
@@ -232,8 +276,11 @@ def get_presentation(presentation_id):
         if not presentation:
             return jsonify({'error': 'Presentación no encontrada o no pertenece al usuario'}), 404
 
-        # Retorna la presentación, incluyendo el content_json
-        return jsonify(presentation.to_dict()), 200
+        # Retorna la presentación; 304 si el cliente ya tiene esta versión
+        return cached_json(
+            presentation.get_detail_version(),
+            lambda: (presentation.to_dict(), 200)
+        )
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, current_user
 from models.user import User
+from services.pagination import paginate, PaginationError
+from services.user_analytics import get_user_analytics, get_user_counts
+from services.user_cache import user_cache
+from services.user_import import UserImporter, read_csv, read_ndjson
+from routes.auth import validate_email, validate_password
 from app import db
+import csv
 
 users_bp = Blueprint('users', __name__)
 
@@ -10,20 +16,21 @@ users_bp = Blueprint('users', __name__)
 def get_users():
     """Obtener lista de usuarios (solo administradores)"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
         
-        if not user or user.role != 'administrador':
+        if user.role != 'administrador':
             return jsonify({'error': 'Solo los administradores pueden ver la lista de usuarios'}), 403
         
-        users = User.query.all()
-        users_data = [u.to_dict() for u in users]
+        page = paginate(User.query, User, request.args)
+        users_data = page.serialize(lambda users: [u.to_dict() for u in users])
         
         return jsonify({
             'users': users_data,
-            'total': len(users_data)
+            **page.meta()
         }), 200
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
 
@@ -32,11 +39,7 @@ def get_users():
 def get_user_detail(user_id):
     """Obtener detalles de un usuario específico"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        current_user_id = current_user.id
         
         # Solo el propio usuario o administradores pueden ver detalles
         if current_user_id != user_id and current_user.role != 'administrador':
@@ -58,11 +61,7 @@ def get_user_detail(user_id):
 def update_user(user_id):
     """Actualizar información de usuario"""
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
+        current_user_id = current_user.id
         
         # Solo el propio usuario o administradores pueden actualizar
         if current_user_id != user_id and current_user.role != 'administrador':
@@ -90,6 +89,8 @@ def update_user(user_id):
         
         user.updated_at = db.func.now()
         db.session.commit()
+        # Explícito: un cambio de rol o una desactivación no debe esperar al TTL en este worker
+        user_cache.invalidate(user_id)
         
         return jsonify({
             'message': 'Usuario actualizado exitosamente',
@@ -100,34 +101,103 @@ def update_user(user_id):
         db.session.rollback()
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+@users_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_users():
+    """
+    Importación masiva de usuarios (solo administradores).
+    Acepta un archivo CSV (encabezado: email,full_name,role,password,...) o
+    NDJSON, como cuerpo de la petición o en el campo 'file' de un formulario
+    multipart; en ese caso 'default_password' se usa para las filas sin
+    contraseña.
+    """
+    try:
+        user = current_user
+        
+        if user.role != 'administrador':
+            return jsonify({'error': 'Solo los administradores pueden importar usuarios'}), 403
+        
+        upload = request.files.get('file')
+        if upload:
+            stream, filename, mimetype = upload.stream, upload.filename or '', upload.mimetype
+            default_password = request.form.get('default_password')
+        else:
+            stream, filename, mimetype = request.stream, '', request.mimetype
+            default_password = None
+        
+        file_format = request.args.get('format')
+        if not file_format:
+            if filename.endswith(('.ndjson', '.jsonl')) or mimetype in ('application/x-ndjson', 'application/jsonl'):
+                file_format = 'ndjson'
+            elif filename.endswith('.csv') or mimetype == 'text/csv':
+                file_format = 'csv'
+        if file_format not in ('csv', 'ndjson'):
+            return jsonify({'error': 'Formato no soportado: usa CSV o NDJSON'}), 400
+        
+        rows = read_csv(stream) if file_format == 'csv' else read_ndjson(stream)
+        importer = UserImporter(validate_email, validate_password, default_password=default_password)
+        
+        try:
+            result = importer.run(rows)
+        except (UnicodeDecodeError, csv.Error):
+            db.session.rollback()
+            return jsonify({
+                'error': 'No se pudo leer el archivo (se espera UTF-8)',
+                'created': importer.created
+            }), 400
+        
+        return jsonify({'import': result}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
 @users_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_user_stats():
     """Obtener estadísticas de usuarios (solo administradores)"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
         
-        if not user or user.role != 'administrador':
+        if user.role != 'administrador':
             return jsonify({'error': 'Solo los administradores pueden ver estadísticas'}), 403
         
-        total_users = User.query.count()
-        active_users = User.query.filter_by(is_active=True).count()
-        professors = User.query.filter_by(role='profesor').count()
-        students = User.query.filter_by(role='estudiante').count()
-        admins = User.query.filter_by(role='administrador').count()
+        # Un solo GROUP BY role, is_active (ver services/user_analytics.py)
+        counts = get_user_counts()
+        by_role = counts['by_role']
         
         return jsonify({
             'stats': {
-                'total_users': total_users,
-                'active_users': active_users,
-                'professors': professors,
-                'students': students,
-                'administrators': admins,
-                'inactive_users': total_users - active_users
+                'total_users': counts['total'],
+                'active_users': counts['active'],
+                'professors': by_role.get('profesor', {}).get('total', 0),
+                'students': by_role.get('estudiante', {}).get('total', 0),
+                'administrators': by_role.get('administrador', {}).get('total', 0),
+                'inactive_users': counts['total'] - counts['active']
             }
         }), 200
         
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+@users_bp.route('/analytics', methods=['GET'])
+@jwt_required()
+def get_users_analytics():
+    """Totales por rol y series de altas/actividad (solo administradores)"""
+    try:
+        user = current_user
+        
+        if user.role != 'administrador':
+            return jsonify({'error': 'Solo los administradores pueden ver estadísticas'}), 403
+        
+        try:
+            days = int(request.args.get('days', 30))
+            analytics = get_user_analytics(days=days, bucket=request.args.get('bucket', 'day'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({'analytics': analytics}), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
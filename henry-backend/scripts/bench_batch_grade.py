@@ -0,0 +1,138 @@
+"""
+Benchmark de la calificación por lotes frente a una petición por entrega.
+
+    cd henry-backend
+    python scripts/bench_batch_grade.py [--submissions 200]
+
+Con una base SQLite temporal crea dos tareas del profesor demo con
+`--submissions` entregas cada una. Califica la primera con
+POST /api/assignments/submissions/<id>/grade (una petición por entrega) y
+la segunda con POST /api/assignments/submissions/grade, más tres elementos
+inválidos (dos entregas repetidas y una inexistente). Informa tiempo y
+sentencias SQL de cada forma y termina con código 1 si las notas guardadas
+o los resultados del lote no son los esperados.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _configure_env(workdir):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+    os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+
+
+def _seed(db, submissions):
+    """Dos tareas con `submissions` entregas cada una; retorna [[ids tarea 1], [ids tarea 2]]"""
+    from models.user import User
+    from models.class_model import Class
+    from models.assignment import Assignment, Submission
+
+    professor = User.query.filter_by(email='profesor@henry.edu').first()
+    student = User.query.filter_by(email='estudiante@henry.edu').first()
+    class_obj = Class(name='Clase de calificación', subject='Pruebas', semester='2025-1',
+                      professor_id=professor.id)
+    db.session.add(class_obj)
+    db.session.flush()
+
+    ids = []
+    for n in range(2):
+        assignment = Assignment(title=f'Tarea {n + 1}', max_points=100.0, class_id=class_obj.id,
+                                professor_id=professor.id, due_date=datetime.utcnow() + timedelta(days=7))
+        db.session.add(assignment)
+        db.session.flush()
+        db.session.execute(db.insert(Submission), [
+            {'assignment_id': assignment.id, 'student_id': student.id, 'content': f'Entrega {i}',
+             'attempt_number': i + 1}
+            for i in range(submissions)
+        ])
+        ids.append([submission_id for (submission_id,) in
+                    db.session.query(Submission.id).filter_by(assignment_id=assignment.id)
+                    .order_by(Submission.id)])
+    db.session.commit()
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--submissions', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir)
+        sys.path.insert(0, BACKEND_DIR)
+        from sqlalchemy import event
+        from app import app, db
+        from models.assignment import Submission
+
+        client = app.test_client()
+        token = client.post('/api/auth/login', json={
+            'email': 'profesor@henry.edu', 'password': 'demo123'
+        }).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        with app.app_context():
+            single_ids, batch_ids = _seed(db, args.submissions)
+            engine = db.engine
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        def grade_for(i):
+            return float(i % 101)
+
+        event.listen(engine, 'before_cursor_execute', record)
+        start = time.perf_counter()
+        single_ok = all(
+            client.post(f'/api/assignments/submissions/{submission_id}/grade', headers=headers,
+                        json={'grade': grade_for(i), 'feedback': 'Bien'}).status_code == 200
+            for i, submission_id in enumerate(single_ids)
+        )
+        single_time = time.perf_counter() - start
+        single_statements = len(statements)
+
+        items = [{'submission_id': submission_id, 'grade': grade_for(i), 'feedback': 'Bien'}
+                 for i, submission_id in enumerate(batch_ids)]
+        items += [
+            {'submission_id': batch_ids[0], 'grade': 50},
+            {'submission_id': batch_ids[1], 'grade': 500},
+            {'submission_id': max(batch_ids) + 1000, 'grade': 10},
+        ]
+        statements.clear()
+        start = time.perf_counter()
+        response = client.post('/api/assignments/submissions/grade', headers=headers, json={'grades': items})
+        batch_time = time.perf_counter() - start
+        batch_statements = len(statements)
+        event.remove(engine, 'before_cursor_execute', record)
+
+        body = response.get_json()
+        # Los elementos repetidos fallan y no pisan la nota del primero; los válidos se guardan igual
+        batch_ok = response.status_code == 200 and body.get('failed') == 3 \
+            and body.get('graded') == args.submissions
+
+        with app.app_context():
+            saved = dict(db.session.query(Submission.id, Submission.grade)
+                         .filter(Submission.id.in_(single_ids + batch_ids)))
+        grades_ok = all(saved[submission_id] == grade_for(i)
+                        for ids in (single_ids, batch_ids) for i, submission_id in enumerate(ids))
+
+        n = args.submissions
+        print(f'{n} entregas')
+        print(f'  una petición por entrega: {single_time * 1000:.0f} ms, {single_statements} sentencias SQL')
+        print(f'  lote (+3 inválidas):      {batch_time * 1000:.0f} ms, {batch_statements} sentencias SQL')
+        ok = single_ok and batch_ok and grades_ok
+        print('OK' if ok else f'FALLO: individual={single_ok} lote={batch_ok} notas={grades_ok}')
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
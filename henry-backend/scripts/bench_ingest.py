@@ -0,0 +1,104 @@
+"""
+Benchmark de la subida de presentaciones .pptx: latencia de la petición de
+subida frente al parseo en segundo plano.
+
+    cd henry-backend
+    python scripts/bench_ingest.py [--slides 5 50 300]
+
+Para cada tamaño genera una presentación con python-pptx, la sube a
+POST /api/presentations/ y mide cuánto tarda la respuesta 202 y cuánto
+hasta que /status informa 'completed'. Como referencia, mide también lo
+que tardaba la subida cuando el archivo se parseaba dentro de la petición
+(extracción con python-pptx). Usa una base SQLite y un almacén temporales.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _configure_env(workdir):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+    os.environ['BLOB_STORE_PATH'] = os.path.join(workdir, 'blobs')
+    os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+
+
+def build_deck(slides, tag=''):
+    """Presentación con título y tres viñetas por diapositiva, como bytes"""
+    from pptx import Presentation
+
+    deck = Presentation()
+    layout = deck.slide_layouts[1]
+    for i in range(slides):
+        slide = deck.slides.add_slide(layout)
+        slide.shapes.title.text = f'Diapositiva {i + 1} {tag}'
+        body = slide.placeholders[1].text_frame
+        body.text = f'Punto principal de la diapositiva {i + 1}'
+        for j in range(2):
+            body.add_paragraph().text = f'Detalle {j + 1}: ' + 'contenido de ejemplo ' * 5
+    buffer = io.BytesIO()
+    deck.save(buffer)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--slides', type=int, nargs='+', default=[5, 50, 300])
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir)
+        sys.path.insert(0, BACKEND_DIR)
+        from app import app, User
+        from services.pptx_parser import extract_pptx_slides
+
+        client = app.test_client()
+        with app.app_context():
+            user_id = User.query.filter_by(email='profesor@henry.edu').first().id
+
+        print(f'{"diapositivas":>12}  {"parseo en la petición":>21}  {"respuesta 202":>13}  {"hasta completed":>15}')
+        for slides in args.slides:
+            # Contenido distinto en cada ejecución: el almacén reutiliza extracciones idénticas
+            content = build_deck(slides, tag=str(time.time_ns()))
+
+            legacy_path = os.path.join(workdir, f'legacy-{slides}.pptx')
+            with open(legacy_path, 'wb') as f:
+                f.write(content)
+            start = time.perf_counter()
+            extract_pptx_slides(legacy_path, engine='python-pptx')
+            legacy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            response = client.post('/api/presentations/', data={
+                'source_type': 'upload', 'user_id': str(user_id), 'title': f'Bench {slides}',
+                'file': (io.BytesIO(content), 'bench.pptx')
+            }, content_type='multipart/form-data')
+            accepted = time.perf_counter() - start
+            if response.status_code != 202:
+                raise RuntimeError(f'Subida: {response.status_code} {response.get_json()}')
+
+            status_url = response.headers['Location']
+            while True:
+                status = client.get(status_url).get_json()
+                if status['status'] != 'generating':
+                    break
+                if time.perf_counter() - start > args.timeout:
+                    raise RuntimeError(f'La presentación de {slides} diapositivas no terminó a tiempo')
+                time.sleep(0.01)
+            completed = time.perf_counter() - start
+            if status['status'] != 'completed' or status['slides_count'] != slides:
+                raise RuntimeError(f'Procesamiento incorrecto: {status}')
+
+            print(f'{slides:>12}  {legacy * 1000:>18.0f} ms  {accepted * 1000:>10.0f} ms  '
+                  f'{completed * 1000:>12.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark del clasificador de intenciones del chat.
+
+Compara tres versiones sobre el mismo corpus de mensajes generados:
+- la cadena original de any(palabra in mensaje) por rol;
+- un bucle de búsquedas de subcadena por palabra clave normalizada;
+- IntentMatcher (una expresión regular por intención).
+
+    cd henry-backend
+    python scripts/bench_intents.py [--messages 3000] [--repeat 5]
+
+Termina con código 1 si IntentMatcher no clasifica igual que el bucle por
+palabra clave.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FILLER = ('necesito', 'ayuda', 'con', 'la', 'unidad', 'de', 'mañana', 'por', 'favor',
+          'sobre', 'el', 'tema', 'álgebra', 'lineal', 'y', 'sus', 'aplicaciones')
+
+
+def legacy_intent(message, role, common_intents, role_intents):
+    """Lo que hacía generate_response antes: una búsqueda por palabra sin normalizar"""
+    message = message.lower()
+    for intent, keywords in common_intents:
+        if any(word in message for word in keywords):
+            return intent
+    for intent, keywords in role_intents.get(role, []):
+        if any(word in message for word in keywords):
+            return intent
+    return None
+
+
+def keyword_loop_matcher(common_intents, role_intents, normalize_text):
+    """Palabras clave normalizadas una vez y recorridas una a una en cada mensaje"""
+    def compile_table(intents):
+        return tuple(
+            (intent, tuple(dict.fromkeys(normalize_text(k) for k in keywords)))
+            for intent, keywords in intents
+        )
+
+    tables = {role: compile_table(common_intents + intents) for role, intents in role_intents.items()}
+    tables[None] = compile_table(common_intents)
+
+    def match(message, role=None):
+        text = normalize_text(message)
+        for intent, keywords in tables.get(role, tables[None]):
+            for keyword in keywords:
+                if keyword in text:
+                    return intent
+        return None
+    return match
+
+
+def build_corpus(count, common_intents, role_intents, seed=42):
+    rng = random.Random(seed)
+    keywords = [k for _, words in common_intents for k in words]
+    keywords += [k for intents in role_intents.values() for _, words in intents for k in words]
+    corpus = []
+    for i in range(count):
+        # Un tercio de mensajes largos; algunos sin ninguna palabra clave
+        words = [rng.choice(FILLER) for _ in range(rng.choice((4, 8, 60)))]
+        if i % 5:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        message = ' '.join(words)
+        corpus.append(message.capitalize() if i % 2 else message)
+    return corpus
+
+
+def _best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--messages', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from services.ai_service import COMMON_INTENTS, ROLE_INTENTS, intent_matcher
+    from services.intent_matcher import normalize_text
+
+    corpus = build_corpus(args.messages, COMMON_INTENTS, ROLE_INTENTS)
+    roles = list(ROLE_INTENTS)
+    keyword_loop = keyword_loop_matcher(COMMON_INTENTS, ROLE_INTENTS, normalize_text)
+
+    def run(classify):
+        return lambda: [classify(message, role) for role in roles for message in corpus]
+
+    cases = [
+        ('any(palabra in mensaje) (original)',
+         run(lambda m, r: legacy_intent(m, r, COMMON_INTENTS, ROLE_INTENTS))),
+        ('bucle por palabra clave normalizada', run(keyword_loop)),
+        ('IntentMatcher (regex por intención)', run(intent_matcher.match)),
+    ]
+    total = len(corpus) * len(roles)
+    print(f'{args.messages} mensajes x {len(roles)} roles, mejor de {args.repeat} ejecuciones')
+    for label, fn in cases:
+        elapsed = _best_of(args.repeat, fn)
+        print(f'  {label}: {elapsed * 1000:.1f} ms ({elapsed / total * 1e6:.2f} us/mensaje)')
+
+    mismatches = sum(
+        keyword_loop(message, role) != intent_matcher.match(message, role)
+        for role in roles for message in corpus
+    )
+    print('OK' if not mismatches else f'FALLO: {mismatches} mensajes clasificados distinto')
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
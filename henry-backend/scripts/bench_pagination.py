@@ -0,0 +1,91 @@
+"""
+Benchmark de los listados: lista completa (comportamiento anterior) frente a
+paginación por cursor y proyección de campos.
+
+    cd henry-backend
+    python scripts/bench_pagination.py [--rows 20000] [--repeat 5]
+
+Usa una base SQLite temporal con `--rows` usuarios y mide GET /api/users/.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _configure_env(workdir):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+    os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+
+
+def _seed_users(db, User, rows):
+    password_hash = User.query.first().password_hash
+    batch = [
+        {'email': f'bench{i}@henry.edu', 'full_name': f'Usuario {i}', 'role': 'estudiante',
+         'password_hash': password_hash}
+        for i in range(rows)
+    ]
+    db.session.execute(db.insert(User), batch)
+    db.session.commit()
+
+
+def _best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir)
+        sys.path.insert(0, BACKEND_DIR)
+        from flask import jsonify
+        from app import app, db, User
+
+        client = app.test_client()
+        with app.app_context():
+            _seed_users(db, User, args.rows)
+            last_id = db.session.query(db.func.max(User.id)).scalar()
+
+        token = client.post('/api/auth/login', json={
+            'email': 'admin@henry.edu', 'password': 'demo123'
+        }).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def legacy():
+            # Lo que hacía el listado antes: todas las filas y to_dict() de cada una
+            with app.test_request_context():
+                users = User.query.all()
+                jsonify({'users': [u.to_dict() for u in users]}).get_data()
+                db.session.remove()
+
+        def get(url):
+            return lambda: client.get(url, headers=headers).get_data()
+
+        cases = [
+            ('lista completa (anterior)', legacy),
+            ('primera página, limit=100', get('/api/users/?limit=100')),
+            ('última página, limit=100', get(f'/api/users/?limit=100&after={last_id - 100}')),
+            ('primera página, fields=id,email', get('/api/users/?limit=100&fields=id,email')),
+        ]
+        print(f'{args.rows} usuarios, mejor de {args.repeat} ejecuciones')
+        for label, fn in cases:
+            print(f'  {label}: {_best_of(args.repeat, fn) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
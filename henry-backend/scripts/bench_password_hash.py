@@ -0,0 +1,106 @@
+"""
+Benchmark de los inicios de sesión según el método de hash de contraseñas.
+
+    cd henry-backend
+    python scripts/bench_password_hash.py [--logins 40] [--threads 4]
+        [--methods scrypt scrypt:16384:8:1 pbkdf2:sha256:600000]
+        [--processes 0] [--max-pending 32]
+
+Cada método se mide en un proceso aparte (PASSWORD_HASH_METHOD se lee al
+importar) con una base SQLite temporal: `--threads` clientes envían en total
+`--logins` inicios de sesión y se informa el rendimiento, la latencia p50 y
+p99 y cuántos se rechazaron con 503 por la cola acotada del hasher.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _configure_env(workdir, method, processes, max_pending):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+    os.environ['RATE_LIMIT_BACKEND'] = 'none'
+    os.environ['PASSWORD_HASH_METHOD'] = method
+    os.environ['PASSWORD_HASH_PROCESSES'] = str(processes)
+    os.environ['PASSWORD_HASH_MAX_PENDING'] = str(max_pending)
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0
+
+
+def run_child(args):
+    """Mide un método en este proceso e imprime el resultado como JSON"""
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir, args.method, args.processes, args.max_pending)
+        sys.path.insert(0, BACKEND_DIR)
+        from app import app
+
+        client = app.test_client()
+
+        def login(_):
+            start = time.perf_counter()
+            response = client.post('/api/auth/login', json={
+                'email': 'profesor@henry.edu', 'password': 'demo123'
+            })
+            return response.status_code, time.perf_counter() - start
+
+        login(None)  # el primer inicio de sesión puede rehashear la contraseña demo
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(login, range(args.logins)))
+        elapsed = time.perf_counter() - start
+
+    accepted = [latency for status, latency in results if status == 200]
+    print(json.dumps({
+        'throughput': len(accepted) / elapsed,
+        'p50': _percentile(accepted, 0.5),
+        'p99': _percentile(accepted, 0.99),
+        'shed': sum(1 for status, _ in results if status == 503),
+        'other': sum(1 for status, _ in results if status not in (200, 503)),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--methods', nargs='+',
+                        default=['scrypt', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:100000'])
+    parser.add_argument('--processes', type=int, default=0)
+    parser.add_argument('--max-pending', type=int, default=32)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--method', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    print(f'{args.logins} inicios de sesión, {args.threads} hilos, '
+          f'PASSWORD_HASH_PROCESSES={args.processes}, PASSWORD_HASH_MAX_PENDING={args.max_pending}')
+    failed = False
+    for method in args.methods:
+        command = [sys.executable, os.path.abspath(__file__), '--child', '--method', method,
+                   '--logins', str(args.logins), '--threads', str(args.threads),
+                   '--processes', str(args.processes), '--max-pending', str(args.max_pending)]
+        output = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        failed = failed or result['other'] > 0
+        print(f'  {method:<24} {result["throughput"]:6.1f} logins/s  '
+              f'p50 {result["p50"] * 1000:5.0f} ms  p99 {result["p99"] * 1000:5.0f} ms  '
+              f'503: {result["shed"]}' + (f'  otros errores: {result["other"]}' if result['other'] else ''))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
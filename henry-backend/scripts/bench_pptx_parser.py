@@ -0,0 +1,77 @@
+"""
+Benchmark de los motores de extracción de .pptx: 'xml' (lxml.iterparse
+sobre el zip) frente a 'python-pptx' (el original).
+
+    cd henry-backend
+    python scripts/bench_pptx_parser.py [--slides 5 50 300 1500]
+
+Cada extracción corre en un proceso aparte para medir el pico de memoria
+(RSS máximo) sin que se mezclen los motores. Termina con código 1 si los
+dos motores no producen exactamente las mismas diapositivas.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, resource, sys, time
+from services.pptx_parser import extract_pptx_slides
+path, engine, out = sys.argv[1:4]
+start = time.perf_counter()
+slides = extract_pptx_slides(path, engine=engine)
+elapsed = time.perf_counter() - start
+with open(out, 'w') as f:
+    json.dump(slides, f)
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+
+def run_engine(path, engine, out):
+    """Extrae en un proceso nuevo; retorna (segundos, RSS máximo en MB)"""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, PPTX_PARSER_PROCESSES='0')
+    result = subprocess.run([sys.executable, '-c', CHILD, path, engine, out], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True, check=True)
+    elapsed, max_rss_kb = result.stdout.split()
+    return float(elapsed), int(max_rss_kb) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--slides', type=int, nargs='+', default=[5, 50, 300, 1500])
+    args = parser.parse_args()
+
+    from bench_ingest import build_deck
+
+    ok = True
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f'{"diapositivas":>12}  {"python-pptx":>22}  {"xml":>22}  resultado')
+        for slides in args.slides:
+            path = os.path.join(workdir, f'deck-{slides}.pptx')
+            with open(path, 'wb') as f:
+                f.write(build_deck(slides))
+
+            timings = {}
+            outputs = {}
+            for engine in ('python-pptx', 'xml'):
+                out = os.path.join(workdir, f'{engine}-{slides}.json')
+                timings[engine] = run_engine(path, engine, out)
+                with open(out) as f:
+                    outputs[engine] = json.load(f)
+
+            same = outputs['python-pptx'] == outputs['xml']
+            ok = ok and same
+            cells = [f'{t * 1000:>7.0f} ms {rss:>6.0f} MB' for t, rss in
+                     (timings['python-pptx'], timings['xml'])]
+            print(f'{slides:>12}  {cells[0]:>22}  {cells[1]:>22}  {"iguales" if same else "DISTINTOS"}')
+
+    print('OK' if ok else 'FALLO: los motores producen diapositivas distintas')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark y comprobación de los límites de intentos de login y registro.
+
+    cd henry-backend
+    python scripts/bench_rate_limit.py [--checks 20000]
+
+Mide el costo de cada comprobación con los backends 'memory' y 'sqlite' y
+verifica, con una base SQLite temporal, que:
+- los límites saltan en el intento configurado (por IP y por email);
+- los inicios de sesión correctos no gastan el cupo del email;
+- un login rechazado con 429 no ejecuta ninguna consulta;
+- dos backends 'sqlite' sobre el mismo archivo (dos workers) comparten contadores.
+Termina con código 1 si alguna comprobación falla.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _configure_env(workdir):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+    os.environ['RATE_LIMIT_BACKEND'] = 'sqlite'
+    os.environ['RATE_LIMIT_PATH'] = os.path.join(workdir, 'rate-limits.sqlite3')
+    os.environ['LOGIN_RATE_LIMIT_IP'] = '20/60'
+    os.environ['LOGIN_RATE_LIMIT_EMAIL'] = '10/300'
+    # Hash barato: aquí solo interesa el limitador
+    os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+
+def bench_backends(workdir, checks):
+    from services.rate_limiter import MemoryRateLimitBackend, SQLiteRateLimitBackend, SlidingWindowLimiter
+
+    backends = [
+        MemoryRateLimitBackend(),
+        SQLiteRateLimitBackend(os.path.join(workdir, 'bench-limits.sqlite3')),
+    ]
+    for backend in backends:
+        limiter = SlidingWindowLimiter(backend, 'bench', checks * 2, 60)
+        start = time.perf_counter()
+        for i in range(checks):
+            limiter.hit(f'10.0.{i % 250}.{i % 97}')
+        elapsed = time.perf_counter() - start
+        print(f'  {backend.name:<7} {elapsed / checks * 1e6:6.1f} us por comprobación')
+
+
+def _login(client, email, password, ip):
+    return client.post('/api/auth/login', json={'email': email, 'password': password},
+                       headers={'X-Forwarded-For': ip}).status_code
+
+
+def check_limits(app, db, client):
+    from sqlalchemy import event
+    from services.rate_limiter import SQLiteRateLimitBackend, SlidingWindowLimiter
+
+    results = []
+
+    statuses = [_login(client, f'nadie{i}@henry.edu', 'x', '203.0.113.1') for i in range(21)]
+    results.append(('login por IP: el intento 21 recibe 429',
+                    statuses[:20].count(429) == 0 and statuses[20] == 429))
+
+    statuses = [_login(client, 'estudiante@henry.edu', 'demo123', f'198.51.100.{i}') for i in range(15)]
+    results.append(('15 logins correctos al mismo email pasan', set(statuses) == {200}))
+
+    statuses = [_login(client, 'estudiante@henry.edu', 'mala', f'192.0.2.{i}') for i in range(11)]
+    results.append(('login por email: el fallo 11 recibe 429',
+                    statuses[:10].count(429) == 0 and statuses[10] == 429))
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        status = _login(client, 'estudiante@henry.edu', 'mala', '192.0.2.250')
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    results.append((f'login rechazado con 429 sin consultas ({len(statements)})',
+                    status == 429 and not statements))
+
+    path = os.environ['RATE_LIMIT_PATH'] + '.shared'
+    workers = [SlidingWindowLimiter(SQLiteRateLimitBackend(path), 'shared', 5, 60) for _ in range(2)]
+    allowed = [workers[i % 2].hit('10.1.1.1')[0] for i in range(6)]
+    results.append(('dos workers sqlite comparten el límite 5/60', allowed == [True] * 5 + [False]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--checks', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir)
+        sys.path.insert(0, BACKEND_DIR)
+        from app import app, db
+
+        print(f'{args.checks} comprobaciones por backend')
+        bench_backends(workdir, args.checks)
+
+        results = check_limits(app, db, app.test_client())
+        for label, ok in results:
+            print(f'  {"OK   " if ok else "FALLO"} {label}')
+        ok = all(ok for _, ok in results)
+        print('OK' if ok else 'FALLO: algún límite no se comporta como está configurado')
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark del arranque y del costo por petición de la inicialización de la base de datos.
+
+Compara el hook anterior (db.create_all() y tres consultas de usuarios demo
+en cada petición) con el bootstrap actual, que se ejecuta una vez por
+despliegue bajo un bloqueo de archivo:
+
+    cd henry-backend
+    python scripts/bench_startup.py [--requests 500] [--workers 4]
+
+Usa una base SQLite temporal; no toca la configurada en DATABASE_URL.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _configure_env(workdir):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+
+
+def bench_workers(workers):
+    """Arranca `workers` procesos como haría gunicorn y mide cuánto tarda cada uno"""
+    code = (
+        'import time; t = time.perf_counter(); '
+        'import app; print(time.perf_counter() - t)'
+    )
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    timings = []
+    for _ in range(workers):
+        # Mismo proceso padre para todos: comparten la marca de despliegue
+        out = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env,
+                             capture_output=True, text=True, check=True)
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def legacy_hook(db, User):
+    """Lo que hacía el before_request original en cada petición (con los usuarios ya creados)"""
+    db.create_all()
+    for email in ('admin@henry.edu', 'profesor@henry.edu', 'estudiante@henry.edu'):
+        User.query.filter_by(email=email).first()
+    db.session.commit()
+
+
+def bench_requests(requests):
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app, db, User
+
+    client = app.test_client()
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get('/api/health')
+        return time.perf_counter() - start
+
+    current = run()
+    app.before_request_funcs.setdefault(None, []).append(lambda: legacy_hook(db, User))
+    legacy = run()
+    return legacy, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir)
+
+        timings = bench_workers(args.workers)
+        print(f'Arranque del primer worker (crea esquema y usuarios): {timings[0] * 1000:.0f} ms')
+        if len(timings) > 1:
+            rest = sum(timings[1:]) / len(timings[1:])
+            print(f'Arranque de los demás workers (omiten el bootstrap): {rest * 1000:.0f} ms de media')
+
+        legacy, current = bench_requests(args.requests)
+        print(f'{args.requests} peticiones a /api/health')
+        print(f'  hook por petición (anterior): {legacy:.2f} s ({legacy / args.requests * 1000:.2f} ms/petición)')
+        print(f'  bootstrap al arrancar (actual): {current:.2f} s ({current / args.requests * 1000:.2f} ms/petición)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark de la importación masiva de usuarios frente al registro uno a uno.
+
+    cd henry-backend
+    python scripts/bench_user_import.py [--rows 10000] [--register 200]
+        [--hash-method pbkdf2:sha256:1000]
+
+Con una base SQLite temporal mide:
+- POST /api/auth/register, `--register` usuarios uno por uno;
+- POST /api/users/import con un CSV de `--rows` usuarios con contraseñas
+  distintas (más algunas filas inválidas que deben informarse);
+- la misma importación en NDJSON con una default_password compartida.
+Por defecto usa un hash barato para medir el trabajo de base de datos; con
+--hash-method scrypt se ve el costo real del hash. Termina con código 1 si
+los usuarios creados o los errores informados no son los esperados.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Filas inválidas que se agregan al CSV: (fila, motivo esperado)
+INVALID_ROWS = [
+    ('correo-invalido,X,estudiante,secret1', 'Formato de email inválido'),
+    ('csv1@henry.edu,Repetido,estudiante,secret1', 'Email repetido en el archivo'),
+    ('sin-nombre@henry.edu,,estudiante,secret1', 'El campo full_name es requerido'),
+    ('rol@henry.edu,A,rey,secret1', 'Rol inválido'),
+    ('corta@henry.edu,A,profesor,123', 'La contraseña debe tener al menos 6 caracteres'),
+    ('estudiante@henry.edu,Ya existe,estudiante,secret1', 'El email ya está registrado'),
+]
+
+
+def _configure_env(workdir, hash_method):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+    os.environ['RATE_LIMIT_BACKEND'] = 'none'
+    os.environ['PASSWORD_HASH_METHOD'] = hash_method
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--register', type=int, default=200)
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir, args.hash_method)
+        sys.path.insert(0, BACKEND_DIR)
+        from app import app
+
+        client = app.test_client()
+        token = client.post('/api/auth/login', json={
+            'email': 'admin@henry.edu', 'password': 'demo123'
+        }).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        ok = True
+
+        start = time.perf_counter()
+        for i in range(args.register):
+            response = client.post('/api/auth/register', json={
+                'email': f'reg{i}@henry.edu', 'password': f'secret{i}',
+                'full_name': f'Registro {i}', 'role': 'estudiante'
+            })
+            ok = ok and response.status_code == 201
+        elapsed = time.perf_counter() - start
+        print(f'{args.hash_method}')
+        print(f'  registro uno a uno ({args.register}): {elapsed:.2f} s ({args.register / elapsed:.0f} usuarios/s)')
+
+        lines = ['email,full_name,role,password']
+        lines += [f'csv{i}@henry.edu,Estudiante {i},estudiante,pass{i:06d}' for i in range(args.rows)]
+        lines += [row for row, _ in INVALID_ROWS]
+        start = time.perf_counter()
+        response = client.post('/api/users/import', data='\n'.join(lines).encode(),
+                               headers={**headers, 'Content-Type': 'text/csv'})
+        elapsed = time.perf_counter() - start
+        result = response.get_json()['import']
+        reported = sorted(error['error'] for error in result['errors'])
+        expected = sorted(reason for _, reason in INVALID_ROWS)
+        csv_ok = result['created'] == args.rows and reported == expected
+        ok = ok and csv_ok
+        print(f'  CSV, contraseñas distintas ({args.rows}): {elapsed:.2f} s '
+              f'({result["created"] / elapsed:.0f} usuarios/s), {result["error_count"]} filas con error'
+              + ('' if csv_ok else '  FALLO'))
+
+        body = '\n'.join(json.dumps({'email': f'nd{i}@henry.edu', 'full_name': f'NDJSON {i}'})
+                         for i in range(args.rows)).encode()
+        start = time.perf_counter()
+        response = client.post('/api/users/import', headers=headers, data={
+            'file': (io.BytesIO(body), 'usuarios.ndjson'), 'default_password': 'semestre2026'
+        }, content_type='multipart/form-data')
+        elapsed = time.perf_counter() - start
+        result = response.get_json()['import']
+        ndjson_ok = result['created'] == args.rows and result['error_count'] == 0
+        ok = ok and ndjson_ok
+        print(f'  NDJSON, default_password compartida ({args.rows}): {elapsed:.2f} s '
+              f'({result["created"] / elapsed:.0f} usuarios/s)' + ('' if ndjson_ok else '  FALLO'))
+
+        login = client.post('/api/auth/login', json={'email': 'csv7@henry.edu', 'password': 'pass000007'})
+        ok = ok and login.status_code == 200
+        print('OK' if ok else 'FALLO: la importación no creó o no informó lo esperado')
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Comprueba que los listados serializados en lote hacen un número constante de
+consultas, sin importar cuántas clases haya.
+
+    cd henry-backend
+    python scripts/check_query_counts.py [--small 10] [--large 100]
+
+Usa una base SQLite temporal; siembra `--small` clases con materiales,
+tareas y entregas, cuenta las sentencias SQL de cada endpoint, amplía a
+`--large` clases y vuelve a contar. Termina con código 1 si algún conteo
+crece con el número de clases.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = [
+    ('profesor', '/api/classes/?limit=500'),
+    ('administrador', '/api/classes/?limit=500'),
+    ('profesor', '/api/assignments/?limit=500'),
+    ('profesor', '/api/materials/?limit=500'),
+]
+
+
+def _configure_env(workdir):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'check.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'check-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+    os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+
+
+def _seed_classes(db, count, start):
+    """`count` clases del profesor demo, cada una con 3 materiales y 2 tareas con entregas"""
+    from models.user import User
+    from models.class_model import Class
+    from models.material import Material
+    from models.assignment import Assignment, Submission
+
+    professor = User.query.filter_by(email='profesor@henry.edu').first()
+    student = User.query.filter_by(email='estudiante@henry.edu').first()
+    due = datetime.utcnow() + timedelta(days=7)
+
+    for i in range(start, start + count):
+        class_obj = Class(name=f'Clase {i}', subject='Pruebas', semester='2025-1',
+                          professor_id=professor.id)
+        db.session.add(class_obj)
+        db.session.flush()
+        for j in range(3):
+            db.session.add(Material(name=f'Material {i}-{j}', type='link', url='https://example.com',
+                                    class_id=class_obj.id, uploaded_by=professor.id))
+        for j in range(2):
+            assignment = Assignment(title=f'Tarea {i}-{j}', due_date=due,
+                                    class_id=class_obj.id, professor_id=professor.id)
+            db.session.add(assignment)
+            db.session.flush()
+            db.session.add(Submission(assignment_id=assignment.id, student_id=student.id, content='-'))
+    db.session.commit()
+
+
+def _count_queries(app, db, client, headers, url):
+    """Sentencias SQL que ejecuta una petición (la primera calienta la caché de usuarios)"""
+    from sqlalchemy import event
+
+    client.get(url, headers=headers)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    if response.status_code != 200:
+        raise RuntimeError(f'{url}: {response.status_code} {response.get_json()}')
+    return len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--small', type=int, default=10)
+    parser.add_argument('--large', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir)
+        sys.path.insert(0, BACKEND_DIR)
+        from app import app, db
+
+        client = app.test_client()
+        headers = {}
+        for email, role in (('profesor@henry.edu', 'profesor'), ('admin@henry.edu', 'administrador')):
+            token = client.post('/api/auth/login', json={
+                'email': email, 'password': 'demo123'
+            }).get_json()['access_token']
+            headers[role] = {'Authorization': f'Bearer {token}'}
+
+        counts = {}
+        for size, start in ((args.small, 0), (args.large, args.small)):
+            with app.app_context():
+                _seed_classes(db, size - start, start)
+            counts[size] = [_count_queries(app, db, client, headers[role], url)
+                            for role, url in ENDPOINTS]
+
+        ok = True
+        print(f'Sentencias SQL por petición con {args.small} y {args.large} clases')
+        for (role, url), small, large in zip(ENDPOINTS, counts[args.small], counts[args.large]):
+            status = 'OK' if small == large else 'CRECE'
+            ok = ok and small == large
+            print(f'  {role:<14} GET {url}: {small} -> {large} {status}')
+        print('OK' if ok else 'FALLO: el número de consultas depende del número de clases')
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Prueba de los planes de consulta: las consultas frecuentes (HOT_QUERIES en
+services/migrations.py) deben resolverse con un índice.
+
+    cd henry-backend
+    python scripts/check_query_plans.py [--database-url postgresql://...]
+
+Sin argumentos usa una base SQLite temporal y comprueba tres casos:
+1. una base recién creada por el bootstrap (create_all + migraciones);
+2. una base anterior a los índices (se eliminan y se olvida la migración
+   0001): la comprobación debe detectar los recorridos completos;
+3. esa misma base después de run_migrations().
+Con --database-url solo se revisan los planes de esa base, sin modificarla.
+Termina con código 1 si algún caso no da el resultado esperado.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _configure_env(workdir, database_url):
+    os.environ['DATABASE_URL'] = database_url or f"sqlite:///{os.path.join(workdir, 'plans.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'check-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+    os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+
+
+def _hot_tables(hot_queries):
+    return sorted({sql.split(' FROM ', 1)[1].split()[0] for _, sql in hot_queries})
+
+
+def _drop_hot_indexes(engine, tables):
+    """Deja la base como antes de la migración 0001 (sin los índices no únicos)"""
+    from sqlalchemy import inspect, text
+
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in tables:
+            for index in inspector.get_indexes(table):
+                if not index.get('unique'):
+                    conn.execute(text(f'DROP INDEX {index["name"]}'))
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = '0001'"))
+    # SQLite reutiliza los EXPLAIN ya preparados en cada conexión: conexiones nuevas
+    engine.dispose()
+
+
+def _report(label, failures, expect_failures):
+    ok = bool(failures) == expect_failures
+    print(f'{label}: {len(failures)} consultas sin índice {"OK" if ok else "FALLO"}')
+    for name, plan in failures:
+        print(f'    {name}: {plan.splitlines()[0] if plan else ""}')
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--database-url')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir, args.database_url)
+        sys.path.insert(0, BACKEND_DIR)
+        from app import app, db
+        from services.migrations import HOT_QUERIES, check_query_plans, run_migrations
+
+        with app.app_context():
+            engine = db.engine
+            ok = _report('base actual', check_query_plans(engine), expect_failures=False)
+
+            if not args.database_url:
+                _drop_hot_indexes(engine, _hot_tables(HOT_QUERIES))
+                ok &= _report('sin índices (antes de 0001)', check_query_plans(engine), expect_failures=True)
+                applied = run_migrations(engine)
+                engine.dispose()
+                print(f'migraciones aplicadas: {", ".join(applied) or "ninguna"}')
+                ok &= _report('después de migrar', check_query_plans(engine), expect_failures=False)
+
+        print('OK' if ok else 'FALLO: los planes de consulta no son los esperados')
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Prueba de estrés de las inscripciones: cientos de estudiantes se inscriben a
+la vez en una clase con cupo limitado (cada uno envía dos peticiones para
+ejercitar también la restricción única).
+
+    cd henry-backend
+    python scripts/stress_enrollment.py [--students 300] [--capacity 50] [--threads 32]
+
+Por defecto usa una base SQLite temporal; con --database-url se puede
+apuntar a una base PostgreSQL de pruebas (se crean usuarios y una clase).
+Termina con código 1 si se supera el cupo o si enrolled_count no coincide
+con las filas de enrollments.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _configure_env(workdir, database_url):
+    os.environ['DATABASE_URL'] = database_url or f"sqlite:///{os.path.join(workdir, 'stress.db')}"
+    os.environ.setdefault('JWT_SECRET_KEY', 'stress-' + 'x' * 32)
+    os.environ['BOOTSTRAP_LOCK_FILE'] = os.path.join(workdir, 'bootstrap.lock')
+    os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+
+
+def _setup(app, db, students, capacity):
+    """Crea la clase y los estudiantes; retorna (class_id, tokens)"""
+    from datetime import timedelta
+    from flask_jwt_extended import create_access_token
+    from models.user import User
+    from models.class_model import Class
+
+    with app.app_context():
+        professor = User.query.filter_by(email='profesor@henry.edu').first()
+        class_obj = Class(name='Clase de estrés', subject='Pruebas', semester='2025-1',
+                          professor_id=professor.id, capacity=capacity)
+        db.session.add(class_obj)
+        db.session.commit()
+
+        run = int(time.time())
+        db.session.execute(db.insert(User), [
+            {'email': f'stress{run}-{i}@henry.edu', 'full_name': f'Estudiante {i}',
+             'role': 'estudiante', 'password_hash': professor.password_hash}
+            for i in range(students)
+        ])
+        db.session.commit()
+        student_ids = [user_id for (user_id,) in db.session.query(User.id)
+                       .filter(User.email.like(f'stress{run}-%'))]
+        tokens = [create_access_token(identity=user_id, expires_delta=timedelta(hours=1))
+                  for user_id in student_ids]
+        return class_obj.id, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--students', type=int, default=300)
+    parser.add_argument('--capacity', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--database-url')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir, args.database_url)
+        sys.path.insert(0, BACKEND_DIR)
+        from app import app, db
+        from models.class_model import Class
+        from models.enrollment import Enrollment
+
+        class_id, tokens = _setup(app, db, args.students, args.capacity)
+        client = app.test_client()
+
+        def enroll(token):
+            response = client.post(f'/api/classes/{class_id}/enroll',
+                                   headers={'Authorization': f'Bearer {token}'})
+            return response.status_code, (response.get_json() or {}).get('error')
+
+        # Dos peticiones por estudiante, intercaladas con las de los demás
+        requests = tokens + tokens
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(enroll, requests))
+        elapsed = time.perf_counter() - start
+
+        with app.app_context():
+            enrolled_count = db.session.get(Class, class_id).enrolled_count
+            rows = Enrollment.query.filter_by(class_id=class_id).count()
+            per_student = db.session.query(Enrollment.student_id, db.func.count()) \
+                .filter_by(class_id=class_id).group_by(Enrollment.student_id) \
+                .having(db.func.count() > 1).count()
+
+        outcomes = Counter(status if status == 200 else f'{status} {error}' for status, error in results)
+        print(f'{len(requests)} peticiones de {args.students} estudiantes en {elapsed:.2f} s '
+              f'({args.threads} hilos, cupo {args.capacity})')
+        for outcome, count in outcomes.most_common():
+            print(f'  {outcome}: {count}')
+        print(f'enrolled_count={enrolled_count} filas en enrollments={rows} duplicados={per_student}')
+
+        expected = min(args.capacity, args.students)
+        ok = enrolled_count == rows == outcomes[200] == expected and per_student == 0
+        print('OK' if ok else 'FALLO: el cupo o el contador no son consistentes')
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Incrementar cuando cambien las plantillas o los prompts para invalidar la caché
+CACHE_VERSION = '1'
+
+# Estado de la generación en curso (por hilo): si el proveedor falló y se
+# respondió con plantillas, el resultado no se guarda en la caché
+_generation_state = threading.local()
+
+
+def mark_fallback():
+    """Indica que la generación en curso usó las plantillas por un fallo del proveedor"""
+    _generation_state.fallback = True
+
+
+def _normalize(value):
+    """Normaliza argumentos para que peticiones equivalentes compartan clave"""
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_cache_key(operation, arguments, provider):
+    """Hash SHA-256 de (operación, argumentos normalizados, proveedor/versión)"""
+    payload = json.dumps({
+        'v': CACHE_VERSION,
+        'op': operation,
+        'args': _normalize(arguments),
+        'provider': getattr(provider, 'name', None),
+        'provider_version': getattr(provider, 'version', None)
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MemoryCacheBackend:
+    """Caché LRU con TTL dentro del proceso"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=1024, ttl=3600):
+        self._cache = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def size(self):
+        with self._lock:
+            return len(self._cache)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+class SQLiteCacheBackend:
+    """
+    Caché en un archivo SQLite compartido por todos los workers de gunicorn.
+    Las entradas expiran por TTL y, al superar `max_entries`, se descartan
+    las más antiguas.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=10000, ttl=3600, prune_every=100):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS ai_cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'created_at REAL NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_ai_cache_created_at ON ai_cache (created_at)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM ai_cache WHERE key = ? AND expires_at > ?',
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        now = time.time()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO ai_cache (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)',
+            (key, value, now, now + self.ttl)
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Elimina entradas expiradas y recorta al tamaño máximo"""
+        conn = self._connection()
+        conn.execute('DELETE FROM ai_cache WHERE expires_at <= ?', (time.time(),))
+        conn.execute(
+            'DELETE FROM ai_cache WHERE key IN ('
+            'SELECT key FROM ai_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def size(self):
+        return self._connection().execute('SELECT COUNT(*) FROM ai_cache').fetchone()[0]
+
+    def clear(self):
+        self._connection().execute('DELETE FROM ai_cache')
+
+
+class GenerationCache:
+    """Caché de resultados de generación con métricas de aciertos y fallos"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.fallbacks = 0
+
+    def get_or_compute(self, operation, arguments, provider, compute):
+        key = make_cache_key(operation, arguments, provider)
+
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            logger.warning('Error al leer la caché de IA: %s', e)
+            cached = None
+            self._count('errors')
+
+        if cached is not None:
+            self._count('hits')
+            return json.loads(cached)
+
+        self._count('misses')
+        _generation_state.fallback = False
+        try:
+            result = compute()
+            fallback = _generation_state.fallback
+        finally:
+            _generation_state.fallback = False
+
+        if fallback:
+            # Respuesta de emergencia: cuando el proveedor se recupere debe volver a consultarse
+            self._count('fallbacks')
+            return result
+
+        try:
+            self.backend.set(key, json.dumps(result, ensure_ascii=False))
+        except Exception as e:
+            logger.warning('Error al escribir en la caché de IA: %s', e)
+            self._count('errors')
+
+        return result
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        with self._lock:
+            hits, misses, errors, fallbacks = self.hits, self.misses, self.errors, self.fallbacks
+        lookups = hits + misses
+        try:
+            size = self.backend.size()
+        except Exception:
+            size = None
+        return {
+            'backend': self.backend.name,
+            'entries': size,
+            'hits': hits,
+            'misses': misses,
+            'errors': errors,
+            'fallbacks': fallbacks,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def cached_generation(operation):
+    """Decorador para métodos de AIService cuyo resultado se puede reutilizar"""
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.cache is None:
+                return method(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop('self')
+
+            return self.cache.get_or_compute(
+                operation, arguments, self.provider,
+                lambda: method(self, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+def build_cache_from_env():
+    """Construye la caché configurada con las variables de entorno (o None)"""
+    backend_type = os.getenv('AI_CACHE_BACKEND', 'memory').lower()
+    ttl = int(os.getenv('AI_CACHE_TTL', '3600'))
+    max_entries = int(os.getenv('AI_CACHE_MAX_ENTRIES', '1024'))
+
+    if backend_type in ('none', 'off', 'false'):
+        return None
+
+    if backend_type == 'sqlite':
+        path = os.getenv('AI_CACHE_PATH') or os.path.join(tempfile.gettempdir(), 'henry-ai-cache.sqlite3')
+        return GenerationCache(SQLiteCacheBackend(path, max_entries=max_entries, ttl=ttl))
+
+    if backend_type != 'memory':
+        logger.warning('AI_CACHE_BACKEND desconocido: %s. Se usa memoria.', backend_type)
+    return GenerationCache(MemoryCacheBackend(max_entries=max_entries, ttl=ttl))
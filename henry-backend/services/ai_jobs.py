@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from services.task_queue import BoundedTaskQueue
+
+logger = logging.getLogger(__name__)
+
+
+class AIJobRunner:
+    """
+    Ejecuta las operaciones de IA fuera del ciclo de la petición.
+    El estado de cada trabajo se guarda en la tabla ai_jobs, de modo que
+    cualquier worker de gunicorn puede responder a la consulta del cliente.
+    """
+
+    # Cada cuánto se limpian los trabajos (segundos)
+    PURGE_INTERVAL = 600
+
+    def __init__(self, max_workers=4, max_pending=32, retention_hours=24, timeout_minutes=30):
+        self.queue = BoundedTaskQueue(max_workers=max_workers, max_pending=max_pending, name='henry-ai')
+        self.retention = timedelta(hours=retention_hours)
+        self.timeout = timedelta(minutes=timeout_minutes)
+        self._last_purge = float('-inf')
+        self._purge_lock = threading.Lock()
+
+    def submit(self, app, user_id, operation, fn):
+        """
+        Registra un trabajo y lo encola. `fn` no recibe argumentos y retorna
+        el cuerpo JSON que antes devolvía el endpoint síncrono.
+        Lanza QueueFullError si el pool está saturado.
+        """
+        from app import db
+        from models.ai_job import AIJob
+
+        self.purge_if_due()
+
+        job = AIJob(user_id=user_id, operation=operation, status='queued')
+        db.session.add(job)
+        db.session.commit()
+
+        try:
+            self.queue.submit(self._run, app, job.id, fn)
+        except Exception:
+            db.session.delete(job)
+            db.session.commit()
+            raise
+
+        return job
+
+    def _run(self, app, job_id, fn):
+        from app import db
+        from models.ai_job import AIJob
+
+        with app.app_context():
+            job = db.session.get(AIJob, job_id)
+            # Ya marcado como fallido por purge_if_due tras esperar demasiado
+            if job is None or job.status != 'queued':
+                return
+
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+
+            try:
+                result = fn()
+                job.set_result(result)
+                job.status = 'completed'
+            except Exception:
+                logger.exception('Error al ejecutar el trabajo de IA %s', job_id)
+                db.session.rollback()
+                job.status = 'failed'
+                job.error = 'Error interno del servidor'
+
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+    def purge_if_due(self):
+        """
+        Cada PURGE_INTERVAL segundos como mucho: marca como fallidos los
+        trabajos que siguen en cola o en ejecución después de `timeout` (el
+        worker que los tenía se reinició o se cayó, y el cliente que consulta
+        nunca vería un estado final) y elimina los terminados antiguos.
+        """
+        from app import db
+        from models.ai_job import AIJob
+
+        now = time.monotonic()
+        with self._purge_lock:
+            if now - self._last_purge < self.PURGE_INTERVAL:
+                return
+            self._last_purge = now
+
+        utcnow = datetime.utcnow()
+        AIJob.query.filter(
+            AIJob.status.in_(('queued', 'running')),
+            AIJob.created_at < utcnow - self.timeout
+        ).update({
+            'status': 'failed',
+            'error': 'El trabajo no terminó a tiempo, intenta de nuevo',
+            'finished_at': utcnow
+        }, synchronize_session=False)
+        AIJob.query.filter(
+            AIJob.finished_at.isnot(None),
+            AIJob.finished_at < utcnow - self.retention
+        ).delete(synchronize_session=False)
+        db.session.commit()
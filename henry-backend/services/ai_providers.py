@@ -0,0 +1,213 @@
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ProviderError(Exception):
+    """Error del proveedor de IA (timeout, saturación o respuesta inválida)"""
+
+
+class TemplateProvider:
+    """
+    Proveedor por defecto: no llama a ningún modelo y deja que AIService
+    responda con sus plantillas (comportamiento original).
+    """
+
+    name = 'template'
+    version = '1'
+
+    def complete(self, messages, json_mode=False):
+        return None
+
+    def stream(self, messages):
+        return None
+
+    def close(self):
+        pass
+
+
+class HTTPProvider:
+    """
+    Proveedor HTTP compatible con la API de chat completions de OpenAI
+    (OpenAI, Gemini vía su endpoint compatible, vLLM, Ollama o el servidor
+    local de pruebas en services/ai_stub_server.py).
+
+    Un único httpx.Client por proveedor mantiene el pool de conexiones, de modo
+    que los sockets se reutilizan entre llamadas y entre hilos.
+    """
+
+    name = 'http'
+
+    def __init__(self, base_url, api_key=None, model='gpt-4o-mini', timeout=20.0,
+                 connect_timeout=5.0, max_concurrency=8, max_retries=2, backoff=0.5):
+        import httpx
+
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.version = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._httpx = httpx
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        headers = {'Content-Type': 'application/json'}
+        if api_key:
+            headers['Authorization'] = f'Bearer {api_key}'
+
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency
+            )
+        )
+
+    def complete(self, messages, json_mode=False):
+        """Retorna el texto generado; lanza ProviderError si no fue posible"""
+        payload = {'model': self.model, 'messages': messages}
+        if json_mode:
+            payload['response_format'] = {'type': 'json_object'}
+
+        # Limitar llamadas concurrentes al modelo en este proceso
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ProviderError('Proveedor de IA saturado')
+        try:
+            response = self._post_with_retries('/chat/completions', payload)
+        finally:
+            self._slots.release()
+
+        try:
+            return response.json()['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise ProviderError('Respuesta inválida del proveedor de IA')
+
+    def stream(self, messages):
+        """
+        Genera el texto por fragmentos a medida que llega (stream SSE del proveedor).
+        Solo se reintenta mientras no se haya recibido ningún fragmento.
+        """
+        httpx = self._httpx
+        payload = {'model': self.model, 'messages': messages, 'stream': True}
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ProviderError('Proveedor de IA saturado')
+        started = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    with self.client.stream('POST', '/chat/completions', json=payload) as response:
+                        if response.status_code in RETRYABLE_STATUS:
+                            retry_after = response.headers.get('Retry-After')
+                            error = ProviderError(f'El proveedor respondió {response.status_code}')
+                        elif response.status_code >= 400:
+                            raise ProviderError(f'El proveedor respondió {response.status_code}')
+                        else:
+                            for delta in self._iter_stream_deltas(response):
+                                started = True
+                                yield delta
+                            return
+                except httpx.HTTPError as e:
+                    error = ProviderError(f'Error de conexión con el proveedor: {e}')
+                    if started:
+                        raise error
+
+                if attempt == self.max_retries:
+                    raise error
+                time.sleep(self._backoff_delay(attempt, retry_after))
+        finally:
+            self._slots.release()
+
+    def _iter_stream_deltas(self, response):
+        for line in response.iter_lines():
+            if not line.startswith('data:'):
+                continue
+            data = line[5:].strip()
+            if data == '[DONE]':
+                return
+            try:
+                delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+            except (ValueError, KeyError, IndexError, TypeError):
+                raise ProviderError('Respuesta inválida del proveedor de IA')
+            if delta:
+                yield delta
+
+    def _post_with_retries(self, path, payload):
+        httpx = self._httpx
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.client.post(path, json=payload)
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    return response
+                retry_after = response.headers.get('Retry-After')
+                error = ProviderError(f'El proveedor respondió {response.status_code}')
+            except httpx.HTTPStatusError as e:
+                raise ProviderError(f'El proveedor respondió {e.response.status_code}')
+            except httpx.HTTPError as e:
+                error = ProviderError(f'Error de conexión con el proveedor: {e}')
+
+            if attempt == self.max_retries:
+                raise error
+            time.sleep(self._backoff_delay(attempt, retry_after))
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Backoff exponencial con jitter; respeta Retry-After (máximo 10 s)"""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), 10.0)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    def close(self):
+        self.client.close()
+
+
+def build_provider_from_env():
+    """Construye el proveedor configurado con las variables de entorno"""
+    provider_type = os.getenv('AI_PROVIDER', 'template').lower()
+
+    if provider_type == 'http':
+        base_url = os.getenv('AI_PROVIDER_URL') or os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
+        provider = HTTPProvider(
+            base_url=base_url,
+            api_key=os.getenv('AI_PROVIDER_API_KEY') or os.getenv('OPENAI_API_KEY'),
+            model=os.getenv('AI_PROVIDER_MODEL', 'gpt-4o-mini'),
+            timeout=float(os.getenv('AI_PROVIDER_TIMEOUT', '20')),
+            connect_timeout=float(os.getenv('AI_PROVIDER_CONNECT_TIMEOUT', '5')),
+            max_concurrency=int(os.getenv('AI_PROVIDER_MAX_CONCURRENCY', '8')),
+            max_retries=int(os.getenv('AI_PROVIDER_MAX_RETRIES', '2')),
+            backoff=float(os.getenv('AI_PROVIDER_BACKOFF', '0.5'))
+        )
+        atexit.register(provider.close)
+        return provider
+
+    if provider_type != 'template':
+        logger.warning('AI_PROVIDER desconocido: %s. Se usan plantillas.', provider_type)
+    return TemplateProvider()
+
+
+def parse_json_content(text):
+    """Extrae un objeto JSON de la respuesta del modelo (admite bloques ```json)"""
+    if not text:
+        return None
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.strip('`')
+        if text.lower().startswith('json'):
+            text = text[4:]
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
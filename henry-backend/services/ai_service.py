@@ -1,11 +1,53 @@
+import logging
 import random
-import time
 from datetime import datetime, timedelta
 
+from services.ai_cache import build_cache_from_env, cached_generation, mark_fallback
+from services.ai_providers import ProviderError, build_provider_from_env, parse_json_content
+from services.intent_matcher import IntentMatcher
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "Eres HENRY, un asistente educativo para profesores, estudiantes y administradores "
+    "universitarios. Responde siempre en español, de forma clara y didáctica."
+)
+
+# Palabras clave por intención, en orden de prioridad
+COMMON_INTENTS = [
+    ('greeting', ['hola', 'hello', 'hi', 'buenos días', 'buenas tardes'])
+]
+
+ROLE_INTENTS = {
+    'profesor': [
+        ('presentation', ['presentación', 'presentation', 'slides']),
+        ('quiz', ['cuestionario', 'quiz', 'examen', 'evaluación']),
+        ('planning', ['clase', 'planificar', 'lesson', 'plan']),
+        ('research', ['investigación', 'research', 'paper', 'artículo'])
+    ],
+    'estudiante': [
+        ('explanation', ['explicar', 'explain', 'entender', 'understand', 'concepto']),
+        ('homework', ['ejercicio', 'problema', 'tarea', 'homework']),
+        ('exam', ['examen', 'exam', 'estudiar', 'study', 'repasar']),
+        ('summary', ['resumir', 'summary', 'resumen', 'material'])
+    ],
+    'administrador': [
+        ('analytics', ['estadísticas', 'stats', 'analytics', 'datos']),
+        ('management', ['usuarios', 'users', 'gestión', 'management'])
+    ]
+}
+
+# Se compila una sola vez al importar el módulo
+intent_matcher = IntentMatcher(COMMON_INTENTS, ROLE_INTENTS)
+
 class AIService:
     """Servicio de IA para generar contenido educativo y asistencia académica"""
     
-    def __init__(self):
+    def __init__(self, provider=None, cache=None):
+        # Proveedor del modelo; con el de plantillas se conserva el comportamiento original
+        self.provider = provider or build_provider_from_env()
+        # Caché de resultados compartida entre usuarios (None la desactiva vía AI_CACHE_BACKEND=none)
+        self.cache = cache if cache is not None else build_cache_from_env()
         self.response_templates = {
             'profesor': {
                 'greeting': "¡Hola, {name}! Soy tu asistente de IA especializado en docencia e investigación. ¿En qué puedo ayudarte hoy?",
@@ -29,20 +71,74 @@ class AIService:
             }
         }
     
+    def _messages(self, prompt):
+        return [
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': prompt}
+        ]
+    
+    def _generate_text(self, prompt, json_mode=False):
+        """Consulta al proveedor; retorna None si se deben usar las plantillas"""
+        try:
+            return self.provider.complete(self._messages(prompt), json_mode=json_mode)
+        except ProviderError as e:
+            logger.warning('Proveedor de IA no disponible, se usan plantillas: %s', e)
+            mark_fallback()
+            return None
+    
+    def _generate_json(self, prompt):
+        """Consulta al proveedor esperando un objeto JSON"""
+        return parse_json_content(self._generate_text(prompt, json_mode=True))
+    
+    def _chat_prompt(self, message, user_role, user_name):
+        return f"Usuario: {user_name} (rol: {user_role}).\nMensaje: {message}"
+    
     def generate_response(self, message, user_role, user_name):
         """Genera respuesta contextual basada en el rol del usuario"""
-        message_lower = message.lower()
+        generated = self._generate_text(self._chat_prompt(message, user_role, user_name))
+        if generated:
+            return generated
+        
+        return self._template_response(message, user_role, user_name)
+    
+    def generate_response_stream(self, message, user_role, user_name):
+        """
+        Genera la respuesta por fragmentos a medida que se produce.
+        Si el proveedor falla antes del primer fragmento se usan las plantillas;
+        un fallo a mitad de la respuesta se propaga al llamador.
+        """
+        started = False
+        try:
+            chunks = self.provider.stream(self._messages(self._chat_prompt(message, user_role, user_name)))
+            if chunks is not None:
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+                if started:
+                    return
+        except ProviderError as e:
+            if started:
+                raise
+            logger.warning('Proveedor de IA no disponible, se usan plantillas: %s', e)
+        
+        # Las plantillas se envían línea a línea
+        for line in self._template_response(message, user_role, user_name).splitlines(keepends=True):
+            yield line
+    
+    def _template_response(self, message, user_role, user_name):
+        """Respuesta por plantillas según palabras clave y rol"""
+        # Una sola pasada sobre el mensaje para detectar la intención
+        intent = intent_matcher.match(message, user_role)
         
-        # Respuestas específicas por palabras clave
-        if any(word in message_lower for word in ['hola', 'hello', 'hi', 'buenos días', 'buenas tardes']):
+        if intent == 'greeting':
             return self._get_greeting_response(user_role, user_name)
         
         if user_role == 'profesor':
-            return self._generate_professor_response(message_lower, user_name)
+            return self._generate_professor_response(intent, user_name)
         elif user_role == 'estudiante':
-            return self._generate_student_response(message_lower, user_name)
+            return self._generate_student_response(intent, user_name)
         elif user_role == 'administrador':
-            return self._generate_admin_response(message_lower, user_name)
+            return self._generate_admin_response(intent, user_name)
         
         return self._generate_generic_response(message, user_name)
     
@@ -52,44 +148,44 @@ class AIService:
         greeting = templates.get('greeting', f"¡Hola, {user_name}! ¿En qué puedo ayudarte?")
         return greeting.format(name=user_name)
     
-    def _generate_professor_response(self, message, user_name):
+    def _generate_professor_response(self, intent, user_name):
         """Genera respuestas específicas para profesores"""
-        if any(word in message for word in ['presentación', 'presentation', 'slides']):
+        if intent == 'presentation':
             return f"¡Perfecto, {user_name}! Puedo ayudarte a crear una presentación profesional. Para generar contenido personalizado, necesito conocer:\n\n• El tema principal de la presentación\n• La audiencia objetivo (estudiantes, colegas, etc.)\n• La duración deseada\n• El estilo preferido (académico, profesional, moderno)\n\n¿Podrías proporcionarme estos detalles?"
         
-        elif any(word in message for word in ['cuestionario', 'quiz', 'examen', 'evaluación']):
+        elif intent == 'quiz':
             return f"Excelente idea, {user_name}. Puedo generar cuestionarios personalizados para evaluar a tus estudiantes. Puedo crear:\n\n• Preguntas de opción múltiple\n• Preguntas de verdadero/falso\n• Preguntas de respuesta corta\n• Preguntas de ensayo\n\n¿Sobre qué tema te gustaría crear el cuestionario y qué nivel de dificultad prefieres?"
         
-        elif any(word in message for word in ['clase', 'planificar', 'lesson', 'plan']):
+        elif intent == 'planning':
             return f"Te ayudo a planificar tu clase, {user_name}. Para crear un plan efectivo, considera:\n\n• Objetivos de aprendizaje claros\n• Actividades interactivas\n• Recursos multimedia\n• Evaluación formativa\n• Tiempo para preguntas\n\n¿Cuál es el tema de la clase que quieres planificar?"
         
-        elif any(word in message for word in ['investigación', 'research', 'paper', 'artículo']):
+        elif intent == 'research':
             return f"Como investigador, {user_name}, puedo asistirte con:\n\n• Revisión de literatura\n• Diseño de metodología\n• Análisis de datos\n• Estructura de papers\n• Citas y referencias\n\n¿En qué aspecto específico de tu investigación necesitas apoyo?"
         
         return f"Entiendo tu consulta, {user_name}. Como profesor, puedo ayudarte con creación de contenido educativo, planificación de clases, generación de evaluaciones y apoyo en investigación. ¿Podrías ser más específico sobre lo que necesitas?"
     
-    def _generate_student_response(self, message, user_name):
+    def _generate_student_response(self, intent, user_name):
         """Genera respuestas específicas para estudiantes"""
-        if any(word in message for word in ['explicar', 'explain', 'entender', 'understand', 'concepto']):
+        if intent == 'explanation':
             return f"¡Por supuesto, {user_name}! Me encanta explicar conceptos. Para darte la mejor explicación posible:\n\n• Dime qué concepto específico quieres que explique\n• Indica la materia o área de estudio\n• Menciona tu nivel actual de conocimiento\n\nAsí podré adaptar mi explicación a tu nivel y estilo de aprendizaje."
         
-        elif any(word in message for word in ['ejercicio', 'problema', 'tarea', 'homework']):
+        elif intent == 'homework':
             return f"Te ayudo a resolver ejercicios paso a paso, {user_name}. Para darte la mejor asistencia:\n\n• Comparte el enunciado completo del problema\n• Indica la materia (matemáticas, física, química, etc.)\n• Dime qué parte específica te está causando dificultad\n\nTe guiaré a través de la solución de manera didáctica."
         
-        elif any(word in message for word in ['examen', 'exam', 'estudiar', 'study', 'repasar']):
+        elif intent == 'exam':
             return f"¡Perfecto, {user_name}! Te ayudo a prepararte para tu examen. Puedo:\n\n• Crear un plan de estudio personalizado\n• Generar preguntas de práctica\n• Resumir material extenso\n• Sugerir técnicas de memorización\n• Organizar sesiones de repaso\n\n¿De qué materia es tu examen y cuánto tiempo tienes para prepararte?"
         
-        elif any(word in message for word in ['resumir', 'summary', 'resumen', 'material']):
+        elif intent == 'summary':
             return f"Claro, {user_name}. Puedo resumir material de estudio para ti. Los resúmenes incluyen:\n\n• Puntos clave del contenido\n• Conceptos principales\n• Ejemplos importantes\n• Conexiones entre ideas\n\n¿Qué material específico te gustaría que resuma?"
         
         return f"Entiendo tu consulta, {user_name}. Como tu tutor virtual, puedo explicarte conceptos, ayudarte con ejercicios, crear planes de estudio y resumir material. ¿En qué tema específico necesitas ayuda?"
     
-    def _generate_admin_response(self, message, user_name):
+    def _generate_admin_response(self, intent, user_name):
         """Genera respuestas específicas para administradores"""
-        if any(word in message for word in ['estadísticas', 'stats', 'analytics', 'datos']):
+        if intent == 'analytics':
             return f"Perfecto, {user_name}. Puedo generar análisis detallados del sistema:\n\n• Estadísticas de usuarios activos\n• Rendimiento de la plataforma\n• Uso de recursos\n• Patrones de actividad\n• Reportes de engagement\n\n¿Qué tipo de análisis específico necesitas?"
         
-        elif any(word in message for word in ['usuarios', 'users', 'gestión', 'management']):
+        elif intent == 'management':
             return f"Te asisto con la gestión de usuarios, {user_name}:\n\n• Análisis de comportamiento de usuarios\n• Segmentación por roles\n• Identificación de usuarios inactivos\n• Recomendaciones de engagement\n\n¿Qué aspecto específico de la gestión de usuarios te interesa?"
         
         return f"Como administrador, {user_name}, puedo ayudarte con análisis de datos, gestión de usuarios, optimización del sistema y generación de reportes. ¿Qué necesitas específicamente?"
@@ -104,11 +200,9 @@ class AIService:
         ]
         return random.choice(responses)
     
+    @cached_generation('generate_presentation')
     def generate_presentation(self, title, topic, duration, audience, style):
         """Genera estructura de presentación con IA"""
-        # Simular tiempo de procesamiento
-        time.sleep(2)
-        
         # Determinar número de slides basado en duración
         duration_minutes = int(duration.split()[0])
         slides_count = max(5, duration_minutes // 3)  # Aproximadamente 3 minutos por slide
@@ -158,6 +252,16 @@ class AIService:
             
             presentation['slides'].append(slide)
         
+        generated = self._generate_json(
+            f"Genera una presentación de {slides_count} diapositivas titulada '{title}' sobre {topic}, "
+            f"para {audience}, con estilo {style} y duración de {duration}. Responde con un objeto JSON "
+            "con la clave 'slides': lista de objetos con 'id', 'type' (title, content o conclusion), "
+            "'title', 'content' y 'notes'."
+        )
+        if generated and isinstance(generated.get('slides'), list) and generated['slides']:
+            presentation['slides'] = generated['slides']
+            presentation['slides_count'] = len(generated['slides'])
+        
         return presentation
     
     def _get_slide_templates(self, topic, audience, style):
@@ -200,10 +304,9 @@ class AIService:
 
 ¿Preguntas o comentarios?"""
     
+    @cached_generation('generate_quiz')
     def generate_quiz(self, topic, difficulty, question_count, question_type):
         """Genera cuestionario con IA"""
-        time.sleep(1.5)
-        
         quiz = {
             'topic': topic,
             'difficulty': difficulty,
@@ -225,6 +328,15 @@ class AIService:
             
             quiz['questions'].append(question)
         
+        generated = self._generate_json(
+            f"Genera un cuestionario de {question_count} preguntas de tipo {question_type} sobre {topic} "
+            f"con dificultad {difficulty}. Responde con un objeto JSON con la clave 'questions': lista de "
+            "objetos con 'id', 'type', 'question', 'options' (si aplica), 'correct_answer', "
+            "'explanation' y 'points'."
+        )
+        if generated and isinstance(generated.get('questions'), list) and generated['questions']:
+            quiz['questions'] = generated['questions']
+        
         return quiz
     
     def _generate_multiple_choice_question(self, topic, difficulty, number):
@@ -308,9 +420,15 @@ class AIService:
             'points': 25 if difficulty == 'easy' else 35 if difficulty == 'medium' else 50
         }
     
+    @cached_generation('explain_concept')
     def explain_concept(self, concept, subject, level, user_role):
         """Explica un concepto académico"""
-        time.sleep(1)
+        generated = self._generate_text(
+            f"Explica el concepto '{concept}' de {subject or 'su área'} para un nivel {level}. "
+            f"El usuario es {user_role}. Usa definición, ejemplos y puntos clave en Markdown."
+        )
+        if generated:
+            return generated
         
         explanations = {
             'beginner': f"""
@@ -382,9 +500,15 @@ Imagina que {concept} es como [analogía simple y relatable].
         
         return explanations.get(level, explanations['intermediate'])
     
+    @cached_generation('solve_problem')
     def solve_problem(self, problem, subject, user_role):
         """Resuelve un problema paso a paso"""
-        time.sleep(2)
+        generated = self._generate_text(
+            f"Resuelve paso a paso el siguiente problema de {subject or 'su área'} para un {user_role}, "
+            f"explicando cada paso y verificando el resultado:\n\n{problem}"
+        )
+        if generated:
+            return generated
         
         return f"""
 **Problema:** {problem}
@@ -422,10 +546,9 @@ Imagina que {concept} es como [analogía simple y relatable].
 ¿Te gustaría que profundice en algún paso específico?
 """
     
+    @cached_generation('generate_study_plan')
     def generate_study_plan(self, subject, duration, goals, current_level, available_time):
         """Genera plan de estudio personalizado"""
-        time.sleep(1.5)
-        
         # Calcular distribución de tiempo
         total_days = self._parse_duration(duration)
         daily_hours = self._parse_time(available_time)
@@ -492,6 +615,14 @@ Imagina que {concept} es como [analogía simple y relatable].
         # Generar cronograma semanal
         plan['weekly_schedule'] = self._generate_weekly_schedule(daily_hours, subject)
         
+        generated = self._generate_json(
+            f"Crea un plan de estudio de {subject} para {total_days} días con {daily_hours} horas diarias. "
+            f"Nivel actual: {current_level}. Objetivos: {goals}. Responde con un objeto JSON con la clave "
+            "'phases': lista de objetos con 'name', 'duration_days', 'objectives' y 'activities'."
+        )
+        if generated and isinstance(generated.get('phases'), list) and generated['phases']:
+            plan['phases'] = generated['phases']
+        
         return plan
     
     def _parse_duration(self, duration):
@@ -538,9 +669,15 @@ Imagina que {concept} es como [analogía simple y relatable].
         
         return schedule
     
+    @cached_generation('provide_research_assistance')
     def provide_research_assistance(self, research_topic, assistance_type, academic_level, field_of_study):
         """Proporciona asistencia en investigación"""
-        time.sleep(2)
+        generated = self._generate_text(
+            f"Brinda asistencia de tipo '{assistance_type}' para la investigación '{research_topic}' "
+            f"en {field_of_study or 'su campo'}, a nivel {academic_level}. Usa Markdown."
+        )
+        if generated:
+            return generated
         
         assistance_types = {
             'literature_review': f"""
@@ -649,10 +786,9 @@ Imagina que {concept} es como [analogía simple y relatable].
         
         return assistance_types.get(assistance_type, "Tipo de asistencia no reconocido")
     
+    @cached_generation('provide_feedback')
     def provide_feedback(self, content, content_type, criteria, academic_level):
         """Proporciona retroalimentación sobre trabajo académico"""
-        time.sleep(1.5)
-        
         feedback = {
             'content_type': content_type,
             'academic_level': academic_level,
@@ -708,5 +844,16 @@ Imagina que {concept} es como [analogía simple y relatable].
 • Considera recursos adicionales de escritura académica
 """
         
+        generated = self._generate_json(
+            f"Evalúa el siguiente trabajo de tipo {content_type} a nivel {academic_level}"
+            f"{' con los criterios ' + ', '.join(map(str, criteria)) if criteria else ''}. Responde con un "
+            "objeto JSON con 'overall_score' (0-100), 'detailed_feedback' (objeto de criterios con "
+            "'score', 'comments' y 'suggestions') y 'general_comments' (Markdown).\n\n" + content
+        )
+        if generated and generated.get('general_comments'):
+            for key in ('overall_score', 'detailed_feedback', 'general_comments'):
+                if key in generated:
+                    feedback[key] = generated[key]
+        
         return feedback
 
@@ -0,0 +1,99 @@
+"""
+Servidor local y determinista que imita la API de chat completions.
+Sirve para desarrollo y pruebas del HTTPProvider sin salir a internet:
+
+    python -m services.ai_stub_server --port 8765
+    AI_PROVIDER=http AI_PROVIDER_URL=http://127.0.0.1:8765/v1 gunicorn app:app
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_completion(messages, json_mode=False):
+    """Genera siempre la misma respuesta para los mismos mensajes"""
+    prompt = messages[-1]['content'] if messages else ''
+    digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]
+
+    if json_mode:
+        return json.dumps({'stub': True, 'digest': digest})
+    return f"[stub {digest}] Respuesta generada para: {prompt[:200]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': 'invalid json'})
+            return
+
+        json_mode = (payload.get('response_format') or {}).get('type') == 'json_object'
+        content = stub_completion(payload.get('messages', []), json_mode)
+        if payload.get('stream'):
+            self._send_stream(content)
+            return
+
+        self._send_json(200, {
+            'id': 'stub',
+            'object': 'chat.completion',
+            'model': payload.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }]
+        })
+
+    def _send_stream(self, content):
+        """Envía la respuesta como eventos SSE, una palabra por fragmento"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        for word in re.findall(r'\S+\s*', content):
+            chunk = {'choices': [{'index': 0, 'delta': {'content': word}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host='127.0.0.1', port=0):
+    """Arranca el servidor en un hilo y retorna (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor de IA determinista para pruebas')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Servidor de IA de prueba en http://{args.host}:{args.port}/v1")
+    server.serve_forever()
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """
+    Almacén de archivos direccionado por contenido.
+
+    Cada archivo se guarda una sola vez en `root/ab/cd/<sha256>`, así que dos
+    subidas con el mismo nombre no se pisan y dos subidas idénticas comparten
+    el mismo archivo. Junto al archivo se pueden guardar metadatos derivados
+    (p. ej. el texto extraído de un .pptx) en `<sha256>.<nombre>.json`.
+
+    El hash se calcula mientras se lee el archivo, por bloques; nunca se
+    carga completo en memoria. La escritura final es atómica (os.replace),
+    de modo que nunca se ve un archivo a medio escribir.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path_for(digest))
+
+    def save(self, stream):
+        """
+        Guarda el contenido de `stream` y retorna (digest, tamaño, creado).
+        Si el stream admite seek (las subidas de werkzeug ya están en un
+        archivo temporal) primero se calcula el hash y, si el archivo ya
+        existe, no se escribe nada en disco.
+        """
+        if _seekable(stream):
+            start = stream.tell()
+            digest, size = _hash_stream(stream)
+            if self.exists(digest):
+                return digest, size, False
+            stream.seek(start)
+            return self._write_new(stream, digest), size, True
+
+        # Stream de una sola pasada: se escribe a un temporal mientras se calcula el hash
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+            created = self.commit_file(tmp_path, digest)
+        except BaseException:
+            _remove_quietly(tmp_path)
+            raise
+        return digest, size, created
+
+    def commit_file(self, tmp_path, digest):
+        """
+        Mueve un archivo temporal (dentro de root) a su ubicación definitiva.
+        Retorna False si el contenido ya existía (el temporal se descarta).
+        """
+        final_path = self.path_for(digest)
+        if os.path.exists(final_path):
+            _remove_quietly(tmp_path)
+            return False
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        return True
+
+    def _write_new(self, stream, digest):
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                shutil.copyfileobj(stream, tmp, CHUNK_SIZE)
+            self.commit_file(tmp_path, digest)
+        except BaseException:
+            _remove_quietly(tmp_path)
+            raise
+        return digest
+
+    def read_meta(self, digest, name):
+        """Metadatos derivados guardados junto al archivo, o None"""
+        try:
+            with open(f'{self.path_for(digest)}.{name}.json', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_meta(self, digest, name, data):
+        meta_path = f'{self.path_for(digest)}.{name}.json'
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+                json.dump(data, tmp, ensure_ascii=False)
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            os.replace(tmp_path, meta_path)
+        except BaseException:
+            _remove_quietly(tmp_path)
+            raise
+
+
+def _seekable(stream):
+    try:
+        return stream.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _hash_stream(stream):
+    hasher = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        hasher.update(chunk)
+        size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+blob_store = BlobStore(os.getenv('BLOB_STORE_PATH', os.path.join('uploads', 'blobs')))
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+
+from services.migrations import run_migrations
+
+try:
+    import fcntl
+except ImportError:  # Windows: no hay bloqueo entre procesos, se confía en la idempotencia
+    fcntl = None
+
+DEMO_USERS = [
+    {
+        'email': 'admin@henry.edu',
+        'full_name': 'Mario Carbonó Administrador',
+        'role': 'administrador'
+    },
+    {
+        'email': 'profesor@henry.edu',
+        'full_name': 'Dr. Mario Carbonó',
+        'role': 'profesor'
+    },
+    {
+        'email': 'estudiante@henry.edu',
+        'full_name': 'Raquel Toloza',
+        'role': 'estudiante'
+    }
+]
+DEMO_PASSWORD = 'demo123'
+
+
+@contextmanager
+def _file_lock(lock_path):
+    """Bloqueo exclusivo entre procesos (workers de gunicorn) sobre un archivo"""
+    with open(lock_path, 'a+') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield lock_file
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _deployment_stamp(app):
+    """Identifica el despliegue actual: base de datos + proceso maestro"""
+    db_url = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+    db_hash = hashlib.sha256(db_url.encode('utf-8')).hexdigest()[:16]
+    return f"{db_hash}:{os.getppid()}"
+
+
+def seed_demo_users():
+    """Crea los usuarios de demostración que falten con una sola consulta"""
+    from app import db
+    from models.user import User
+
+    emails = [u['email'] for u in DEMO_USERS]
+    existing = {
+        email for (email,) in db.session.query(User.email).filter(User.email.in_(emails))
+    }
+    missing = [u for u in DEMO_USERS if u['email'] not in existing]
+    if not missing:
+        return 0
+
+    # Todos comparten contraseña: se calcula el hash una sola vez
+    from services.password_hasher import password_hasher
+    password_hash = password_hasher.hash(DEMO_PASSWORD)
+    for user_data in missing:
+        db.session.add(User(password_hash=password_hash, **user_data))
+    db.session.commit()
+    return len(missing)
+
+
+def bootstrap_database(app, force=False):
+    """
+    Crea el esquema, aplica las migraciones pendientes y crea los usuarios de
+    demostración, una única vez por despliegue.
+    Los workers de gunicorn se serializan con un bloqueo de archivo; el primero
+    hace el trabajo y deja una marca para que los demás lo omitan.
+    """
+    from app import db
+
+    lock_path = app.config.get('BOOTSTRAP_LOCK_FILE') or os.path.join(
+        tempfile.gettempdir(), 'henry-bootstrap.lock'
+    )
+    stamp = _deployment_stamp(app)
+
+    with _file_lock(lock_path) as lock_file:
+        lock_file.seek(0)
+        if not force and lock_file.read().strip() == stamp:
+            return False
+
+        with app.app_context():
+            db.create_all()
+            run_migrations(db.engine)
+            seed_demo_users()
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(stamp)
+        lock_file.flush()
+
+    return True
@@ -0,0 +1,162 @@
+"""
+Subidas por fragmentos reanudables.
+
+Cada fragmento se recibe en un temporal propio, leyendo el cuerpo de la
+petición por bloques y calculando su SHA-256; solo si el tamaño y el hash
+coinciden se copia al archivo de staging de la sesión (en la posición
+chunk_index * chunk_size). Un reenvío rechazado nunca altera lo ya
+recibido. La memoria usada no depende del tamaño del archivo ni del
+fragmento.
+
+Al completar se vuelve a leer el staging comprobando el hash de cada
+fragmento y el del archivo completo; solo entonces se mueve al almacén
+por contenido, sin copiarlo. Si algo no coincide la sesión sigue abierta.
+La ruta reclama la sesión ('completing') antes de llamar a finalize, así
+que nunca hay dos finalize del mismo staging a la vez.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from services.blob_store import blob_store
+
+READ_SIZE = 64 * 1024
+
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.getenv('MATERIAL_MAX_UPLOAD_SIZE', str(5 * 1024 ** 3)))
+
+
+class ChunkError(ValueError):
+    """El fragmento recibido no coincide con lo esperado"""
+
+
+class UploadVerificationError(ValueError):
+    """
+    El archivo ensamblado no coincide con lo esperado. `bad_chunks` son los
+    fragmentos cuyo contenido en el staging no coincide con su hash y hay
+    que volver a enviar.
+    """
+
+    def __init__(self, message, bad_chunks=()):
+        super().__init__(message)
+        self.bad_chunks = list(bad_chunks)
+
+
+def staging_path(session_id):
+    return os.path.join(blob_store.tmp_dir, f'upload-{session_id}')
+
+
+def create_staging_file(session_id, total_size):
+    """Crea el archivo de staging con su tamaño final (disperso si el sistema lo permite)"""
+    with open(staging_path(session_id), 'wb') as f:
+        f.truncate(total_size)
+
+
+def write_chunk(session_id, offset, stream, expected_size, expected_sha256):
+    """
+    Recibe `stream` en un temporal calculando el SHA-256 y, si el tamaño y el
+    hash coinciden, lo copia al staging a partir de `offset`. Lanza
+    ChunkError si no coinciden; el staging queda intacto.
+    """
+    hasher = hashlib.sha256()
+    written = 0
+    fd, tmp_path = tempfile.mkstemp(dir=blob_store.tmp_dir, prefix=f'chunk-{session_id}-')
+    try:
+        with os.fdopen(fd, 'w+b') as tmp:
+            while True:
+                block = stream.read(READ_SIZE)
+                if not block:
+                    break
+                written += len(block)
+                if written > expected_size:
+                    raise ChunkError(f'El fragmento supera los {expected_size} bytes esperados')
+                hasher.update(block)
+                tmp.write(block)
+
+            if written != expected_size:
+                raise ChunkError(f'Se recibieron {written} bytes; se esperaban {expected_size}')
+            digest = hasher.hexdigest()
+            if expected_sha256 and digest != expected_sha256.lower():
+                raise ChunkError('El SHA-256 del fragmento no coincide')
+
+            tmp.seek(0)
+            with open(staging_path(session_id), 'r+b') as f:
+                f.seek(offset)
+                shutil.copyfileobj(tmp, f, READ_SIZE)
+    finally:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return digest
+
+
+def finalize(session_id, chunk_size, chunk_hashes, expected_sha256=None):
+    """
+    Verifica el staging contra los hashes de cada fragmento (`chunk_hashes`,
+    {índice: sha256}) y, si se indica, contra el SHA-256 del archivo
+    completo; luego lo mueve al almacén y retorna el digest. Si algo no
+    coincide lanza UploadVerificationError sin tocar el staging.
+    """
+    path = staging_path(session_id)
+    hasher = hashlib.sha256()
+    bad_chunks = []
+    with open(path, 'rb') as f:
+        index = 0
+        while True:
+            chunk_hasher = hashlib.sha256()
+            remaining = chunk_size
+            while remaining:
+                block = f.read(min(READ_SIZE, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                chunk_hasher.update(block)
+                hasher.update(block)
+            if remaining == chunk_size:
+                break
+            if chunk_hashes.get(index) != chunk_hasher.hexdigest():
+                bad_chunks.append(index)
+            index += 1
+
+    if bad_chunks:
+        raise UploadVerificationError('Hay fragmentos dañados; vuelve a enviarlos', bad_chunks)
+    digest = hasher.hexdigest()
+    if expected_sha256 and expected_sha256.lower() != digest:
+        raise UploadVerificationError('El SHA-256 del archivo no coincide')
+
+    blob_store.commit_file(path, digest)
+    return digest
+
+
+def discard(session_id):
+    try:
+        os.remove(staging_path(session_id))
+    except OSError:
+        pass
+
+
+def purge_stale_sessions(max_age_hours):
+    """
+    Elimina las sesiones sin completar más antiguas que `max_age_hours` y su
+    staging, incluidas las que quedaron en 'completing' porque el worker se
+    cayó a mitad del complete.
+    """
+    from datetime import datetime, timedelta
+    from app import db
+    from models.upload_session import UploadSession
+
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    stale = UploadSession.query.filter(
+        UploadSession.status.in_(('uploading', 'completing')),
+        UploadSession.updated_at < cutoff
+    ).all()
+    for session in stale:
+        discard(session.id)
+        db.session.delete(session)
+    if stale:
+        db.session.commit()
+    return len(stale)
@@ -0,0 +1,151 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import func, update
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """
+    Contadores con escritura diferida (descargas, visualizaciones).
+
+    Los incrementos se acumulan en memoria por (tabla, columna, id) y se
+    vuelcan en lote con `UPDATE tabla SET col = col + n WHERE id IN (...)`,
+    una sentencia por cada valor distinto de n. El incremento lo resuelve la
+    base de datos, así que varios workers pueden volcar a la vez sin perder
+    actualizaciones.
+
+    Se vuelca cada `flush_interval` segundos, al acumular `max_pending`
+    incrementos y al terminar el proceso; si el proceso muere de golpe se
+    pierden como máximo esos incrementos. Con flush_interval=0 cada
+    incremento se escribe de inmediato. Las lecturas solo ven lo ya volcado
+    (con hasta `flush_interval` segundos de retraso), igual en todos los
+    workers; así el ETag de un recurso no depende del worker que responde.
+
+    Si el volcado falla (base de datos caída) los incrementos vuelven al
+    buffer y los reintentos se espacian (backoff exponencial hasta
+    `max_backoff` segundos); mientras tanto increment() no intenta volcar.
+    El buffer no crece sin límite: como mucho `max_keys` filas distintas;
+    los incrementos de filas nuevas por encima de ese límite se descartan
+    y se registran en el log.
+    """
+
+    def __init__(self, flush_interval=5.0, max_pending=1000, max_keys=10000, max_backoff=60.0):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_keys = max_keys
+        self.max_backoff = max_backoff
+        self.dropped = 0
+        self._app = None
+        self._pending = defaultdict(int)
+        self._pending_total = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._tables = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self._app = app
+        atexit.register(self.flush, force=True)
+
+    def increment(self, model, column, pk, amount=1):
+        table = model.__table__
+        key = (table.name, column, pk)
+        with self._lock:
+            self._tables[table.name] = table
+            if not self._add(key, amount):
+                return
+            full = self._pending_total >= self.max_pending
+
+        if self.flush_interval <= 0 or full:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def _add(self, key, amount):
+        """Suma al buffer (con self._lock tomado); False si se descartó por estar lleno"""
+        if key not in self._pending and len(self._pending) >= self.max_keys:
+            self.dropped += amount
+            if self.dropped == amount or self.dropped % 1000 < amount:
+                logger.error('Buffer de contadores lleno (%s filas); %s incrementos descartados',
+                             self.max_keys, self.dropped)
+            return False
+        self._pending[key] += amount
+        self._pending_total += amount
+        return True
+
+    def flush(self, force=False):
+        """
+        Escribe los incrementos acumulados; retorna cuántas filas se actualizaron.
+        Tras un fallo no vuelve a intentarlo hasta que pase el backoff (salvo `force`).
+        """
+        if not force and time.monotonic() < self._retry_at:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = defaultdict(int)
+                self._pending_total = 0
+
+            # {(tabla, columna, n): [ids]}
+            groups = defaultdict(list)
+            for (table_name, column, pk), amount in batch.items():
+                groups[(table_name, column, amount)].append(pk)
+
+            try:
+                with self._app.app_context():
+                    from app import db
+                    with db.engine.begin() as conn:
+                        for (table_name, column, amount), ids in groups.items():
+                            table = self._tables[table_name]
+                            conn.execute(
+                                update(table)
+                                .where(table.c.id.in_(ids))
+                                .values({column: func.coalesce(table.c[column], 0) + amount})
+                            )
+            except Exception:
+                self._failures += 1
+                backoff = min(self.max_backoff, max(self.flush_interval, 1.0) * 2 ** (self._failures - 1))
+                self._retry_at = time.monotonic() + backoff
+                logger.exception('Error al volcar los contadores; se reintentará en %.0f s', backoff)
+                with self._lock:
+                    for key, amount in batch.items():
+                        self._add(key, amount)
+                return 0
+
+            self._failures = 0
+            self._retry_at = 0.0
+            return len(batch)
+
+    def _ensure_flusher(self):
+        # Un hilo por proceso: tras un fork (gunicorn --preload) se crea de nuevo
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='henry-counters', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+counters = CounterBuffer(
+    flush_interval=float(os.getenv('COUNTER_FLUSH_INTERVAL', '5')),
+    max_pending=int(os.getenv('COUNTER_MAX_PENDING', '1000')),
+    max_keys=int(os.getenv('COUNTER_MAX_KEYS', '10000'))
+)
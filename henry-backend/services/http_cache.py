@@ -0,0 +1,44 @@
+"""
+Respuestas JSON con ETag para los GET que el frontend consulta una y otra vez.
+
+El ETag se calcula a partir de una "versión" barata del recurso (updated_at,
+contadores, conteos de filas hijas...) y no del cuerpo de la respuesta, así
+que si el cliente ya tiene esa versión (If-None-Match) se responde 304 sin
+construir ni serializar el JSON.
+"""
+import hashlib
+import json
+
+from flask import current_app, jsonify, request
+
+# Incrementar si cambia el formato de las respuestas cacheadas
+ETAG_VERSION = '1'
+
+# Recursos por usuario: el navegador los guarda pero debe revalidarlos siempre
+PRIVATE_REVALIDATE = 'private, no-cache'
+
+
+def make_etag(*parts):
+    """ETag fuerte a partir de los valores que identifican la versión del recurso"""
+    raw = json.dumps([ETAG_VERSION, *parts], default=str, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def cached_json(version, build, cache_control=PRIVATE_REVALIDATE):
+    """
+    Responde con el JSON de `build()` (que retorna (payload, status)) o con
+    304 si el If-None-Match del cliente coincide con `version`.
+    `version` es una tupla de valores o un ETag ya calculado con make_etag.
+    """
+    etag = version if isinstance(version, str) else make_etag(*version)
+
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        payload, status = build()
+        response = jsonify(payload)
+        response.status_code = status
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
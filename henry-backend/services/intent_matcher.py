@@ -0,0 +1,61 @@
+import re
+import unicodedata
+
+# Letras acentuadas habituales en español; str.replace es mucho más rápido que NFD
+_ACCENTS = tuple(zip('áéíóúüñàèìòùâêîôûç', 'aeiouunaeiouaeiouc'))
+
+
+def normalize_text(text):
+    """Minúsculas y sin tildes: 'Evaluación' -> 'evaluacion'"""
+    text = text.casefold()
+    if text.isascii():
+        return text
+
+    for accented, plain in _ACCENTS:
+        if accented in text:
+            text = text.replace(accented, plain)
+    if text.isascii():
+        return text
+
+    # Otros caracteres: separar las tildes de su letra y descartar lo que no sea ASCII
+    return unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+class IntentMatcher:
+    """
+    Clasificador de intenciones por palabras clave, construido una sola vez.
+    Las palabras clave se normalizan (sin tildes ni mayúsculas) y cada
+    intención se compila en una sola expresión regular con la alternancia de
+    sus palabras; las tablas por rol guardan esas expresiones en orden de
+    prioridad. Cada mensaje se normaliza una vez y se recorre con una
+    búsqueda por intención, en lugar de una por palabra clave.
+    """
+
+    def __init__(self, common_intents, role_intents):
+        """
+        common_intents: [(intención, [palabras])] válidas para todos los roles.
+        role_intents: {rol: [(intención, [palabras])]} en orden de prioridad.
+        """
+        self._tables = {
+            role: self._compile(common_intents + intents)
+            for role, intents in role_intents.items()
+        }
+        self._tables[None] = self._compile(common_intents)
+
+    @staticmethod
+    def _compile(intents):
+        table = []
+        for intent, keywords in intents:
+            words = dict.fromkeys(normalize_text(k) for k in keywords)
+            # Las más largas primero, por si una contiene a otra
+            pattern = '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+            table.append((intent, re.compile(pattern)))
+        return tuple(table)
+
+    def match(self, message, role=None):
+        """Retorna la intención de mayor prioridad presente en el mensaje, o None"""
+        text = normalize_text(message)
+        for intent, pattern in self._tables.get(role, self._tables[None]):
+            if pattern.search(text):
+                return intent
+        return None
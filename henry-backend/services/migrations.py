@@ -0,0 +1,195 @@
+"""
+Migraciones de esquema versionadas.
+
+db.create_all() crea las tablas que faltan pero no modifica las existentes
+(no agrega índices ni columnas nuevas). Cada migración es una función que
+recibe la conexión y se aplica una sola vez; las versiones aplicadas quedan
+en la tabla schema_migrations. Las sentencias son idempotentes para que una
+base recién creada con create_all() (que ya tiene el esquema actual) pueda
+registrar las migraciones sin error.
+
+Para agregar una migración: escribir la función y añadirla al final de
+MIGRATIONS con la siguiente versión. Nunca modificar una ya publicada.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+def _create_indexes(conn, indexes):
+    for name, table, columns in indexes:
+        conn.execute(text(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'
+        ))
+
+
+def _0001_hot_filter_indexes(conn):
+    """Índices para las columnas por las que filtran los listados y conteos"""
+    _create_indexes(conn, [
+        ('ix_users_role_is_active', 'users', ['role', 'is_active']),
+        ('ix_classes_professor_id', 'classes', ['professor_id']),
+        ('ix_classes_status', 'classes', ['status']),
+        ('ix_materials_class_id', 'materials', ['class_id']),
+        ('ix_materials_is_public', 'materials', ['is_public']),
+        ('ix_materials_uploaded_by', 'materials', ['uploaded_by']),
+        ('ix_assignments_class_id', 'assignments', ['class_id']),
+        ('ix_assignments_professor_id', 'assignments', ['professor_id']),
+        ('ix_assignments_status', 'assignments', ['status']),
+        ('ix_submissions_assignment_student', 'submissions', ['assignment_id', 'student_id']),
+        ('ix_submissions_student_id', 'submissions', ['student_id']),
+        ('ix_presentations_author_id', 'presentations', ['author_id']),
+    ])
+
+
+def _add_column(conn, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN solo si la columna no existe"""
+    existing = {c['name'] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+
+def _0002_presentation_progress(conn):
+    """Avance y error del procesamiento en segundo plano de los .pptx"""
+    _add_column(conn, 'presentations', 'progress', 'INTEGER DEFAULT 0')
+    _add_column(conn, 'presentations', 'error', 'VARCHAR(255)')
+
+
+def _0003_material_file_hash(conn):
+    """Hash del archivo de cada material en el almacén por contenido"""
+    _add_column(conn, 'materials', 'file_hash', 'VARCHAR(64)')
+    _create_indexes(conn, [('ix_materials_file_hash', 'materials', ['file_hash'])])
+
+
+def _0004_user_last_login(conn):
+    """Último inicio de sesión e índices para las series de altas y actividad"""
+    _add_column(conn, 'users', 'last_login_at', 'TIMESTAMP')
+    _create_indexes(conn, [
+        ('ix_users_created_at', 'users', ['created_at']),
+        ('ix_users_last_login_at', 'users', ['last_login_at']),
+    ])
+
+
+def _0005_enrolled_count_from_enrollments(conn):
+    """
+    Alinea classes.enrolled_count con las filas de enrollments, solo en las
+    clases que ya tienen inscripciones registradas. Las demás conservan el
+    contador anterior a la tabla enrollments: ponerlo en 0 liberaría cupos
+    ocupados por estudiantes reales. Las estadísticas por profesor se
+    descartan para que se recalculen al leerlas.
+    """
+    conn.execute(text(
+        'UPDATE classes SET enrolled_count = '
+        '(SELECT COUNT(*) FROM enrollments WHERE enrollments.class_id = classes.id) '
+        'WHERE EXISTS (SELECT 1 FROM enrollments WHERE enrollments.class_id = classes.id)'
+    ))
+    if inspect(conn).has_table('professor_stats'):
+        conn.execute(text('DELETE FROM professor_stats'))
+
+
+def _0006_user_activity_backfill(conn):
+    """
+    Primer día de actividad para la tabla user_activity (creada por
+    create_all): el último inicio de sesión conocido de cada usuario.
+    """
+    if not inspect(conn).has_table('user_activity'):
+        return
+    conn.execute(text(
+        'INSERT INTO user_activity (user_id, day) '
+        'SELECT id, DATE(last_login_at) FROM users WHERE last_login_at IS NOT NULL '
+        'AND NOT EXISTS (SELECT 1 FROM user_activity a WHERE a.user_id = users.id '
+        'AND a.day = DATE(users.last_login_at))'
+    ))
+
+
+def _0007_user_token_version(conn):
+    """Versión de los tokens de cada usuario (cambio de contraseña)"""
+    _add_column(conn, 'users', 'token_version', 'INTEGER NOT NULL DEFAULT 0')
+
+
+MIGRATIONS = [
+    ('0001', _0001_hot_filter_indexes),
+    ('0002', _0002_presentation_progress),
+    ('0003', _0003_material_file_hash),
+    ('0004', _0004_user_last_login),
+    ('0005', _0005_enrolled_count_from_enrollments),
+    ('0006', _0006_user_activity_backfill),
+    ('0007', _0007_user_token_version),
+]
+
+
+def applied_versions(conn):
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        'version VARCHAR(32) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)'
+    ))
+    return {row[0] for row in conn.execute(text('SELECT version FROM schema_migrations'))}
+
+
+def run_migrations(engine):
+    """
+    Aplica las migraciones pendientes, cada una en su propia transacción.
+    Retorna la lista de versiones aplicadas.
+    """
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+
+    applied = []
+    for version, migration in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            migration(conn)
+            conn.execute(
+                text('INSERT INTO schema_migrations (version, applied_at) VALUES (:version, :applied_at)'),
+                {'version': version, 'applied_at': datetime.utcnow()}
+            )
+        logger.info('Migración %s aplicada', version)
+        applied.append(version)
+    return applied
+
+
+# Consultas frecuentes que deben resolverse con un índice (ver check_query_plans)
+HOT_QUERIES = [
+    ('classes por profesor', 'SELECT id FROM classes WHERE professor_id = 1'),
+    ('classes activas', "SELECT id FROM classes WHERE status = 'active'"),
+    ('materiales por clase', 'SELECT id FROM materials WHERE class_id = 1'),
+    ('materiales públicos', 'SELECT id FROM materials WHERE is_public = TRUE'),
+    ('tareas por profesor', 'SELECT id FROM assignments WHERE professor_id = 1'),
+    ('tareas activas', "SELECT id FROM assignments WHERE status = 'active'"),
+    ('intentos de entrega',
+     'SELECT count(*) FROM submissions WHERE assignment_id = 1 AND student_id = 1'),
+    ('entregas por estudiante', 'SELECT id FROM submissions WHERE student_id = 1'),
+    ('presentaciones por autor', 'SELECT id FROM presentations WHERE author_id = 1'),
+    ('usuarios por rol', "SELECT count(*) FROM users WHERE role = 'profesor'"),
+]
+
+
+def check_query_plans(engine):
+    """
+    Ejecuta EXPLAIN sobre HOT_QUERIES y retorna [(nombre, plan)] de las que
+    recorren la tabla completa. En PostgreSQL se desactiva el seq scan para
+    que el planificador no lo prefiera en tablas pequeñas.
+    """
+    failures = []
+    with engine.connect() as conn:
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            conn.execute(text('SET enable_seqscan = off'))
+
+        for name, sql in HOT_QUERIES:
+            if dialect == 'sqlite':
+                plan = '\n'.join(row[-1] for row in conn.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+                full_scan = any(
+                    line.startswith('SCAN') and 'INDEX' not in line
+                    for line in plan.splitlines()
+                )
+            else:
+                plan = '\n'.join(row[0] for row in conn.execute(text(f'EXPLAIN {sql}')))
+                full_scan = 'Seq Scan' in plan
+
+            if full_scan:
+                failures.append((name, plan))
+    return failures
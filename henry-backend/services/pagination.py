@@ -0,0 +1,124 @@
+import os
+from datetime import date, datetime
+
+from sqlalchemy.orm import load_only
+
+DEFAULT_PAGE_SIZE = int(os.getenv('PAGE_DEFAULT_LIMIT', '100'))
+MAX_PAGE_SIZE = int(os.getenv('PAGE_MAX_LIMIT', '500'))
+
+
+class PaginationError(ValueError):
+    """Parámetros de paginación o de proyección inválidos"""
+
+
+class Page:
+    """Resultado de una consulta paginada por cursor (id del último elemento)"""
+
+    def __init__(self, items, limit, next_cursor, fields=None, total=None):
+        self.items = items
+        self.limit = limit
+        self.next_cursor = next_cursor
+        self.fields = fields
+        self.total = total
+
+    def serialize(self, serializer):
+        """
+        Serializa los elementos. Con `fields=` solo se devuelven las columnas
+        pedidas (las únicas cargadas); si no, se usa `serializer(items)`.
+        """
+        if self.fields:
+            return [project(item, self.fields) for item in self.items]
+        return serializer(self.items)
+
+    def meta(self):
+        # 'count' son los elementos de esta página; 'total' solo sin limit/after (ver paginate)
+        meta = {
+            'count': len(self.items),
+            'limit': self.limit,
+            'next_cursor': self.next_cursor,
+            'has_more': self.next_cursor is not None
+        }
+        if self.total is not None:
+            meta['total'] = self.total
+        return meta
+
+
+def parse_page_args(args):
+    """Lee `limit` y `after` de la query string"""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+        after = args.get('after')
+        after = int(after) if after not in (None, '') else None
+    except (TypeError, ValueError):
+        raise PaginationError('Los parámetros limit y after deben ser números enteros')
+
+    if limit < 1:
+        raise PaginationError('El parámetro limit debe ser mayor que 0')
+    return min(limit, MAX_PAGE_SIZE), after
+
+
+def parse_fields(args, model):
+    """
+    Lee `fields=id,name,...` y lo valida contra las columnas del modelo.
+    Retorna una tupla de columnas (siempre incluye id) o None si no se pidió.
+    """
+    raw = args.get('fields')
+    if not raw:
+        return None
+
+    # Las columnas sensibles (p. ej. password_hash) nunca se pueden proyectar
+    hidden = getattr(model, '__hidden_fields__', ())
+    columns = [c for c in model.__table__.columns.keys() if c not in hidden]
+
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        raise PaginationError(f'Campos no válidos: {", ".join(unknown)}')
+
+    return tuple(dict.fromkeys(['id'] + fields))
+
+
+def paginate(query, model, args, eager=()):
+    """
+    Aplica paginación por cursor (keyset) ordenando por la clave primaria:
+    `WHERE id > after ORDER BY id LIMIT n`, que usa el índice de la PK y
+    cuesta lo mismo en la primera página que en la última.
+    `eager` son opciones de carga (joinedload...) que solo se aplican cuando
+    se serializa el objeto completo.
+
+    Sin `limit` ni `after` (los clientes de antes de la paginación, que
+    esperaban la lista completa) se agrega `total` con todas las filas, para
+    que sepan que la respuesta está cortada a DEFAULT_PAGE_SIZE.
+    """
+    limit, after = parse_page_args(args)
+    fields = parse_fields(args, model)
+
+    total = None
+    if 'limit' not in args and 'after' not in args:
+        total = query.order_by(None).count()
+
+    if after is not None:
+        query = query.filter(model.id > after)
+    if fields:
+        query = query.options(load_only(*[getattr(model, f) for f in fields]))
+    elif eager:
+        query = query.options(*eager)
+
+    # Se pide una fila de más para saber si hay otra página
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = rows[-1].id if has_more and rows else None
+
+    return Page(rows, limit, next_cursor, fields, total)
+
+
+def project(obj, fields):
+    """Serializa solo las columnas indicadas"""
+    data = {}
+    for field in fields:
+        value = getattr(obj, field)
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        data[field] = value
+    return data
@@ -0,0 +1,126 @@
+"""
+Hash y verificación de contraseñas.
+
+El algoritmo y su costo se configuran con PASSWORD_HASH_METHOD (cualquier
+método de werkzeug, p. ej. 'scrypt:32768:8:1' o 'pbkdf2:sha256:600000').
+Los hashes guardados con otros parámetros siguen verificándose y se
+recalculan con los nuevos en el siguiente inicio de sesión (needs_rehash).
+
+Con PASSWORD_HASH_PROCESSES > 0 el cálculo se hace en un pool de procesos
+acotado: fuera del GIL del worker y con un máximo de trabajos en espera
+(PASSWORD_HASH_MAX_PENDING). Si se supera, se lanza QueueFullError para
+responder 503 en lugar de acumular peticiones durante una avalancha de
+inicios de sesión.
+
+Los pools de procesos se crean al primer uso, con el contexto 'spawn' (el
+worker de gunicorn ya tiene hilos y un fork podría heredar locks tomados)
+y se cierran al terminar el proceso.
+"""
+import atexit
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from services.task_queue import BoundedTaskQueue
+
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+PASSWORD_HASH_PROCESSES = int(os.getenv('PASSWORD_HASH_PROCESSES', '0'))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))
+# Procesos para las importaciones masivas, por worker de gunicorn (0 = mitad de las CPU, máx. 4)
+PASSWORD_HASH_BULK_PROCESSES = int(os.getenv('PASSWORD_HASH_BULK_PROCESSES', '0'))
+
+
+def method_prefix(method):
+    """
+    Prefijo que generate_password_hash pone a los hashes de `method`, p. ej.
+    'scrypt' -> 'scrypt:32768:8:1', sin calcular ningún hash. Lanza
+    ValueError si el método no es válido.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        if not args:
+            return 'scrypt:32768:8:1'
+        if len(args) != 3:
+            raise ValueError("'scrypt' admite 3 parámetros (n:r:p)")
+        return 'scrypt:' + ':'.join(str(int(a)) for a in args)
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' admite 2 parámetros (hash:iteraciones)")
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f'Método de hash no válido: {method}')
+
+
+class PasswordHasher:
+
+    def __init__(self, method='scrypt', processes=0, max_pending=32, bulk_processes=0):
+        self.method = method
+        self.processes = processes
+        self.max_pending = max_pending
+        self.bulk_processes = bulk_processes or max(1, min(4, (os.cpu_count() or 1) // 2))
+        self.method_prefix = method_prefix(method)
+        self._queue = None
+        self._bulk_pool = None
+        self._lock = threading.Lock()
+
+    def hash(self, password):
+        return self._call(generate_password_hash, password, method=self.method)
+
+    def verify(self, password_hash, password):
+        return self._call(check_password_hash, password_hash, password)
+
+    def hash_many(self, passwords):
+        """
+        Hashes de varias contraseñas repartidos entre procesos (importaciones
+        masivas). No pasa por la cola acotada de los inicios de sesión.
+        """
+        passwords = list(passwords)
+        if self.bulk_processes <= 1 or len(passwords) < 2:
+            return [generate_password_hash(p, method=self.method) for p in passwords]
+        chunksize = max(1, len(passwords) // (self.bulk_processes * 4))
+        hash_one = functools.partial(generate_password_hash, method=self.method)
+        return list(self._get_bulk_pool().map(hash_one, passwords, chunksize=chunksize))
+
+    def needs_rehash(self, password_hash):
+        """True si el hash se calculó con otro algoritmo o costo"""
+        return password_hash.split('$', 1)[0] != self.method_prefix
+
+    def _call(self, fn, *args, **kwargs):
+        if self.processes <= 0:
+            return fn(*args, **kwargs)
+        return self._get_queue().submit(fn, *args, **kwargs).result()
+
+    def _get_queue(self):
+        # El pool se crea al primer uso: cada worker de gunicorn tiene el suyo
+        with self._lock:
+            if self._queue is None:
+                self._queue = BoundedTaskQueue(
+                    max_workers=self.processes,
+                    max_pending=self.max_pending,
+                    executor=self._new_pool(self.processes)
+                )
+            return self._queue
+
+    def _get_bulk_pool(self):
+        with self._lock:
+            if self._bulk_pool is None:
+                self._bulk_pool = self._new_pool(self.bulk_processes)
+            return self._bulk_pool
+
+    def _new_pool(self, processes):
+        pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+        atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+        return pool
+
+
+password_hasher = PasswordHasher(
+    method=PASSWORD_HASH_METHOD,
+    processes=PASSWORD_HASH_PROCESSES,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    bulk_processes=PASSWORD_HASH_BULK_PROCESSES
+)
@@ -0,0 +1,232 @@
+"""
+Extracción del texto de las diapositivas de un .pptx.
+
+Hay dos motores que producen exactamente la misma estructura {"slides": [...]}:
+
+- 'xml' (por defecto): lee las partes XML de cada diapositiva directamente del
+  zip con lxml.iterparse, sin construir el modelo de objetos de python-pptx,
+  y libera cada forma una vez procesada. Opcionalmente reparte las
+  diapositivas entre varios procesos (PPTX_PARSER_PROCESSES).
+- 'python-pptx': la implementación original con python-pptx.
+
+El motor se elige con PPTX_PARSER_ENGINE.
+"""
+import logging
+import os
+import posixpath
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+PPTX_PARSER_ENGINE = os.getenv('PPTX_PARSER_ENGINE', 'xml').lower()
+# Procesos para repartir las diapositivas (0 = parsear en el proceso actual)
+PPTX_PARSER_PROCESSES = int(os.getenv('PPTX_PARSER_PROCESSES', '0'))
+# Por debajo de este número de diapositivas no compensa usar procesos
+PPTX_PARALLEL_MIN_SLIDES = int(os.getenv('PPTX_PARALLEL_MIN_SLIDES', '50'))
+
+_NS_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_NS_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_NS_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_SP = _NS_P + 'sp'
+_SP_TREE = _NS_P + 'spTree'
+_TX_BODY = _NS_P + 'txBody'
+_PH_PATH = f'{_NS_P}nvSpPr/{_NS_P}nvPr/{_NS_P}ph'
+_PARAGRAPH = _NS_A + 'p'
+_RUN = _NS_A + 'r'
+_FIELD = _NS_A + 'fld'
+_BREAK = _NS_A + 'br'
+_TEXT = _NS_A + 't'
+
+# Incrementar si cambia el resultado de la extracción (invalida las extracciones guardadas)
+EXTRACTION_VERSION = '1'
+EXTRACTION_META = f'slides-v{EXTRACTION_VERSION}'
+
+_process_pool = None
+
+
+def _build_slide(index, title, slide_content_parts):
+    # Si no se encontró un título de marcador de posición, usa el primer texto o un título por defecto
+    if not title and slide_content_parts:
+        title = slide_content_parts[0] # Usa la primera parte del contenido como título
+        slide_content_parts = slide_content_parts[1:] # Elimina el primer elemento si se usó como título
+    elif not title:
+        title = f"Diapositiva {index + 1}" # Título por defecto
+
+    return {
+        "title": title,
+        "content": "\n".join(slide_content_parts)
+    }
+
+
+# --- Motor python-pptx (original) ---
+
+def _extract_with_python_pptx(file_path, progress=None):
+    # Importar la librería python-pptx
+    from pptx import Presentation as PptxPresentation
+
+    prs = PptxPresentation(file_path)
+    total = len(prs.slides)
+    slides_data = []
+    for i, slide in enumerate(prs.slides):
+        slide_content_parts = []
+        title = ""
+
+        # Intenta obtener el título de la diapositiva
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                text = shape.text_frame.text.strip()
+                if text:
+                    # Si es un título de marcador de posición (placeholder)
+                    if shape.is_placeholder and shape.placeholder_format.type == 1: # Título
+                        title = text
+                    else:
+                        slide_content_parts.append(text)
+
+        slides_data.append(_build_slide(i, title, slide_content_parts))
+        if progress:
+            progress(i + 1, total)
+
+    return {"slides": slides_data}
+
+
+# --- Motor XML (zip + iterparse) ---
+
+def _slide_part_names(archive):
+    """Rutas de las diapositivas dentro del zip, en el orden de la presentación"""
+    rels = etree.fromstring(archive.read('ppt/_rels/presentation.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(_NS_REL + 'Relationship')}
+
+    presentation = etree.fromstring(archive.read('ppt/presentation.xml'))
+    names = []
+    for slide_id in presentation.iter(_NS_P + 'sldId'):
+        target = targets[slide_id.get(_NS_R + 'id')]
+        if target.startswith('/'):
+            names.append(target.lstrip('/'))
+        else:
+            names.append(posixpath.normpath(posixpath.join('ppt', target)))
+    return names
+
+
+def _text_frame_text(tx_body):
+    """Igual que text_frame.text: párrafos unidos con \\n, saltos de línea como \\v"""
+    paragraphs = []
+    for paragraph in tx_body.iterchildren(_PARAGRAPH):
+        parts = []
+        for child in paragraph.iterchildren(_RUN, _FIELD, _BREAK):
+            if child.tag == _BREAK:
+                parts.append('\v')
+            else:
+                parts.append(child.findtext(_TEXT) or '')
+        paragraphs.append(''.join(parts))
+    return '\n'.join(paragraphs)
+
+
+def _parse_slide_xml(source, index):
+    """Procesa una diapositiva forma a forma; solo las formas de primer nivel cuentan"""
+    slide_content_parts = []
+    title = ""
+
+    for _, shape in etree.iterparse(source, events=('end',), tag=_SP):
+        parent = shape.getparent()
+        if parent is None or parent.tag != _SP_TREE:
+            # Formas dentro de un grupo: python-pptx no las recorre
+            continue
+
+        tx_body = shape.find(_TX_BODY)
+        if tx_body is not None:
+            text = _text_frame_text(tx_body).strip()
+            if text:
+                placeholder = shape.find(_PH_PATH)
+                if placeholder is not None and placeholder.get('type') == 'title':
+                    title = text
+                else:
+                    slide_content_parts.append(text)
+
+        # Liberar la forma ya procesada y las anteriores
+        shape.clear()
+        while shape.getprevious() is not None:
+            del parent[0]
+
+    return _build_slide(index, title, slide_content_parts)
+
+
+def _parse_slide_range(file_path, part_names, start):
+    """Procesa varias diapositivas abriendo el zip una sola vez (también en otro proceso)"""
+    with zipfile.ZipFile(file_path) as archive:
+        slides = []
+        for offset, name in enumerate(part_names):
+            with archive.open(name) as source:
+                slides.append(_parse_slide_xml(source, start + offset))
+        return slides
+
+
+def _get_process_pool(processes):
+    """Pool de procesos compartido, creado la primera vez que se necesita"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=processes)
+    return _process_pool
+
+
+def _extract_with_xml(file_path, progress=None, processes=None):
+    processes = PPTX_PARSER_PROCESSES if processes is None else processes
+
+    with zipfile.ZipFile(file_path) as archive:
+        part_names = _slide_part_names(archive)
+        total = len(part_names)
+
+        if processes <= 1 or total < PPTX_PARALLEL_MIN_SLIDES:
+            slides_data = []
+            for i, name in enumerate(part_names):
+                with archive.open(name) as source:
+                    slides_data.append(_parse_slide_xml(source, i))
+                if progress:
+                    progress(i + 1, total)
+            return {"slides": slides_data}
+
+    # Repartir las diapositivas en bloques contiguos, varios por proceso
+    chunk_size = max(1, -(-total // (processes * 4)))
+    pool = _get_process_pool(processes)
+    futures = [
+        pool.submit(_parse_slide_range, file_path, part_names[start:start + chunk_size], start)
+        for start in range(0, total, chunk_size)
+    ]
+
+    slides_data = []
+    for future in futures:
+        slides_data.extend(future.result())
+        if progress:
+            progress(len(slides_data), total)
+    return {"slides": slides_data}
+
+
+def extract_pptx_slides(file_path, progress=None, engine=None):
+    """
+    Extrae el título y el contenido de cada diapositiva de un .pptx.
+    `progress(done, total)` se llama a medida que avanzan las diapositivas.
+    Lanza la excepción original si el archivo no se puede leer.
+    """
+    engine = (engine or PPTX_PARSER_ENGINE).lower()
+    if engine == 'python-pptx':
+        return _extract_with_python_pptx(file_path, progress)
+    if engine != 'xml':
+        logger.warning('PPTX_PARSER_ENGINE desconocido: %s. Se usa xml.', engine)
+    return _extract_with_xml(file_path, progress)
+
+
+def parse_pptx_to_json(file_path):
+    """
+    Parsea un archivo .pptx y extrae el título y el contenido de las diapositivas.
+    Retorna un diccionario con la estructura {"slides": [...]}.
+    """
+    try:
+        return extract_pptx_slides(file_path)
+    except Exception as e:
+        logger.warning("Error al parsear el archivo PPTX: %s", e)
+        # En caso de error, retorna un JSON vacío para evitar fallos
+        return {"slides": []}
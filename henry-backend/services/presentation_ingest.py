@@ -0,0 +1,73 @@
+import json
+import logging
+import time
+
+from services.blob_store import blob_store
+from services.pptx_parser import EXTRACTION_META, extract_pptx_slides
+from services.task_queue import BoundedTaskQueue
+
+logger = logging.getLogger(__name__)
+
+
+class PresentationIngestor:
+    """
+    Procesa los .pptx subidos fuera del ciclo de la petición.
+    La presentación se crea con status='generating' y el worker la deja en
+    'completed' (con el contenido extraído) o en 'failed'. El avance se guarda
+    en la columna progress (0-100) para que cualquier worker de gunicorn
+    pueda informarlo. Si se indica el hash del archivo, la extracción se
+    guarda en el almacén de archivos para reutilizarla en subidas idénticas.
+    """
+
+    # Guardar el avance como mucho cada PROGRESS_STEP puntos o PROGRESS_INTERVAL segundos
+    PROGRESS_STEP = 10
+    PROGRESS_INTERVAL = 1.0
+
+    def __init__(self, max_workers=2, max_pending=16, parser=extract_pptx_slides):
+        self.queue = BoundedTaskQueue(max_workers=max_workers, max_pending=max_pending, name='henry-pptx')
+        self.parser = parser
+
+    def submit(self, app, presentation, file_path, digest=None):
+        """
+        Encola la extracción de una presentación ya guardada.
+        Lanza QueueFullError si el pool está saturado.
+        """
+        self.queue.submit(self._run, app, presentation.id, file_path, digest)
+
+    def _run(self, app, presentation_id, file_path, digest=None):
+        from app import db
+        from models.presentation import Presentation
+
+        with app.app_context():
+            presentation = db.session.get(Presentation, presentation_id)
+            if presentation is None:
+                return
+
+            last = {'progress': 0, 'at': time.monotonic()}
+
+            def report(done, total):
+                progress = int(done * 100 / total) if total else 100
+                now = time.monotonic()
+                if progress < 100 and progress - last['progress'] < self.PROGRESS_STEP \
+                        and now - last['at'] < self.PROGRESS_INTERVAL:
+                    return
+                last.update(progress=progress, at=now)
+                presentation.progress = min(progress, 99)
+                db.session.commit()
+
+            try:
+                content = self.parser(file_path, progress=report)
+                if digest:
+                    blob_store.write_meta(digest, EXTRACTION_META, content)
+                presentation.content_json = json.dumps(content)
+                presentation.slides_count = len(content.get('slides', []))
+                presentation.status = 'completed'
+                presentation.progress = 100
+                presentation.error = None
+            except Exception:
+                logger.exception('Error al procesar la presentación %s', presentation_id)
+                db.session.rollback()
+                presentation.status = 'failed'
+                presentation.error = 'No se pudo leer el archivo de la presentación'
+
+            db.session.commit()
@@ -0,0 +1,265 @@
+"""
+Límite de peticiones con ventana deslizante (aproximada con dos ventanas fijas).
+
+Para cada clave se cuentan las peticiones de la ventana actual y de la
+anterior; la estimación es `anterior * fracción restante + actual`, que se
+comporta como una ventana deslizante sin guardar cada marca de tiempo.
+
+Backends (RATE_LIMIT_BACKEND):
+- 'sqlite' (por defecto): un archivo compartido por todos los workers de la
+  máquina (RATE_LIMIT_PATH); mismo papel que tendría Redis con INCR + EXPIRE.
+- 'memory': contadores en el proceso. Solo sirve con un único proceso: con
+  `gunicorn -w 4` cada worker lleva los suyos y el límite real se multiplica.
+- 'none': sin límites.
+
+Los límites por IP dependen de TRUSTED_PROXIES (app.py) para ver la IP real
+del cliente detrás del proxy.
+
+Las reglas se configuran como 'N/segundos', p. ej. LOGIN_RATE_LIMIT_IP=20/60.
+"""
+import functools
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from cachetools import TTLCache
+from flask import jsonify, make_response, request
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryRateLimitBackend:
+    """Contadores por ventana dentro del proceso"""
+
+    name = 'memory'
+
+    def __init__(self, max_keys=100000, max_window=86400):
+        # Una ventana deja de importar dos ventanas después de empezar
+        self._counts = TTLCache(maxsize=max_keys, ttl=2 * max_window)
+        self._lock = threading.Lock()
+
+    def hit(self, key, window_start, window):
+        """Suma una petición a la ventana actual; retorna (actual, anterior)"""
+        with self._lock:
+            current = self._counts.get((key, window_start), 0) + 1
+            self._counts[(key, window_start)] = current
+            previous = self._counts.get((key, window_start - window), 0)
+        return current, previous
+
+    def peek(self, key, window_start, window):
+        """(actual, anterior) sin sumar la petición"""
+        with self._lock:
+            return (self._counts.get((key, window_start), 0),
+                    self._counts.get((key, window_start - window), 0))
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class SQLiteRateLimitBackend:
+    """Contadores por ventana en un archivo SQLite compartido por los workers"""
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_window=86400, prune_every=1000):
+        self.path = path
+        self.max_window = max_window
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._hits = 0
+        self._lock = threading.Lock()
+
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            'key TEXT NOT NULL, window_start INTEGER NOT NULL, count INTEGER NOT NULL, '
+            'PRIMARY KEY (key, window_start))'
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, window_start, window):
+        conn = self._connection()
+        conn.execute(
+            'INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, 1) '
+            'ON CONFLICT (key, window_start) DO UPDATE SET count = count + 1',
+            (key, window_start)
+        )
+        counts = dict(conn.execute(
+            'SELECT window_start, count FROM rate_limits WHERE key = ? AND window_start IN (?, ?)',
+            (key, window_start, window_start - window)
+        ).fetchall())
+
+        with self._lock:
+            self._hits += 1
+            prune = self._hits % self.prune_every == 0
+        if prune:
+            self.prune()
+        return counts.get(window_start, 1), counts.get(window_start - window, 0)
+
+    def peek(self, key, window_start, window):
+        counts = dict(self._connection().execute(
+            'SELECT window_start, count FROM rate_limits WHERE key = ? AND window_start IN (?, ?)',
+            (key, window_start, window_start - window)
+        ).fetchall())
+        return counts.get(window_start, 0), counts.get(window_start - window, 0)
+
+    def prune(self):
+        """Elimina las ventanas que ya no cuentan para ninguna regla"""
+        self._connection().execute(
+            'DELETE FROM rate_limits WHERE window_start < ?',
+            (int(time.time()) - 2 * self.max_window,)
+        )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM rate_limits')
+
+
+class SlidingWindowLimiter:
+    """Permite como máximo `limit` peticiones por clave en `window` segundos"""
+
+    def __init__(self, backend, name, limit, window):
+        self.backend = backend
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    def hit(self, key):
+        """Registra una petición; retorna (permitida, segundos hasta poder reintentar)"""
+        now = time.time()
+        window_start = int(now // self.window * self.window)
+        current, previous = self.backend.hit(f'{self.name}:{key}', window_start, self.window)
+        return self._decide(now, window_start, current, previous)
+
+    def check(self, key):
+        """Como hit(), pero sin registrar la petición"""
+        now = time.time()
+        window_start = int(now // self.window * self.window)
+        current, previous = self.backend.peek(f'{self.name}:{key}', window_start, self.window)
+        return self._decide(now, window_start, current + 1, previous)
+
+    def _decide(self, now, window_start, current, previous):
+        elapsed = now - window_start
+        estimated = previous * (1 - elapsed / self.window) + current
+        if estimated <= self.limit:
+            return True, 0
+
+        # Cuándo la parte de la ventana anterior habrá bajado lo suficiente
+        if current > self.limit or previous == 0:
+            wait = self.window - elapsed
+        else:
+            wait = self.window * (1 - (self.limit - current) / previous) - elapsed
+        return False, max(1, math.ceil(wait))
+
+
+def parse_rule(value):
+    """'20/60' -> (20, 60)"""
+    limit, _, window = value.partition('/')
+    return int(limit), int(window or 60)
+
+
+def client_ip():
+    # Detrás de un proxy, TRUSTED_PROXIES en app.py hace que remote_addr sea la IP del cliente
+    return request.remote_addr or 'unknown'
+
+
+def json_field(field):
+    """Clave a partir de un campo del cuerpo JSON (normalizado y con hash)"""
+    def key():
+        value = (request.get_json(silent=True) or {}).get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        return hashlib.sha256(value.strip().lower().encode('utf-8')).hexdigest()[:32]
+    return key
+
+
+def _apply(limiter, key_func, method):
+    """Aplica `method` ('hit' o 'check') del limitador; retorna los segundos de espera (0 si pasa)"""
+    if limiter is None:
+        return 0
+    key = key_func()
+    if key is None:
+        return 0
+    try:
+        allowed, wait = getattr(limiter, method)(key)
+    except Exception as e:
+        logger.warning('Error en el limitador %s: %s', limiter.name, e)
+        return 0
+    return 0 if allowed else wait
+
+
+def rate_limited(*rules, failures=()):
+    """
+    Aplica las reglas (limitador, función de clave) antes de ejecutar la vista.
+    Si alguna se supera responde 429 con Retry-After, sin tocar la base de
+    datos ni calcular hashes. Si el backend falla, la petición pasa.
+
+    Las reglas de `failures` solo cuentan las peticiones que la vista
+    rechaza con 401 (credenciales inválidas): antes de la vista se comprueba
+    si queda margen y el intento se registra después. Así nadie puede
+    bloquear una cuenta ajena gastando su cupo ni se limita a quien inicia
+    sesión correctamente varias veces.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            retry_after = max(
+                [_apply(limiter, key_func, 'hit') for limiter, key_func in rules]
+                + [_apply(limiter, key_func, 'check') for limiter, key_func in failures],
+                default=0
+            )
+            if retry_after:
+                return jsonify({
+                    'error': 'Demasiados intentos, intenta de nuevo más tarde',
+                    'retry_after': retry_after
+                }), 429, {'Retry-After': str(retry_after)}
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 401:
+                for limiter, key_func in failures:
+                    _apply(limiter, key_func, 'hit')
+            return response
+        return wrapper
+    return decorator
+
+
+def build_backend_from_env():
+    """Backend configurado con las variables de entorno (o None si está desactivado)"""
+    backend_type = os.getenv('RATE_LIMIT_BACKEND', 'sqlite').lower()
+
+    if backend_type in ('none', 'off', 'false'):
+        return None
+
+    if backend_type == 'sqlite':
+        path = os.getenv('RATE_LIMIT_PATH') or os.path.join(tempfile.gettempdir(), 'henry-rate-limits.sqlite3')
+        return SQLiteRateLimitBackend(path)
+
+    if backend_type != 'memory':
+        logger.warning('RATE_LIMIT_BACKEND desconocido: %s. Se usa memoria.', backend_type)
+    return MemoryRateLimitBackend()
+
+
+def build_limiter(backend, name, env_var, default):
+    if backend is None:
+        return None
+    limit, window = parse_rule(os.getenv(env_var, default))
+    return SlidingWindowLimiter(backend, name, limit, window)
+
+
+rate_limit_backend = build_backend_from_env()
+
+login_ip_limiter = build_limiter(rate_limit_backend, 'login-ip', 'LOGIN_RATE_LIMIT_IP', '20/60')
+login_email_limiter = build_limiter(rate_limit_backend, 'login-email', 'LOGIN_RATE_LIMIT_EMAIL', '10/300')
+register_ip_limiter = build_limiter(rate_limit_backend, 'register-ip', 'REGISTER_RATE_LIMIT_IP', '5/3600')
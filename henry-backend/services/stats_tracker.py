@@ -0,0 +1,103 @@
+from itertools import chain
+
+from sqlalchemy import event, inspect
+
+# Claves en session.info con lo pendiente de recalcular en esta transacción
+_PROFESSORS = 'stats_dirty_professors'
+_CLASSES = 'stats_dirty_classes'
+
+
+class StatsTracker:
+    """
+    Mantiene al día la tabla professor_stats (models/professor_stats.py).
+
+    Tras cada flush anota qué profesores y qué grupos de campos se vieron
+    afectados por cambios en clases, materiales, tareas, inscripciones o
+    presentaciones, y justo antes del commit recalcula solo esos campos en
+    la misma transacción: las estadísticas se guardan o se descartan junto
+    con el cambio que las motivó.
+
+    Los UPDATE/DELETE masivos no pasan por el flush; quien los use debe
+    llamar a mark() o mark_class() (ver Class.unenroll_student).
+    """
+
+    # Atributos que, si cambian en un objeto existente, alteran las
+    # estadísticas (el primero identifica al profesor o la clase) y grupos
+    # de ProfessorStats.GROUPS que hay que recalcular
+    TRACKED = {
+        'Class': (('professor_id', 'status', 'enrolled_count'), ('classes',)),
+        'Material': (('class_id',), ('materials',)),
+        'Enrollment': (('class_id',), ('classes',)),
+        'Assignment': (('professor_id',), ('assignments',)),
+        'Presentation': (('author_id',), ('presentations',)),
+    }
+
+    def init_app(self, db):
+        event.listen(db.session, 'after_flush', self._collect)
+        event.listen(db.session, 'before_commit', self._refresh)
+        event.listen(db.session, 'after_rollback', self._clear)
+
+    def mark(self, session, professor_id, groups=None):
+        self._add(session, _PROFESSORS, [professor_id], groups)
+
+    def mark_class(self, session, class_id, groups=None):
+        self._add(session, _CLASSES, [class_id], groups)
+
+    def _add(self, session, key, ids, groups):
+        from models.professor_stats import ProfessorStats
+
+        pending = session.info.setdefault(key, {})
+        for pending_id in ids:
+            pending.setdefault(pending_id, set()).update(groups or ProfessorStats.GROUPS)
+
+    def _collect(self, session, flush_context):
+        for obj in chain(session.new, session.dirty, session.deleted):
+            name = type(obj).__name__
+            tracked = self.TRACKED.get(name)
+            if not tracked:
+                continue
+            attributes, groups = tracked
+
+            state = inspect(obj)
+            changed = [state.attrs[attr].history for attr in attributes]
+            if obj in session.dirty and not any(h.has_changes() for h in changed):
+                continue
+
+            # Valor actual y, si cambió, el anterior (p. ej. un material movido de clase)
+            owner = changed[0]
+            values = set(owner.added) | set(owner.unchanged) | set(owner.deleted)
+            values.discard(None)
+            if name == 'Class' and (owner.has_changes() or obj in session.deleted):
+                # Los materiales cuentan por el profesor de su clase
+                groups = groups + ('materials',)
+            key = _CLASSES if name in ('Material', 'Enrollment') else _PROFESSORS
+            self._add(session, key, values, groups)
+
+    def _refresh(self, session):
+        session.flush()
+        professors = session.info.pop(_PROFESSORS, {})
+        classes = session.info.pop(_CLASSES, {})
+        if not professors and not classes:
+            return
+
+        from models.class_model import Class
+        from models.professor_stats import ProfessorStats
+
+        if classes:
+            for class_id, professor_id in session.query(Class.id, Class.professor_id) \
+                    .filter(Class.id.in_(classes)):
+                professors.setdefault(professor_id, set()).update(classes[class_id])
+
+        # Una llamada por combinación de grupos (normalmente una sola)
+        by_groups = {}
+        for professor_id, groups in professors.items():
+            by_groups.setdefault(frozenset(groups), []).append(professor_id)
+        for groups, professor_ids in by_groups.items():
+            ProfessorStats.refresh(professor_ids, groups)
+
+    def _clear(self, session):
+        session.info.pop(_PROFESSORS, None)
+        session.info.pop(_CLASSES, None)
+
+
+stats_tracker = StatsTracker()
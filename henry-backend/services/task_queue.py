@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """La cola de trabajos en segundo plano alcanzó su capacidad máxima"""
+
+
+class BoundedTaskQueue:
+    """
+    Pool de hilos con cola acotada: como máximo `max_workers` tareas en
+    ejecución y `max_pending` tareas aceptadas (en ejecución + en espera).
+    Si la cola está llena, submit() falla de inmediato en lugar de bloquear
+    al worker que atiende la petición.
+    """
+
+    def __init__(self, max_workers=4, max_pending=32, name='henry-task', executor=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        # Se puede pasar otro executor (p. ej. un ProcessPoolExecutor) con la misma cota
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError()
+
+        with self._lock:
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    @property
+    def pending(self):
+        """Número de tareas aceptadas que aún no terminan"""
+        return self._pending
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+
+class TokenBlocklist:
+    """
+    Lista de tokens revocados.
+
+    - Refresh tokens: se consultan siempre en la base de datos. Son pocos
+      (uno por renovación) y la rotación debe ser exacta: un refresh token ya
+      usado no puede volver a usarse, tampoco desde otro worker.
+    - Access tokens: duran minutos y se revisan en cada petición, así que se
+      comparan contra un conjunto en memoria que se sincroniza con la tabla
+      revoked_tokens cada `sync_interval` segundos (solo las filas nuevas).
+      Un cierre de sesión tarda como máximo ese tiempo en verse en los demás
+      workers; en el que lo procesa es inmediato.
+    """
+
+    PURGE_INTERVAL = 3600
+
+    def __init__(self, sync_interval=30):
+        self.sync_interval = sync_interval
+        self._revoked = {}  # jti -> expira (timestamp)
+        self._watermark = None
+        self._last_sync = 0.0
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+
+    def revoke(self, jwt_payload):
+        """
+        Revoca el token (payload ya decodificado). Retorna False si ya estaba
+        revocado, p. ej. dos renovaciones simultáneas con el mismo refresh token.
+        """
+        from app import db
+        from models.revoked_token import RevokedToken
+
+        db.session.add(RevokedToken(
+            jti=jwt_payload['jti'],
+            token_type=jwt_payload.get('type', 'access'),
+            user_id=int(jwt_payload['sub']),
+            expires_at=datetime.utcfromtimestamp(jwt_payload['exp'])
+        ))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+        with self._lock:
+            self._revoked[jwt_payload['jti']] = jwt_payload['exp']
+        return True
+
+    def is_revoked(self, jwt_payload):
+        jti = jwt_payload['jti']
+        if jwt_payload.get('type') == 'refresh':
+            from app import db
+            from models.revoked_token import RevokedToken
+            return db.session.query(RevokedToken.id).filter_by(jti=jti).first() is not None
+
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self._sync()
+        with self._lock:
+            return jti in self._revoked
+
+    def _sync(self):
+        from app import db
+        from models.revoked_token import RevokedToken
+
+        now = datetime.utcnow()
+        query = db.session.query(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at) \
+            .filter(RevokedToken.token_type == 'access', RevokedToken.expires_at > now)
+        if self._watermark is not None:
+            # Margen para filas confirmadas después de la última sincronización con revoked_at anterior
+            query = query.filter(RevokedToken.revoked_at > self._watermark - timedelta(seconds=self.sync_interval))
+        rows = query.all()
+
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._revoked[jti] = (expires_at - datetime(1970, 1, 1)).total_seconds()
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+            if self._watermark is None:
+                self._watermark = now
+            # Los tokens expirados ya no pasan la validación: no hace falta recordarlos
+            current = time.time()
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > current}
+            self._last_sync = time.monotonic()
+
+        if time.monotonic() - self._last_purge >= self.PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            with db.engine.begin() as conn:
+                conn.execute(db.delete(RevokedToken.__table__).where(RevokedToken.expires_at <= now))
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._watermark = None
+            self._last_sync = 0.0
+
+
+token_blocklist = TokenBlocklist(sync_interval=int(os.getenv('TOKEN_BLOCKLIST_SYNC', '30')))
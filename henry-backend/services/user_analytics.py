@@ -0,0 +1,139 @@
+"""
+Estadísticas de usuarios para el panel de administración.
+
+Los totales salen de un único GROUP BY role, is_active (cubierto por el
+índice ix_users_role_is_active) y las series de un GROUP BY por periodo,
+filtrado por fecha:
+- signups: usuarios creados en cada periodo (users.created_at);
+- active_users: usuarios distintos que iniciaron sesión al menos una vez en
+  cada periodo (tabla user_activity, una fila por usuario y día);
+- last_seen: usuarios cuyo último inicio de sesión cae en cada periodo
+  (users.last_login_at); cada usuario aparece una sola vez, en su periodo
+  más reciente, así que no sirve como historial de actividad.
+Los resultados se guardan unos segundos (USER_ANALYTICS_TTL) porque el
+panel se refresca a menudo y los números no necesitan ser exactos al
+segundo.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+
+from cachetools import TTLCache
+
+from app import db
+from models.user import User
+from models.user_activity import UserActivity
+
+BUCKETS = ('day', 'week', 'month')
+MAX_DAYS = 366
+
+_cache = TTLCache(maxsize=64, ttl=int(os.getenv('USER_ANALYTICS_TTL', '60')))
+_lock = threading.Lock()
+
+
+def _cached(key, compute):
+    with _lock:
+        value = _cache.get(key)
+    if value is None:
+        value = compute()
+        with _lock:
+            _cache[key] = value
+    return value
+
+
+def _count_by_role():
+    """Totales por rol y estado con una sola consulta"""
+    rows = db.session.query(User.role, User.is_active, db.func.count()) \
+        .group_by(User.role, User.is_active).all()
+
+    by_role = {}
+    total = active = 0
+    for role, is_active, count in rows:
+        role_counts = by_role.setdefault(role, {'total': 0, 'active': 0})
+        role_counts['total'] += count
+        total += count
+        if is_active:
+            role_counts['active'] += count
+            active += count
+    return {'total': total, 'active': active, 'by_role': by_role}
+
+
+def get_user_counts():
+    """Totales por rol y estado (con caché)"""
+    return _cached('counts', _count_by_role)
+
+
+def _bucket_start(value, bucket):
+    day = value.date() if isinstance(value, datetime) else value
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _bucket_expression(column, bucket):
+    """Expresión SQL que trunca la fecha al inicio del periodo (semanas desde el lunes)"""
+    if db.engine.dialect.name == 'sqlite':
+        if bucket == 'week':
+            return db.func.date(column, '-6 days', 'weekday 1')
+        if bucket == 'month':
+            return db.func.date(column, 'start of month')
+        return db.func.date(column)
+    return db.func.date(db.func.date_trunc(bucket, column))
+
+
+def _series(column, since, bucket, count=None):
+    """
+    [{'period': 'YYYY-MM-DD', 'count': n}] desde `since`, con ceros en los
+    periodos vacíos. `count` es la expresión a contar (por defecto, filas).
+    """
+    period = _bucket_expression(column, bucket)
+    rows = db.session.query(period, count if count is not None else db.func.count()) \
+        .filter(column >= since) \
+        .group_by(period).all()
+    counts = {str(start): total for start, total in rows}
+
+    series = []
+    current = _bucket_start(since, bucket)
+    today = datetime.utcnow().date()
+    while current <= today:
+        series.append({'period': current.isoformat(), 'count': counts.get(current.isoformat(), 0)})
+        if bucket == 'month':
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=7 if bucket == 'week' else 1)
+    return series
+
+
+def get_user_analytics(days=30, bucket='day'):
+    """
+    Totales por rol/estado y series de altas, usuarios activos por periodo
+    y último acceso (ver el docstring del módulo).
+    Lanza ValueError si los parámetros no son válidos.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket debe ser uno de: {', '.join(BUCKETS)}")
+    if not 1 <= days <= MAX_DAYS:
+        raise ValueError(f'days debe estar entre 1 y {MAX_DAYS}')
+
+    def compute():
+        today = datetime.utcnow().date()
+        since = datetime.combine(_bucket_start(today - timedelta(days=days - 1), bucket), datetime.min.time())
+        return {
+            'counts': get_user_counts(),
+            'days': days,
+            'bucket': bucket,
+            'signups': _series(User.created_at, since, bucket),
+            'active_users': _series(UserActivity.day, since.date(), bucket,
+                                    db.func.count(db.distinct(UserActivity.user_id))),
+            'last_seen': _series(User.last_login_at, since, bucket),
+            'generated_at': datetime.utcnow().isoformat()
+        }
+
+    return _cached(('analytics', days, bucket), compute)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
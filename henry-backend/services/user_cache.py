@@ -0,0 +1,57 @@
+import os
+import threading
+
+from cachetools import TTLCache
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+
+class UserIdentityCache:
+    """
+    Caché TTL/LRU de usuarios autenticados por proceso.
+    Guarda una copia de las columnas de cada usuario y la vuelve a adjuntar
+    a la sesión de la petición sin consultar la base de datos.
+
+    La invalidación solo alcanza al proceso que hace el cambio: en los demás
+    workers un cambio de rol o una desactivación tarda hasta `ttl` segundos
+    en verse. Los UPDATE masivos (db.update) no disparan los eventos del
+    ORM, así que quien los use debe llamar a invalidate() explícitamente.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, session, model, user_id):
+        """Retorna el usuario adjunto a la sesión, o None si no está en caché"""
+        with self._lock:
+            values = self._cache.get(user_id)
+        if values is None:
+            return None
+
+        instance = model(**values)
+        make_transient_to_detached(instance)
+        return session.merge(instance, load=False)
+
+    def set(self, user):
+        """Guarda una instantánea de las columnas del usuario"""
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(user).mapper.column_attrs}
+        with self._lock:
+            self._cache[user.id] = values
+
+    def invalidate(self, user_id):
+        """Elimina un usuario de la caché (cambios de perfil, rol o contraseña)"""
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# USER_CACHE_TTL es también el máximo que tarda un cambio de rol o una
+# desactivación en verse en los demás workers de gunicorn
+user_cache = UserIdentityCache(
+    maxsize=int(os.getenv('USER_CACHE_SIZE', '1024')),
+    ttl=int(os.getenv('USER_CACHE_TTL', '60'))
+)
@@ -0,0 +1,192 @@
+"""
+Importación masiva de usuarios (inicio de semestre).
+
+El archivo (CSV con encabezado o NDJSON, un objeto por línea) se lee como
+stream y se procesa por lotes de USER_IMPORT_BATCH_SIZE filas. Por lote:
+
+1. validación de cada fila (email, nombre, rol, contraseña);
+2. una sola consulta `email IN (...)` para descartar los ya registrados;
+3. hashes de las contraseñas distintas del lote en paralelo (una
+   contraseña por defecto compartida se calcula una sola vez);
+4. un INSERT con executemany y un commit.
+
+Las filas con problemas no detienen la importación: se informan con su
+número de línea y el motivo.
+"""
+import codecs
+import csv
+import json
+import os
+
+from sqlalchemy.exc import IntegrityError
+
+from services.password_hasher import password_hasher
+
+IMPORT_BATCH_SIZE = int(os.getenv('USER_IMPORT_BATCH_SIZE', '1000'))
+# Errores que se devuelven como máximo (el conteo siempre es completo)
+MAX_REPORTED_ERRORS = 1000
+
+ROLES = ('estudiante', 'profesor', 'administrador')
+REQUIRED_FIELDS = ('email', 'full_name', 'role', 'password')
+OPTIONAL_FIELDS = ('institution', 'department', 'student_id', 'semester', 'career')
+
+
+def _has_invalid_values(row):
+    """En NDJSON los valores pueden ser números, listas u objetos en lugar de texto"""
+    if any(row.get(field) is not None and not isinstance(row[field], str) for field in REQUIRED_FIELDS):
+        return True
+    return any(isinstance(row.get(field), (bool, list, dict)) for field in OPTIONAL_FIELDS)
+
+
+def read_csv(stream):
+    """Filas de un CSV con encabezado, sin cargar el archivo completo"""
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson(stream):
+    for line_number, line in enumerate(codecs.iterdecode(stream, 'utf-8-sig'), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+class UserImporter:
+
+    def __init__(self, validate_email, validate_password, default_password=None,
+                 batch_size=IMPORT_BATCH_SIZE):
+        self.validate_email = validate_email
+        self.validate_password = validate_password
+        self.default_password = default_password
+        self.batch_size = batch_size
+        self.total_rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self._seen_emails = set()
+
+    def run(self, rows):
+        """Procesa las filas (line, dict) y retorna el resumen de la importación"""
+        batch = []
+        for line, row in rows:
+            self.total_rows += 1
+            user_data = self._validate(line, row)
+            if user_data:
+                batch.append((line, user_data))
+            if len(batch) >= self.batch_size:
+                self._insert_batch(batch)
+                batch = []
+        if batch:
+            self._insert_batch(batch)
+
+        return {
+            'total_rows': self.total_rows,
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors
+        }
+
+    def _error(self, line, email, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'email': email, 'error': message})
+
+    def _validate(self, line, row):
+        if row is None:
+            self._error(line, None, 'Fila con formato inválido')
+            return None
+
+        row = {k.strip().lower(): (v.strip() if isinstance(v, str) else v)
+               for k, v in row.items() if isinstance(k, str)}
+        if _has_invalid_values(row):
+            self._error(line, None, 'Fila con formato inválido')
+            return None
+        email = (row.get('email') or '').lower()
+        full_name = row.get('full_name') or ''
+        role = (row.get('role') or 'estudiante').lower()
+        password = row.get('password') or self.default_password
+
+        if not email or not self.validate_email(email):
+            self._error(line, email or None, 'Formato de email inválido')
+            return None
+        if email in self._seen_emails:
+            self._error(line, email, 'Email repetido en el archivo')
+            return None
+        if not full_name:
+            self._error(line, email, 'El campo full_name es requerido')
+            return None
+        if role not in ROLES:
+            self._error(line, email, 'Rol inválido')
+            return None
+        if not password:
+            self._error(line, email, 'Falta la contraseña (columna password o default_password)')
+            return None
+        is_valid, message = self.validate_password(password)
+        if not is_valid:
+            self._error(line, email, message)
+            return None
+
+        self._seen_emails.add(email)
+        user_data = {'email': email, 'full_name': full_name, 'role': role, 'password': password}
+        for field in OPTIONAL_FIELDS:
+            if row.get(field):
+                user_data[field] = str(row[field])
+        return user_data
+
+    def _drop_existing(self, batch):
+        from app import db
+        from models.user import User
+
+        emails = [data['email'] for _, data in batch]
+        existing = {email for (email,) in
+                    db.session.query(User.email).filter(User.email.in_(emails))}
+        remaining = []
+        for line, data in batch:
+            if data['email'] in existing:
+                self._error(line, data['email'], 'El email ya está registrado')
+            else:
+                remaining.append((line, data))
+        return remaining
+
+    def _insert_batch(self, batch):
+        from app import db
+        from models.user import User
+
+        batch = self._drop_existing(batch)
+        if not batch:
+            return
+
+        distinct_passwords = list({data['password'] for _, data in batch})
+        hashes = dict(zip(distinct_passwords, password_hasher.hash_many(distinct_passwords)))
+
+        rows = []
+        for _, data in batch:
+            row = dict(data)
+            row['password_hash'] = hashes[row.pop('password')]
+            rows.append(row)
+
+        while rows:
+            try:
+                db.session.execute(db.insert(User), rows)
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Otra importación o registro creó alguno de estos emails entretanto;
+                # cada reintento descarta al menos una fila
+                db.session.rollback()
+                remaining = self._drop_existing(batch)
+                if len(remaining) == len(batch):
+                    # El conflicto no es de email: se informa el lote sin insertarlo
+                    for line, data in batch:
+                        self._error(line, data['email'], 'No se pudo crear el usuario')
+                    return
+                batch = remaining
+                emails = {data['email'] for _, data in batch}
+                rows = [row for row in rows if row['email'] in emails]
+
+        self.created += len(rows)